@@ -0,0 +1,240 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from Instruction_IR import Opcode
+from Memory_Layout import NeoASMMemoryLayoutPlanner, parse_size
+
+# AOT blocks laid out at compile time into one arena image. The image is a
+# header, a directory of blocks and a page-aligned data section holding
+# every block at its planned offset. Blocks without initial contents are
+# zero and are left as holes in the file, so the image costs no disk space
+# or write time for them. At start-up the runtime maps the whole image with
+# a single mmap() call and hands out memoryviews into it, instead of
+# allocating and initialising each block on its own.
+
+ARENA_MAGIC = b'NEOM'  # NEOA is the parse cache's node arena (AST_Nodes)
+ARENA_FORMAT_VERSION = 1
+ARENA_SUFFIX = ".arena"
+ARENA_KINDS = ("STATIC", "PRELINK")  # AOT kinds evaluated at compile time
+
+# magic, version, reserved, alignment, block count, data offset, data size
+_HEADER = struct.Struct('<4sHHIIQQ')
+# offset within the data section, size, name length, kind length
+_ENTRY = struct.Struct('<QQHH')
+
+
+def _align_up(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def arena_blocks(instructions, cache_line_size=64):
+    # Name -> (kind, size) of the AOT blocks that go into the arena; a block
+    # declared twice keeps its last declaration, as in the memory layout
+    blocks = {}
+    for instruction in instructions:
+        if instruction.opcode == Opcode.AOT and instruction.operand("KIND") in ARENA_KINDS:
+            size = parse_size(instruction.operand("SIZE"), cache_line_size)
+            blocks[instruction.name] = (instruction.operand("KIND"), max(size, 1))
+    return blocks
+
+
+def write_arena(instructions, path, cache_line_size=64, contents=None):
+    # Lay out the STATIC and PRELINK AOT blocks of a generated program and
+    # write the arena image to path. contents maps block names to their
+    # initial bytes (default: zero). Returns the layout report.
+    contents = contents or {}
+    blocks = arena_blocks(instructions, cache_line_size)
+    for name, data in contents.items():
+        if name not in blocks:
+            raise ValueError(f"No STATIC or PRELINK AOT block {name} to initialise")
+        if len(data) > blocks[name][1]:
+            raise ValueError(f"Initial contents of {name} exceed its {blocks[name][1]} B")
+
+    planner = NeoASMMemoryLayoutPlanner(cache_line_size)
+    for name, (kind, size) in blocks.items():
+        planner.add(name, "AOT", size)
+    report = planner.plan()
+
+    directory = bytearray()
+    for name, (kind, size) in blocks.items():
+        encoded_name, encoded_kind = name.encode("utf-8"), kind.encode("utf-8")
+        directory += _ENTRY.pack(planner.objects[name].address, size, len(encoded_name), len(encoded_kind))
+        directory += encoded_name + encoded_kind
+    data_offset = _align_up(_HEADER.size + len(directory), mmap.ALLOCATIONGRANULARITY)
+    data_size = report["total_bytes"]
+
+    # Written next to the target and renamed over it, so a running service
+    # that has the old image mapped keeps a consistent view
+    directory_name = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory_name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(_HEADER.pack(ARENA_MAGIC, ARENA_FORMAT_VERSION, 0, cache_line_size, len(blocks),
+                                    data_offset, data_size))
+            file.write(directory)
+            for name, data in contents.items():
+                if data:
+                    file.seek(data_offset + planner.objects[name].address)
+                    file.write(data)
+            file.truncate(data_offset + data_size)
+        os.chmod(temp_path, 0o644)  # mkstemp creates owner-only files; images are shared
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return report
+
+
+class NeoASMArena:
+    """A compiled AOT arena image, mapped into memory with one mmap() call.
+
+    block(name) (or arena[name]) returns a writable memoryview of a block.
+    By default the mapping is private copy-on-write: pages are shared with
+    every process that maps the same image until one of them writes, and
+    writes never reach the file. With writable=False the mapping is
+    read-only. Opening an image costs open, fstat, mmap and close whatever
+    the number of blocks.
+    """
+
+    def __init__(self, path, writable=True):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.path = path
+        self.view = memoryview(self._map)
+        try:
+            self.blocks = self._read_directory()
+        except ValueError:
+            self.close()
+            raise
+
+    def _read_directory(self):
+        # Name -> (kind, offset in the mapping, size)
+        if len(self.view) < _HEADER.size:
+            raise ValueError(f"{self.path}: truncated arena header")
+        magic, version, _, self.alignment, count, self.data_offset, self.data_size = _HEADER.unpack_from(self.view)
+        if magic != ARENA_MAGIC:
+            raise ValueError(f"{self.path}: not a NeoASM arena image")
+        if version != ARENA_FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported arena version {version}")
+        if self.data_offset + self.data_size > len(self.view):
+            raise ValueError(f"{self.path}: truncated arena data")
+
+        blocks = {}
+        position = _HEADER.size
+        for _ in range(count):
+            if position + _ENTRY.size > self.data_offset:
+                raise ValueError(f"{self.path}: corrupt arena directory")
+            offset, size, name_length, kind_length = _ENTRY.unpack_from(self.view, position)
+            position += _ENTRY.size
+            name = bytes(self.view[position:position + name_length]).decode("utf-8")
+            position += name_length
+            kind = bytes(self.view[position:position + kind_length]).decode("utf-8")
+            position += kind_length
+            if offset + size > self.data_size:
+                raise ValueError(f"{self.path}: block {name} lies outside the arena")
+            blocks[name] = (kind, self.data_offset + offset, size)
+        return blocks
+
+    def block(self, name):
+        try:
+            _, offset, size = self.blocks[name]
+        except KeyError:
+            raise KeyError(f"No AOT block {name} in {self.path}") from None
+        return self.view[offset:offset + size]
+
+    def __getitem__(self, name):
+        return self.block(name)
+
+    def __contains__(self, name):
+        return name in self.blocks
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def close(self):
+        if self.view is None:
+            return
+        self.view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Keep the arena open, so close() can be retried once the block
+            # views are released
+            self.view = memoryview(self._map)
+            raise BufferError(f"{self.path}: block views are still in use; release them first") from None
+        self.view = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-arena", description="Build or inspect NeoASM AOT arena images.")
+    parser.add_argument("files", nargs="+", help=".neo sources to build images for (or images, with --list)")
+    parser.add_argument("-o", "--output-dir", help="directory for the images (default: next to each source)")
+    parser.add_argument("--frontend", choices=("parser", "analyzer", "table"), default="parser")
+    parser.add_argument("--machine-profile", nargs="?", const="", metavar="PATH",
+                        help="lay out for the stored profile of this machine instead of the fixed default")
+    parser.add_argument("--list", action="store_true", help="print the blocks of existing images")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    if args.list:
+        for path in args.files:
+            try:
+                with NeoASMArena(path, writable=False) as arena:
+                    print(f"{path}: {len(arena)} blocks, {arena.data_size} B, alignment {arena.alignment} B")
+                    for name, (kind, offset, size) in arena.blocks.items():
+                        print(f"  {offset - arena.data_offset:>10}  {size:>10} B  {kind:<8} {name}")
+            except (OSError, ValueError) as error:
+                print(f"Error: {error}", file=sys.stderr)
+                return 1
+        return 0
+
+    # Imported here: listing images needs neither frontend nor code generator
+    from Code_Generator import NeoASMCodeGeneratorOptimized
+    from Compiler_Driver import parse_source
+    from Machine_Profile import machine_architecture
+
+    cpu_architecture = None
+    try:
+        if args.machine_profile is not None:
+            cpu_architecture = machine_architecture(args.machine_profile or None)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for path in args.files:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                ast = parse_source(file.read(), args.frontend)
+            generator = NeoASMCodeGeneratorOptimized(cpu_architecture)
+            instructions = generator.build_instructions(ast)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            image = os.path.join(args.output_dir or os.path.dirname(path), stem + ARENA_SUFFIX)
+            report = write_arena(instructions, image, generator.cpu_architecture["cache_line_size"])
+        except (OSError, SyntaxError, ValueError) as error:
+            print(f"Error: {path}: {error}", file=sys.stderr)
+            return 1
+        print(f"{image}: {len(report['objects'])} blocks, {report['total_bytes']} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,539 @@
+import struct
+import sys
+from array import array
+
+# Typed AST node layer. Nodes keep their fields in __slots__ instead of nested
+# dicts, identifiers and attribute values are interned, and every node still
+# answers node["type"], node["attributes"]["range"], node["entries"][0]["value"]
+# and so on, so code written against the dict nodes shown in AST.py keeps working.
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class NodeAttributes:
+    """Read-only dict view over the attribute slots of a node."""
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def __getitem__(self, key):
+        value = getattr(self._node, self._node._attribute_slots[key])
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        node = self._node
+        pairs = []
+        for key, slot in node._attribute_slots.items():
+            value = getattr(node, slot)
+            if value is not None:
+                pairs.append((key, value))
+        return pairs
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, NodeAttributes):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class MapEntry(tuple):
+    """A (key, value) map entry that can also be read as {"key": ..., "value": ...}."""
+
+    __slots__ = ()
+
+    def __new__(cls, key, value):
+        return tuple.__new__(cls, (_intern(key), _intern(value)))
+
+    def __getitem__(self, index):
+        if index == 'key':
+            return tuple.__getitem__(self, 0)
+        if index == 'value':
+            return tuple.__getitem__(self, 1)
+        return tuple.__getitem__(self, index)
+
+    @property
+    def key(self):
+        return tuple.__getitem__(self, 0)
+
+    @property
+    def value(self):
+        return tuple.__getitem__(self, 1)
+
+    def to_dict(self):
+        return {'key': self.key, 'value': self.value}
+
+
+class NeoASMNode:
+    """Base class for slotted AST nodes."""
+
+    __slots__ = ('identifier',)
+
+    node_type = None
+    _keys = ('type', 'identifier')  # Keys exposed through the dict view, in order
+    _attribute_slots = {}  # Attribute name -> slot name, for node["attributes"]
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.node_type
+        if key == 'attributes' and self._attribute_slots:
+            return NodeAttributes(self)
+        if key in self._keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def keys(self):
+        return list(self._keys)
+
+    def to_dict(self):
+        result = {}
+        for key in self._keys:
+            value = self[key]
+            if key == 'attributes':
+                value = dict(value.items())
+            elif key == 'entries':
+                value = [entry.to_dict() for entry in value]
+            elif key == 'body':
+                value = [child.to_dict() for child in value]
+            result[key] = value
+        return result
+
+    def __eq__(self, other):
+        if isinstance(other, (NeoASMNode, dict)):
+            other_dict = other.to_dict() if isinstance(other, NeoASMNode) else other
+            return self.to_dict() == other_dict
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class MapNode(NeoASMNode):
+    __slots__ = ('entries',)
+
+    node_type = 'map'
+    _keys = ('type', 'identifier', 'entries')
+
+    def __init__(self, identifier, entries):
+        self.identifier = _intern(identifier)
+        self.entries = tuple(
+            entry if isinstance(entry, MapEntry) else MapEntry(*_entry_pair(entry))
+            for entry in entries
+        )
+
+
+class VariableNode(NeoASMNode):
+    __slots__ = ('var_type', 'range', 'check')
+
+    node_type = 'variable'
+    _keys = ('type', 'var_type', 'identifier', 'attributes')
+    _attribute_slots = {'range': 'range', 'check': 'check'}
+
+    def __init__(self, var_type, identifier, range=None, check=None):
+        self.var_type = _intern(var_type)
+        self.identifier = _intern(identifier)
+        self.range = _intern(range)
+        self.check = _intern(check)
+
+
+class AOTNode(NeoASMNode):
+    __slots__ = ('aot_type', 'size')
+
+    node_type = 'AOT'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'type': 'aot_type', 'size': 'size'}
+
+    def __init__(self, identifier, aot_type=None, size=None):
+        self.identifier = _intern(identifier)
+        self.aot_type = _intern(aot_type)
+        self.size = _intern(size)
+
+
+class PacketNode(NeoASMNode):
+    __slots__ = ('size', 'exec_mode', 'priority')
+
+    node_type = 'packet'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'size': 'size', 'exec': 'exec_mode', 'priority': 'priority'}
+
+    def __init__(self, identifier, size=None, exec_mode=None, priority=None):
+        self.identifier = _intern(identifier)
+        self.size = _intern(size)
+        self.exec_mode = _intern(exec_mode)
+        self.priority = _intern(priority)
+
+
+class SimdNode(NeoASMNode):
+    __slots__ = ('simd_type', 'input', 'output', 'op', 'device')
+
+    node_type = 'simd'
+    _keys = ('type', 'simd_type', 'identifier', 'attributes')
+    _attribute_slots = {'in': 'input', 'out': 'output', 'op': 'op', 'device': 'device'}
+
+    def __init__(self, simd_type, identifier=None, input=None, output=None, op=None, device=None):
+        self.simd_type = _intern(simd_type)
+        self.identifier = _intern(identifier)
+        self.input = _intern(input)
+        self.output = _intern(output)
+        self.op = _intern(op)
+        self.device = _intern(device)
+
+
+class StrMapNode(NeoASMNode):
+    __slots__ = ('op', 'input', 'output', 'device')
+
+    node_type = 'str_map'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'op': 'op', 'in': 'input', 'out': 'output', 'device': 'device'}
+
+    def __init__(self, identifier, op=None, input=None, output=None, device=None):
+        self.identifier = _intern(identifier)
+        self.op = _intern(op)
+        self.input = _intern(input)
+        self.output = _intern(output)
+        self.device = _intern(device)
+
+
+class ExecNode(NeoASMNode):
+    __slots__ = ('link', 'size', 'op', 'device')
+
+    node_type = 'exec'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'link': 'link', 'size': 'size', 'op': 'op', 'device': 'device'}
+
+    def __init__(self, identifier, link=None, size=None, op=None, device=None):
+        self.identifier = _intern(identifier)
+        self.link = _intern(link)
+        self.size = _intern(size)
+        self.op = _intern(op)
+        self.device = _intern(device)
+
+
+class ValidateNode(NeoASMNode):
+    __slots__ = ('rule',)
+
+    node_type = 'validate'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'rule': 'rule'}
+
+    def __init__(self, identifier, rule=None):
+        self.identifier = _intern(identifier)
+        self.rule = _intern(rule)
+
+
+class LinkNode(NeoASMNode):
+    __slots__ = ('src', 'dst')
+
+    node_type = 'link'
+    _keys = ('type', 'identifier', 'attributes')
+    _attribute_slots = {'src': 'src', 'dst': 'dst'}
+
+    def __init__(self, identifier, src=None, dst=None):
+        self.identifier = _intern(identifier)
+        self.src = _intern(src)
+        self.dst = _intern(dst)
+
+
+class FrameNode(NeoASMNode):
+    __slots__ = ('body',)
+
+    node_type = 'frame'
+    _keys = ('type', 'identifier', 'body')
+
+    def __init__(self, identifier, body):
+        self.identifier = _intern(identifier)
+        self.body = tuple(node_from_dict(child) for child in body)
+
+
+NODE_CLASSES = {
+    'map': MapNode,
+    'variable': VariableNode,
+    'AOT': AOTNode,
+    'packet': PacketNode,
+    'simd': SimdNode,
+    'str_map': StrMapNode,
+    'exec': ExecNode,
+    'validate': ValidateNode,
+    'link': LinkNode,
+    'frame': FrameNode,
+}
+
+# Node classes whose fields are all plain strings: they can be rebuilt from
+# (identifier, {slot: value}) and stored column-wise in the arena
+_FIELD_SLOTS = {
+    VariableNode: ('var_type', 'range', 'check'),
+    AOTNode: ('aot_type', 'size'),
+    PacketNode: ('size', 'exec_mode', 'priority'),
+    SimdNode: ('simd_type', 'input', 'output', 'op', 'device'),
+    StrMapNode: ('op', 'input', 'output', 'device'),
+    ExecNode: ('link', 'size', 'op', 'device'),
+    ValidateNode: ('rule',),
+    LinkNode: ('src', 'dst'),
+}
+
+
+def _entry_pair(entry):
+    if isinstance(entry, dict):
+        return entry['key'], entry['value']
+    key, value = entry
+    return key, value
+
+
+def _node_from_fields(node_class, identifier, fields):
+    node = node_class.__new__(node_class)
+    node.identifier = _intern(identifier)
+    for slot, value in fields.items():
+        setattr(node, slot, _intern(value))
+    return node
+
+
+def node_from_dict(node):
+    """Build a slotted node from a dict node as produced before the typed layer."""
+    if isinstance(node, NeoASMNode):
+        return node
+    node_type = node['type']
+    node_class = NODE_CLASSES.get(node_type)
+    if node_class is None:
+        raise ValueError(f"Unknown node type: {node_type}")
+    if node_class is MapNode:
+        return MapNode(node['identifier'], node['entries'])
+    if node_class is FrameNode:
+        return FrameNode(node['identifier'], node['body'])
+
+    attributes = node.get('attributes', {})
+    fields = {slot: attributes.get(key) for key, slot in node_class._attribute_slots.items()}
+    for key in node_class._keys:
+        if key not in ('type', 'identifier', 'attributes'):
+            fields[key] = node[key]
+    return _node_from_fields(node_class, node.get('identifier'), fields)
+
+
+ARENA_FORMAT_VERSION = 2  # Bumped whenever the arena image layout changes
+
+
+class NeoASMNodeArena:
+    """Struct-of-arrays storage for bulk programs.
+
+    Each node occupies one row of parallel array.array columns holding its kind
+    and indices into a shared string table (0 means "absent"). Map entries live
+    in their own key/value columns, and frames are stored in pre-order with
+    their body rows directly after them. Rows are turned back into slotted
+    nodes only when they are accessed; indexing and iteration cover the
+    top-level nodes listed in roots.
+    """
+
+    _layouts = (MapNode, FrameNode) + tuple(_FIELD_SLOTS)
+    _kind_ids = {node_class: kind_id for kind_id, node_class in enumerate(_layouts)}
+    _column_count = max(len(slots) for slots in _FIELD_SLOTS.values())
+
+    def __init__(self):
+        self.strings = [None]  # String table; index 0 is the "absent" marker
+        self._string_ids = {}
+        self.roots = array('I')  # Row of every top-level node
+        self.kinds = array('B')
+        self.identifiers = array('I')
+        self.columns = tuple(array('I') for _ in range(self._column_count))
+        self.entry_keys = array('I')
+        self.entry_values = array('I')
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        arena = cls()
+        for node in nodes:
+            arena.append(node)
+        return arena
+
+    def string_id(self, value):
+        if value is None:
+            return 0
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self._string_ids[value] = string_id
+        return string_id
+
+    def append(self, node):
+        row = self._append_row(node_from_dict(node))
+        self.roots.append(row)
+        return len(self.roots) - 1
+
+    def _append_row(self, node):
+        node_class = type(node)
+        row = len(self.kinds)
+        self.kinds.append(self._kind_ids[node_class])
+        self.identifiers.append(self.string_id(node.identifier))
+        for column in self.columns:
+            column.append(0)
+
+        if node_class is MapNode:
+            # Map rows point at their run of entries: (first entry, entry count)
+            self.columns[0][row] = len(self.entry_keys)
+            self.columns[1][row] = len(node.entries)
+            for key, value in node.entries:
+                self.entry_keys.append(self.string_id(key))
+                self.entry_values.append(self.string_id(value))
+        elif node_class is FrameNode:
+            # Frame rows record their child count and total subtree size
+            for child in node.body:
+                self._append_row(child)
+            self.columns[0][row] = len(node.body)
+            self.columns[1][row] = len(self.kinds) - row
+        else:
+            for column, slot in zip(self.columns, _FIELD_SLOTS[node_class]):
+                column[row] = self.string_id(getattr(node, slot))
+        return row
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, index):
+        return self.node_at(self.roots[index])
+
+    def __iter__(self):
+        for row in self.roots:
+            yield self.node_at(row)
+
+    def node_at(self, row):
+        strings = self.strings
+        node_class = self._layouts[self.kinds[row]]
+        identifier = strings[self.identifiers[row]]
+
+        if node_class is MapNode:
+            first = self.columns[0][row]
+            last = first + self.columns[1][row]
+            entries = [
+                MapEntry(strings[self.entry_keys[i]], strings[self.entry_values[i]])
+                for i in range(first, last)
+            ]
+            return MapNode(identifier, entries)
+
+        if node_class is FrameNode:
+            body = []
+            child_row = row + 1
+            for _ in range(self.columns[0][row]):
+                body.append(self.node_at(child_row))
+                child_row += self.columns[1][child_row] if self._layouts[self.kinds[child_row]] is FrameNode else 1
+            return FrameNode(identifier, body)
+
+        slots = _FIELD_SLOTS[node_class]
+        fields = {slot: strings[self.columns[i][row]] for i, slot in enumerate(slots)}
+        return _node_from_fields(node_class, identifier, fields)
+
+    def nbytes(self):
+        # Memory held by the arena columns (the string table is shared and not counted)
+        buffers = (self.roots, self.kinds, self.identifiers, self.entry_keys, self.entry_values) + self.columns
+        return sum(buf.itemsize * len(buf) for buf in buffers)
+
+    # Binary image: header, string offsets, string blob, then the columns.
+    # Columns are stored in native byte order; the kinds column comes last so
+    # every 32-bit column starts 4-byte aligned.
+    _MAGIC = b'NEOA'
+    _HEADER = struct.Struct('<4sHHIIII')  # magic, version, columns, strings, roots, rows, entries
+
+    def to_bytes(self):
+        encoded = [value.encode('utf-8') for value in self.strings[1:]]
+        offsets = array('I', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        blob = b''.join(encoded)
+        blob += b'\0' * (-len(blob) % 4)
+
+        parts = [
+            self._HEADER.pack(self._MAGIC, ARENA_FORMAT_VERSION, len(self.columns), len(encoded),
+                              len(self.roots), len(self.kinds), len(self.entry_keys)),
+            offsets.tobytes(),
+            blob,
+            self.roots.tobytes(),
+            self.identifiers.tobytes(),
+        ]
+        parts.extend(column.tobytes() for column in self.columns)
+        parts.append(self.entry_keys.tobytes())
+        parts.append(self.entry_values.tobytes())
+        parts.append(self.kinds.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        # Build a read-only arena whose columns are memoryviews into buffer
+        # (bytes or an mmap), so loading does not copy the node data
+        view = memoryview(buffer)
+        if len(view) < cls._HEADER.size:
+            raise ValueError("Truncated NeoASM node arena image")
+        header = cls._HEADER.unpack_from(view, 0)
+        magic, version, column_count, string_count, root_count, row_count, entry_count = header
+        if magic != cls._MAGIC or version != ARENA_FORMAT_VERSION or column_count != cls._column_count:
+            raise ValueError("Not a NeoASM node arena image")
+
+        position = cls._HEADER.size
+
+        def take(count, typecode):
+            nonlocal position
+            size = count * array(typecode).itemsize
+            if position + size > len(view):
+                raise ValueError("Truncated NeoASM node arena image")
+            column = view[position:position + size].cast(typecode)
+            position += size
+            return column
+
+        offsets = take(string_count + 1, 'I')
+        blob_size = offsets[string_count]
+        if position + blob_size > len(view):
+            raise ValueError("Truncated NeoASM node arena image")
+        blob = view[position:position + blob_size]
+        position += blob_size + (-blob_size % 4)
+
+        arena = cls.__new__(cls)
+        arena.strings = [None] + [
+            sys.intern(str(blob[offsets[i]:offsets[i + 1]], 'utf-8'))
+            for i in range(string_count)
+        ]
+        arena._string_ids = None  # Loaded arenas are read-only
+        arena.roots = take(root_count, 'I')
+        arena.identifiers = take(row_count, 'I')
+        arena.columns = tuple(take(row_count, 'I') for _ in range(column_count))
+        arena.entry_keys = take(entry_count, 'I')
+        arena.entry_values = take(entry_count, 'I')
+        arena.kinds = take(row_count, 'B')
+        return arena
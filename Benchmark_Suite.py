@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from Code_Generator import NeoASMCodeGeneratorOptimized
+from Compiler_Driver import NeoASMBatchCompiler
+from Parser import NeoASMParser, tokenize_source
+from Syntax_analyser import NeoASMSyntaxAnalyzer
+from Table_Parser import NeoASMTableParser
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_CPU_ARCHITECTURE = {"cache_line_size": 64}
+DEFAULT_THRESHOLD = 0.10  # Allowed slowdown before a phase counts as a regression
+BATCH_FILES = 4  # Copies of the source compiled as one batch by the batch phases
+
+# Relative weights of the statement kinds in a synthetic program
+DEFAULT_MIX = {
+    "var": 30,
+    "map": 10,
+    "aot": 10,
+    "pkt": 5,
+    "vec": 15,
+    "exec": 5,
+    "validate": 10,
+    "link": 5,
+    "str_map": 5,
+    "frame": 5,
+}
+VAR_TYPES = ("INT", "FLOAT", "BOOL", "VECTOR", "STRING")
+VEC_OPERATIONS = ("add", "sub", "mul", "div", "dot", "cross")
+PRIORITIES = ("L1_cache", "L2_cache", "L3_cache", "RAM")
+
+
+def parse_mix(text):
+    # "var=3,map=1" -> {"var": 3, "map": 1}
+    mix = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown statement kind {kind}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight) if weight else 1.0
+    return mix
+
+
+class CorpusGenerator:
+    """Deterministic synthetic .neo programs of a given size and statement mix.
+
+    Statements only refer to symbols declared before them, so every program
+    compiles. Frames hold frame_size statements drawn from the same mix
+    (without nested frames).
+    """
+
+    def __init__(self, mix=None, seed=0, frame_size=8):
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.frame_size = frame_size
+        self.random = random.Random(seed)
+        self.counter = 0
+        self.variables = []
+        self.blocks = []
+        self.execs = []
+
+    def generate(self, statements):
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        lines = [f"// Synthetic NeoASM program: {statements} statements"]
+        for _ in range(statements):
+            lines.append(self.statement(self.random.choices(kinds, weights)[0], kinds, weights))
+        return "\n".join(lines) + "\n"
+
+    def statement(self, kind, kinds, weights):
+        self.counter += 1
+        number = self.counter
+        pick = self.random.choice
+        if kind == "frame":
+            # Frame bodies use the same mix, without nested frames
+            inner = [(inner_kind, weight) for inner_kind, weight in zip(kinds, weights) if inner_kind != "frame"]
+            inner_kinds, inner_weights = zip(*inner) if inner else (("var",), (1,))
+            body = [
+                "    " + self.statement(self.random.choices(inner_kinds, inner_weights)[0], inner_kinds, inner_weights)
+                for _ in range(self.frame_size)
+            ]
+            return f"frame F{number} {{\n" + "\n".join(body) + "\n}"
+        if kind == "var" or not self.variables:
+            name = f"v{number}"
+            self.variables.append(name)
+            return f"var {pick(VAR_TYPES)} {name} {{ range: 0..{self.random.randrange(1, 65536)}, check: rigid }}"
+        if kind == "aot" or (kind == "map" and not self.blocks):
+            name = f"blk{number}"
+            self.blocks.append(name)
+            return f"AOT {name} {{ STATIC size: {pick((64, 256, 1024, 4096))}B }}"
+        if kind == "map":
+            return f"map m{number} {{ src: {pick(self.blocks)}, dst: {pick(('RAM', 'RAM_STREAM', 'GPU'))} }}"
+        if kind == "pkt":
+            target = pick(self.execs) if self.execs else "EXECUTE"
+            return f"pkt p{number} {{ size: {pick((64, 256, 1024))}B, exec: {target}, priority: {pick(PRIORITIES)} }}"
+        if kind == "vec":
+            inputs = f"{pick(self.variables)}, {pick(self.variables)}"
+            output = pick(self.variables)
+            return f"vec_{pick(VEC_OPERATIONS)} V{number} {{ in: \"{inputs}\", out: {output}, device: CPU }}"
+        if kind == "exec":
+            name = f"e{number}"
+            self.execs.append(name)
+            return f"exec {name} {{ link: {pick(self.variables)}, size: 8B, op: EXECUTE, device: CPU }}"
+        if kind == "validate":
+            return f"validate {pick(self.variables)} {{ rule: bounds }}"
+        if kind == "link":
+            return f"link l{number} {{ src: {pick(self.variables)}, dst: {pick(self.variables)} }}"
+        return f"str_map s{number} {{ op: entangle, in: {pick(self.variables)}, out: {pick(self.variables)} }}"
+
+
+def count_nodes(nodes):
+    return sum(1 + (count_nodes(node["body"]) if node["type"] == "frame" else 0) for node in nodes)
+
+
+def _measure(function, repeat):
+    # (result of the last run, wall times of every run, peak traced bytes of one extra run)
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, times, peak
+
+
+class NeoASMBenchmark:
+    """Time every compiler phase over one source text.
+
+    Phases run in pipeline order, each timed repeat times (the minimum is the
+    headline figure, the median is reported too) and once more under
+    tracemalloc for its peak allocation, so tracing never skews the timings.
+    The batch phases compile BATCH_FILES copies of the source as one batch,
+    in-process and on a pool of jobs workers (when jobs > 1); tracemalloc
+    sees only the parent process of the pool.
+    """
+
+    def __init__(self, repeat=5, cpu_architecture=None, jobs=None):
+        self.repeat = repeat
+        self.cpu_architecture = cpu_architecture or DEFAULT_CPU_ARCHITECTURE
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def run(self, source_code, corpus=None):
+        phases = {}
+
+        def record(name, function, items_of, unit, size=len(source_code)):
+            try:
+                result, times, peak = _measure(function, self.repeat)
+            except SyntaxError as error:
+                phases[name] = {"error": str(error)}
+                return None
+            best = min(times)
+            items = items_of(result)
+            phases[name] = {
+                "seconds_min": best,
+                "seconds_median": statistics.median(times),
+                "runs": len(times),
+                "peak_bytes": peak,
+                "items": items,
+                "unit": unit,
+                "items_per_second": items / best if best > 0 else 0.0,
+                "bytes_per_second": size / best if best > 0 else 0.0,
+            }
+            return result
+
+        def analyzer_tokenize():
+            analyzer = NeoASMSyntaxAnalyzer()
+            analyzer.tokenize(source_code)
+            return analyzer
+
+        def analyzer_parse():
+            # Parse the token list of the tokenize phase again from the start
+            analyzer = NeoASMSyntaxAnalyzer()
+            analyzer.tokens = tokenized.tokens
+            return analyzer.parse()
+
+        tokenized = record("analyzer_tokenize", analyzer_tokenize, lambda analyzer: len(analyzer.tokens), "tokens")
+        tokens = record("source_tokenize", lambda: tokenize_source(source_code), len, "tokens")
+        ast = record("parse", lambda: NeoASMParser(tokens).parse(), count_nodes, "nodes")
+        record("table_parse", lambda: NeoASMTableParser().parse(source_code), count_nodes, "nodes")
+        if tokenized is not None:
+            record("analyzer_parse", analyzer_parse, count_nodes, "nodes")
+        if ast is not None:
+            record("codegen", lambda: NeoASMCodeGeneratorOptimized(dict(self.cpu_architecture)).generate_code(ast),
+                   lambda _: count_nodes(ast), "nodes")
+
+            named_sources = [(f"corpus{index}.neo", source_code) for index in range(BATCH_FILES)]
+            batch_nodes = BATCH_FILES * count_nodes(ast)
+            with NeoASMBatchCompiler(dict(self.cpu_architecture), max_workers=1) as compiler:
+                record("batch_serial", lambda: compiler.compile_sources(named_sources), lambda _: batch_nodes,
+                       "nodes", BATCH_FILES * len(source_code))
+            if self.jobs > 1:
+                with NeoASMBatchCompiler(dict(self.cpu_architecture), max_workers=self.jobs,
+                                         min_parallel_bytes=0) as compiler:
+                    compiler.compile_sources(named_sources[:2])  # Start the pool outside the timings
+                    record("batch_parallel", lambda: compiler.compile_sources(named_sources), lambda _: batch_nodes,
+                           "nodes", BATCH_FILES * len(source_code))
+
+        return {
+            "format_version": RESULTS_FORMAT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": dict(corpus or {}, bytes=len(source_code)),
+            "repeat": self.repeat,
+            "phases": phases,
+        }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, memory_threshold=None):
+    # List of regressions: phases whose best time (and, when memory_threshold
+    # is given, peak memory) grew by more than the threshold fraction, and
+    # phases that passed in the baseline but now fail or are missing
+    regressions = []
+    for name, before in baseline.get("phases", {}).items():
+        if "error" in before:
+            continue
+        after = current.get("phases", {}).get(name)
+        if after is None or "error" in after:
+            error = "phase missing" if after is None else after["error"]
+            regressions.append({"phase": name, "metric": "error", "baseline": None, "current": error, "ratio": None})
+            continue
+        ratio = after["seconds_min"] / before["seconds_min"] if before["seconds_min"] > 0 else 1.0
+        if ratio > 1 + threshold:
+            regressions.append({"phase": name, "metric": "seconds_min", "baseline": before["seconds_min"],
+                                "current": after["seconds_min"], "ratio": ratio})
+        if memory_threshold is not None and before["peak_bytes"] > 0:
+            ratio = after["peak_bytes"] / before["peak_bytes"]
+            if ratio > 1 + memory_threshold:
+                regressions.append({"phase": name, "metric": "peak_bytes", "baseline": before["peak_bytes"],
+                                    "current": after["peak_bytes"], "ratio": ratio})
+    return regressions
+
+
+def format_results(results):
+    corpus = results["corpus"]
+    subject = corpus["source"] if "source" in corpus else f"{corpus.get('statements', '?')} statements"
+    lines = [f"NeoASM benchmark: {subject}, {corpus['bytes']} bytes, best of {results['repeat']}"]
+    for name, phase in results["phases"].items():
+        if "error" in phase:
+            lines.append(f"  {name:<18} error: {phase['error']}")
+            continue
+        lines.append(
+            f"  {name:<18} {phase['seconds_min'] * 1000:>10.2f} ms  "
+            f"{phase['items_per_second']:>14,.0f} {phase['unit']}/s  "
+            f"{phase['bytes_per_second'] / (1 << 20):>8.2f} MB/s  "
+            f"peak {phase['peak_bytes'] / (1 << 20):>8.2f} MB"
+        )
+    return "\n".join(lines)
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-bench", description="Benchmark the NeoASM compiler phases.")
+    parser.add_argument("--statements", type=int, default=5000, help="statements in the synthetic program")
+    parser.add_argument("--mix", default=None, help="statement weights, e.g. var=3,map=1,frame=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frame-size", type=int, default=8, help="statements per frame")
+    parser.add_argument("--source", help="benchmark this .neo file instead of a synthetic program")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="workers of the batch_parallel phase (default: CPU count)")
+    parser.add_argument("--write-corpus", help="also save the synthetic program to this path")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON results; exit with status 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default: 0.10)")
+    parser.add_argument("--memory-threshold", type=float, default=None,
+                        help="also gate peak memory growth at this fraction")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    if args.source:
+        with open(args.source, "r", encoding="utf-8") as file:
+            source_code = file.read()
+        corpus = {"source": args.source}
+    else:
+        try:
+            mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+        except ValueError as error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 2
+        source_code = CorpusGenerator(mix, args.seed, args.frame_size).generate(args.statements)
+        corpus = {"statements": args.statements, "mix": mix, "seed": args.seed, "frame_size": args.frame_size}
+        if args.write_corpus:
+            with open(args.write_corpus, "w", encoding="utf-8") as file:
+                file.write(source_code)
+
+    results = NeoASMBenchmark(args.repeat, jobs=args.jobs).run(source_code, corpus)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, results, args.threshold, args.memory_threshold)
+        for regression in regressions:
+            if regression["metric"] == "error":
+                print(f"Regression in {regression['phase']}: {regression['current']}", file=sys.stderr)
+                continue
+            print(f"Regression in {regression['phase']}: {regression['metric']} "
+                  f"{regression['baseline']:.6g} -> {regression['current']:.6g} "
+                  f"({(regression['ratio'] - 1) * 100:+.1f}%)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,99 @@
+from Instruction_IR import NeoASMInstruction, Opcode, iter_text, split_names, write_binary, write_text
+from Instruction_Scheduler import NeoASMListScheduler
+from Machine_Profile import DEFAULT_CPU_ARCHITECTURE
+from Memory_Layout import DEFAULT_OBJECT_SIZE, STORAGE_SIZES, VAR_TYPE_SIZES, NeoASMMemoryLayoutPlanner, parse_size
+from Pass_Manager import NeoASMPassManager
+from Profiler import count, phase
+from Register_Allocator import DEFAULT_REGISTER_COUNT, NeoASMLinearScanAllocator
+
+
 class NeoASMCodeGeneratorOptimized:
-    def __init__(self, cpu_architecture):
-        self.code = []  # List to store the generated code
+    def __init__(self, cpu_architecture=None, passes=None):
+        if cpu_architecture is None:
+            # Fixed, so output does not depend on the host; a machine profile
+            # (see Machine_Profile) is only used when passed in
+            cpu_architecture = dict(DEFAULT_CPU_ARCHITECTURE)
+        self.code = []  # Generated instructions (NeoASMInstruction IR)
         self.registers = {}  # Dictionary to keep track of allocated registers
         self.memory_map = {}  # Memory map for variables and memory blocks
         self.cpu_architecture = cpu_architecture  # Store CPU architecture for optimizations
+        self.variables = set()  # Names declared with VAR
+        self.declarations = {}  # Declared name -> its declaring instruction
+        self.layout_planner = NeoASMMemoryLayoutPlanner(cpu_architecture["cache_line_size"])
+        self.layout_report = {}  # Memory layout report of the last generate_code call
+        self.map_sources = {}  # Map name -> source name, for sizing map buffers
+        self.packet_targets = []  # (packet name, exec target) pairs
+        self.current_frame = None  # Enclosing frame of the instructions being emitted
+        self.schedule_stats = {}  # Instruction scheduling report of the last generate_code call
+        self.spill_stats = {}  # Register allocation report of the last generate_code call
+        # Optimization passes (see Pass_Manager) run over the whole IR, so only
+        # when the generator sees the whole program; None runs none
+        self.pass_manager = NeoASMPassManager(passes) if passes else None
+        self.pass_report = []  # Per-pass report of the last generate_code call
 
     def generate_code(self, ast):
+        # Lower the AST to instructions and return them as text
+        self.build_instructions(ast)
+        with phase("codegen.emit"):
+            return "\n".join(iter_text(self.code))
+
+    def generate_to(self, ast, stream, binary=False):
+        # Lower the AST and write the result to a file object one instruction
+        # at a time, as text lines or as a write_binary stream (stream must
+        # then be opened in binary mode). Returns the number of instructions.
+        self.build_instructions(ast)
+        with phase("codegen.emit"):
+            if binary:
+                return write_binary(self.code, stream)
+            return write_text(self.code, stream)
+
+    def build_instructions(self, ast):
         # Step 1: Handle AST traversal and apply optimizations
-        for node in ast:
+        with phase("codegen.lower"):
+            self.handle_nodes(ast)
+        return self.finish_instructions()
+
+    def build_from_lowered(self, instructions):
+        # Steps 2-5 over instructions lowered by other generators, such as the
+        # chunks of one file lowered in parallel (see NeoASMBatchCompiler).
+        # Lowering is node by node, so the chunks' instructions concatenated in
+        # source order give the same result as build_instructions on the whole
+        # file. The instructions are modified in place.
+        self.code = list(instructions)
+        self.collect_declarations()
+        return self.finish_instructions()
+
+    def finish_instructions(self):
+        # Step 2: Optimization passes, before anything is given memory
+        if self.pass_manager is not None:
+            with phase("codegen.passes"):
+                self.code = self.pass_manager.run(self.code)
+                self.pass_report = self.pass_manager.report
+                self.collect_declarations()
+
+        # Step 3: Place variables, map buffers and AOT blocks in memory
+        with phase("codegen.layout"):
+            self.plan_memory_layout()
+
+        # Step 4: Optimize instruction scheduling
+        with phase("codegen.schedule"):
+            self.optimize_instructions()
+
+        # Step 5: Register allocation over the scheduled instruction stream
+        with phase("codegen.regalloc"):
+            self.allocate_registers()
+
+        count("instructions", len(self.code))
+        return self.code
+
+    def emit(self, opcode, name, operands=(), defs=(), uses=()):
+        # Append an instruction together with the names it defines and uses
+        instruction = NeoASMInstruction(opcode, name, operands, defs, uses, self.current_frame)
+        self.code.append(instruction)
+        return instruction
+
+    def handle_nodes(self, nodes):
+        for node in nodes:
             if node["type"] == "map":
                 self.handle_map_declaration(node)
             elif node["type"] == "variable":
@@ -16,82 +102,198 @@ class NeoASMCodeGeneratorOptimized:
                 self.handle_AOT_declaration(node)
             elif node["type"] == "packet":
                 self.handle_packet_declaration(node)
+            elif node["type"] == "frame":
+                # Frames group declarations and operations; their bodies are emitted in place
+                enclosing_frame = self.current_frame
+                self.current_frame = node["identifier"]
+                self.handle_nodes(node["body"])
+                self.current_frame = enclosing_frame
+            elif node["type"] == "simd":
+                self.handle_simd_operation(node)
+            elif node["type"] == "str_map":
+                self.handle_quantum_operation(node)
+            elif node["type"] == "exec":
+                self.handle_exec_operation(node)
+            elif node["type"] == "validate":
+                self.handle_validate_operation(node)
+            elif node["type"] == "link":
+                self.handle_link_operation(node)
             else:
                 raise ValueError(f"Unknown node type: {node['type']}")
-        
-        # Step 2: Optimize instruction scheduling
-        self.optimize_instructions()
-
-        # Step 3: Return the final optimized code
-        return "\n".join(self.code)
 
     def handle_map_declaration(self, node):
         # Generate memory mapping code
         map_name = node["identifier"]
-        src = node["entries"][0]["value"]
-        dst = node["entries"][1]["value"]
-        self.code.append(f"MAP {map_name} ({src} -> {dst})")
+        entries = {entry["key"]: entry["value"] for entry in node["entries"]}
+        src, dst = self.required(node, entries, ("src", "dst"))
+        self.map_sources[map_name] = src
+        # The transfer writes its destination; dst stays a use too, since the
+        # map refers to it (object imports, dead-declaration elimination)
+        self.declarations[map_name] = self.emit(Opcode.MAP, map_name, (("SRC", src), ("DST", dst)),
+                                                defs=(map_name, dst), uses=(src, dst))
 
     def handle_variable_declaration(self, node):
         # Generate variable allocation code with type and constraints
         var_type = node["var_type"]
         var_name = node["identifier"]
-        range_check = node["attributes"]["range"]
-        rigid_check = node["attributes"]["check"]
-
-        # Step 1: Memory alignment (align based on cache line size)
-        aligned_address = self.align_to_cache_line(var_name)
-
-        # Step 2: Register allocation (based on frequency and proximity)
-        allocated_register = self.allocate_register(var_name)
-
-        self.memory_map[var_name] = aligned_address
-        self.registers[var_name] = allocated_register
+        range_check, rigid_check = self.required(node, node["attributes"], ("range", "check"))
 
-        # Add the variable declaration to the code
-        self.code.append(f"VAR {var_type} {var_name} RANGE {range_check} CHECK {rigid_check} ALIGNED {aligned_address} REGISTER {allocated_register}")
+        # Add the variable declaration to the code; its ALIGNED and REGISTER
+        # operands are filled in by plan_memory_layout and allocate_registers
+        self.variables.add(var_name)
+        self.declarations[var_name] = self.emit(
+            Opcode.VAR, var_name, (("TYPE", var_type), ("RANGE", range_check), ("CHECK", rigid_check)),
+            defs=(var_name,),
+        )
 
     def handle_AOT_declaration(self, node):
         # Generate Ahead-Of-Time (AOT) processing code
         aot_name = node["identifier"]
-        aot_type = node["attributes"]["type"]
-        size = node["attributes"]["size"]
-        self.code.append(f"AOT {aot_name} {aot_type} SIZE {size}")
+        aot_type, size = self.required(node, node["attributes"], ("type", "size"))
+        self.declarations[aot_name] = self.emit(Opcode.AOT, aot_name, (("KIND", aot_type), ("SIZE", size)),
+                                                defs=(aot_name,))
 
     def handle_packet_declaration(self, node):
         # Generate packetized execution setup
         packet_name = node["identifier"]
-        size = node["attributes"]["size"]
-        exec_mode = node["attributes"]["exec"]
-        priority = node["attributes"]["priority"]
-        self.code.append(f"PACKET {packet_name} SIZE {size} EXEC {exec_mode} PRIORITY {priority}")
-
-    def align_to_cache_line(self, var_name):
-        # Memory alignment logic: Align variable to the nearest cache line boundary
-        cache_line_size = self.cpu_architecture["cache_line_size"]  # For example, 64 bytes
-        base_address = hash(var_name) % 1024  # Simplified base address calculation for demo purposes
-        aligned_address = (base_address + cache_line_size - 1) // cache_line_size * cache_line_size
-        return aligned_address
-
-    def allocate_register(self, var_name):
-        # Register allocation based on frequency and proximity
-        if var_name not in self.registers:
-            # Allocate a register based on some heuristic (e.g., usage frequency or proximity to critical path)
-            register = f"R{len(self.registers) % 8}"  # Simplified allocation for demo (8 registers)
-            self.registers[var_name] = register
-        return self.registers[var_name]
+        size, exec_mode = self.required(node, node["attributes"], ("size", "exec"))
+        self.packet_targets.append((packet_name, exec_mode))
+        # Without a priority: the packet runtime dispatches the stream after the ranked ones
+        self.emit(Opcode.PACKET, packet_name,
+                  (("SIZE", size), ("EXEC", exec_mode)) + self.operands_of(node["attributes"], ("priority",)),
+                  defs=(packet_name,), uses=(exec_mode,))
+
+    def handle_simd_operation(self, node):
+        # Generate a SIMD vector operation over the declared buffers
+        simd_type = node["simd_type"].upper()
+        name = node.get("identifier") or simd_type
+        attributes = node["attributes"]
+        outputs = split_names(attributes.get("out", ""))
+        operands = (("TYPE", simd_type),) + self.operands_of(attributes, ("in", "out", "op", "device"))
+        # A named operation defines its name, so an exec block linking to it
+        # depends on it; unnamed ones would only chain up through the shared
+        # operation name
+        defs = (name,) + outputs if node.get("identifier") else outputs
+        self.emit(Opcode.VEC, name, operands, defs=defs, uses=split_names(attributes.get("in", "")) + outputs)
+
+    def handle_quantum_operation(self, node):
+        # Generate a string-mapping (quantum) operation
+        attributes = node["attributes"]
+        self.emit(Opcode.STR_MAP, node["identifier"], self.operands_of(attributes, ("op", "in", "out", "device")),
+                  defs=(node["identifier"],) + split_names(attributes.get("out", "")),
+                  uses=split_names(attributes.get("in", "")))
+
+    def handle_exec_operation(self, node):
+        # Generate a linked execution block
+        attributes = node["attributes"]
+        self.emit(Opcode.EXEC, node["identifier"], self.operands_of(attributes, ("link", "size", "op", "device")),
+                  defs=(node["identifier"],), uses=split_names(attributes.get("link", "")))
+
+    def handle_validate_operation(self, node):
+        # Generate a validation rule for a declared variable
+        self.emit(Opcode.VALIDATE, node["identifier"], self.operands_of(node["attributes"], ("rule",)),
+                  uses=(node["identifier"],))
+
+    def handle_link_operation(self, node):
+        # Generate a link between two declared symbols
+        src, dst = self.required(node, node["attributes"], ("src", "dst"))
+        self.emit(Opcode.LINK, node["identifier"], (("SRC", src), ("DST", dst)),
+                  defs=(node["identifier"],), uses=(src, dst))
+
+    def required(self, node, attributes, keys):
+        # The values of the attributes a statement cannot be compiled without
+        missing = [key for key in keys if attributes.get(key) is None]
+        if missing:
+            raise ValueError(f"{node['type']} {node['identifier']} is missing {', '.join(key + ':' for key in missing)}")
+        return tuple(attributes[key] for key in keys)
+
+    def operands_of(self, attributes, keys):
+        # The attributes that are present as (KEY, value) operands, in a fixed order
+        return tuple((key.upper(), attributes[key]) for key in keys if key in attributes)
+
+    def collect_declarations(self):
+        # Rebuild the declaration tables from the instructions the passes kept
+        self.variables = set()
+        self.declarations = {}
+        self.map_sources = {}
+        self.packet_targets = []
+        for instruction in self.code:
+            if instruction.opcode in (Opcode.VAR, Opcode.MAP, Opcode.AOT):
+                self.declarations[instruction.name] = instruction
+            if instruction.opcode == Opcode.VAR:
+                self.variables.add(instruction.name)
+            elif instruction.opcode == Opcode.MAP:
+                self.map_sources[instruction.name] = instruction.operand("SRC")
+            elif instruction.opcode == Opcode.PACKET:
+                self.packet_targets.append((instruction.name, instruction.operand("EXEC")))
+
+    def plan_memory_layout(self):
+        # Variables and AOT blocks in declaration order, then map buffers,
+        # which take the size of their source block when it is known
+        cache_line_size = self.cpu_architecture["cache_line_size"]
+        planned = self.layout_planner.objects
+        for instruction in self.code:
+            if instruction.opcode == Opcode.VAR:
+                # Range analysis may have narrowed the storage (see Range_Analysis)
+                size = STORAGE_SIZES.get(instruction.operand("STORAGE"))
+                if size is None:
+                    size = VAR_TYPE_SIZES.get(instruction.operand("TYPE"), DEFAULT_OBJECT_SIZE)
+                self.layout_planner.add(instruction.name, "variable", size)
+            elif instruction.opcode == Opcode.AOT:
+                size = parse_size(instruction.operand("SIZE"), cache_line_size)
+                self.layout_planner.add(instruction.name, "AOT", size)
+        for map_name, src in self.map_sources.items():
+            source = planned.get(src)
+            self.layout_planner.add(map_name, "map", source.size if source is not None else cache_line_size)
+
+        # Variables touched from more than one frame or packet get cache
+        # lines of their own so concurrent writers never share a line
+        for name in self.shared_variables():
+            planned[name].isolated = True
+
+        self.layout_report = self.layout_planner.plan()
+        self.memory_map = self.layout_planner.addresses()
+        # Every declaration of a name, redeclarations included, gets its address
+        for instruction in self.code:
+            if instruction.opcode in (Opcode.VAR, Opcode.MAP, Opcode.AOT):
+                instruction.set_operand("ALIGNED", self.memory_map[instruction.name])
+
+    def shared_variables(self):
+        touched_by = {}
+        for instruction in self.code:
+            for name in instruction.uses:
+                if name in self.variables:
+                    touched_by.setdefault(name, set()).add(instruction.context)
+
+        # Operations run by a packet are also touched from that packet
+        packet_of = {}
+        for packet_name, target in self.packet_targets:
+            packet_of.setdefault(target, []).append("pkt " + packet_name)
+        if packet_of:
+            for instruction in self.code:
+                packets = [packet for name in instruction.defs for packet in packet_of.get(name, ())]
+                for name in instruction.uses:
+                    if packets and name in self.variables:
+                        touched_by.setdefault(name, set()).update(packets)
+
+        return sorted(name for name, contexts in touched_by.items() if len(contexts) > 1)
+
+    def allocate_registers(self):
+        # Linear-scan allocation over live intervals; the register count comes
+        # from the target description
+        register_count = self.cpu_architecture.get("register_count", DEFAULT_REGISTER_COUNT)
+        allocator = NeoASMLinearScanAllocator(register_count)
+        self.code = allocator.allocate(self.code, self.variables, self.memory_map)
+        self.registers = allocator.assignment
+        self.spill_stats = allocator.stats
+        count("registers_allocated", allocator.stats["intervals"] - allocator.stats["spilled"])
+        count("spills", allocator.stats["spill_instructions"])
+        count("reloads", allocator.stats["reload_instructions"])
 
     def optimize_instructions(self):
-        # Reorder instructions for better CPU pipeline efficiency
-        self.code = sorted(self.code, key=self.instruction_priority)
-
-    def instruction_priority(self, instruction):
-        # Sort instructions based on some heuristic (e.g., dependent instructions first)
-        if "VAR" in instruction:
-            return 1  # Variables tend to come first in execution
-        elif "MAP" in instruction:
-            return 2  # Memory mapping instructions come second
-        elif "AOT" in instruction:
-            return 3  # AOT instructions come after
-        else:
-            return 4  # Default priority for all other instructions
+        # Reorder instructions for better CPU pipeline efficiency: list
+        # scheduling over the def/use dependency DAG with the target's latencies
+        scheduler = NeoASMListScheduler(self.cpu_architecture)
+        order = scheduler.schedule(self.code)
+        self.code = [self.code[index] for index in order]
+        self.schedule_stats = scheduler.stats
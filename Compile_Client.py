@@ -0,0 +1,102 @@
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+# Thin front end of the compile server: forwards argv, the working directory
+# and (for '-' inputs) stdin to a running Compile_Server and replays its
+# output. Only standard library modules are imported here, so a call costs an
+# interpreter start and one socket round trip; the compiler itself stays
+# loaded in the server.
+
+SOCKET_ENV = "NEOASM_SERVER_SOCKET"
+PROTOCOL_VERSION = 1
+_LENGTH = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 1 << 30
+
+
+def default_socket_path():
+    # $NEOASM_SERVER_SOCKET, else a per-user socket in the runtime directory
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"neoasm-{os.getuid()}.sock")
+
+
+def send_message(connection, message):
+    # Length-prefixed JSON frame
+    payload = json.dumps(message).encode("utf-8")
+    connection.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _receive_exactly(connection, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = connection.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connection closed in the middle of a message")
+        received += count
+    return bytes(buffer)
+
+
+def receive_message(connection):
+    # The next message, or None if the peer closed the connection between messages
+    header = connection.recv(_LENGTH.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _LENGTH.size:
+        raise ConnectionError("Connection closed in the middle of a message")
+    (size,) = _LENGTH.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_SIZE} byte limit")
+    return json.loads(_receive_exactly(connection, size).decode("utf-8"))
+
+
+def request(message, socket_path=None, timeout=None):
+    # Send one request to the server and return its reply; raises OSError
+    # when no server is listening
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path or default_socket_path())
+        send_message(connection, dict(message, version=PROTOCOL_VERSION))
+        reply = receive_message(connection)
+    if reply is None:
+        raise ConnectionError("The compile server closed the connection without replying")
+    return reply
+
+
+def compile_remote(argv, socket_path=None, stdin=None):
+    # Run a compiler command line in the server; returns (status, stdout, stderr)
+    message = {"command": "compile", "argv": list(argv), "cwd": os.getcwd()}
+    if "-" in argv:
+        message["stdin"] = (stdin or sys.stdin).read()
+    reply = request(message, socket_path)
+    if "error" in reply:
+        return 2, "", f"Error: {reply['error']}\n"
+    return reply["status"], reply["stdout"], reply["stderr"]
+
+
+def main(argv=None):
+    # Forward the command line to the server. Without a server the compile
+    # runs in this process, unless NEOASM_SERVER_REQUIRED is set.
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        status, output, errors = compile_remote(argv)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if os.environ.get("NEOASM_SERVER_REQUIRED"):
+            print(f"Error: no compile server listening on {default_socket_path()}", file=sys.stderr)
+            return 2
+        from Compiler_Driver import main as compile_locally
+        return compile_locally(argv)
+    sys.stdout.write(output)
+    sys.stderr.write(errors)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import argparse
+import contextlib
+import io
+import os
+import socketserver
+import sys
+import threading
+import time
+
+from Compile_Client import PROTOCOL_VERSION, default_socket_path, receive_message, request, send_message
+from Compiler_Driver import NeoASMBatchCompiler, compile_source, enabled_passes, run
+from Compiler_Driver import build_argument_parser as build_compiler_argument_parser
+
+DEFAULT_CACHE_SIZE = 4096  # Chunks whose generated code each resident compiler remembers
+
+# Compiled once at start-up so the regexes, the code generator and the worker
+# pools are warm before the first request arrives
+_WARM_UP_SOURCE = """
+var INT warm { range: 0..255, check: rigid }
+AOT warm_block { STATIC size: 64B }
+map warm_map { src: warm_block, dst: RAM }
+frame warm_frame {
+    vec_add warm_vec { in: "warm, warm", out: warm, device: CPU }
+}
+"""
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            message = receive_message(self.request)
+        except (ConnectionError, ValueError):
+            return
+        if message is None:
+            return
+        reply = self.server.owner.dispatch(message)
+        try:
+            send_message(self.request, reply)
+        except OSError:
+            pass  # The client went away
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class NeoASMCompileServer:
+    """Keep the compiler resident and serve compile requests over a Unix socket.
+
+    Each request carries a neoasm command line, the client's working
+    directory and, for '-' inputs, its stdin; the reply holds the exit status
+    and the text written to stdout and stderr. The server keeps one
+    NeoASMBatchCompiler per (jobs, frontend, split, passes, parse cache) combination
+    alive, with its worker pool and an in-memory cache of generated chunks,
+    so repeated builds pay neither interpreter start-up nor imports nor
+    recompiling unchanged frames. Compiles run one at a time (the profiler and the
+    redirected streams are process-wide); ping, stats and shutdown are
+    answered while a compile is running. The socket is created with owner-only
+    permissions.
+    """
+
+    def __init__(self, socket_path=None, cache_size=DEFAULT_CACHE_SIZE, cpu_architecture=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.cache_size = cache_size
+        self.cpu_architecture = cpu_architecture  # None: DEFAULT_CPU_ARCHITECTURE, as for the command line
+        self.compilers = {}  # (jobs, frontend, split_frames, passes, parse_cache_dir) -> NeoASMBatchCompiler
+        self.started = time.time()
+        self.requests = 0
+        self.compile_seconds = 0.0
+        self._compile_lock = threading.Lock()
+        self._server = None
+
+    def warm_up(self):
+        compile_source(_WARM_UP_SOURCE, self.cpu_architecture)
+        self.compiler(None, "parser", True).compile_sources([("<warm-up>", _WARM_UP_SOURCE)] * 2)
+
+    def compiler(self, jobs, frontend, split_frames, passes=None, parse_cache_dir=None):
+        key = (jobs, frontend, split_frames, passes, parse_cache_dir)
+        compiler = self.compilers.get(key)
+        if compiler is None:
+            compiler = self.compilers[key] = NeoASMBatchCompiler(
+                self.cpu_architecture, jobs, frontend, split_frames, cache_size=self.cache_size, passes=passes,
+                parse_cache_dir=parse_cache_dir)
+        return compiler
+
+    def dispatch(self, message):
+        if message.get("version") != PROTOCOL_VERSION:
+            return {"error": f"Protocol version {message.get('version')} is not supported"}
+        command = message.get("command")
+        if command == "compile":
+            return self.compile(message.get("argv", []), message.get("cwd") or os.getcwd(), message.get("stdin"))
+        if command == "ping":
+            return {"pid": os.getpid()}
+        if command == "stats":
+            return self.stats()
+        if command == "shutdown":
+            # Reply first; shutdown() waits for serve_forever() to return
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"stopping": True}
+        return {"error": f"Unknown command {command}"}
+
+    def compile(self, argv, cwd, stdin_text=None):
+        output, errors = io.StringIO(), io.StringIO()
+        with self._compile_lock:
+            started = time.perf_counter()
+            self.requests += 1
+            try:
+                with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+                    args = build_compiler_argument_parser().parse_args(argv)
+            except SystemExit as stop:
+                # --help or a usage error; argparse has written the text
+                return {"status": stop.code or 0, "stdout": output.getvalue(), "stderr": errors.getvalue()}
+
+            # Paths are relative to the client, not to the server
+            args.files = [path if path == "-" else os.path.join(cwd, path) for path in args.files]
+            if args.output_dir:
+                args.output_dir = os.path.join(cwd, args.output_dir)
+            if args.trace:
+                args.trace = os.path.join(cwd, args.trace)
+            if args.parse_cache:
+                args.parse_cache = os.path.join(cwd, args.parse_cache)
+            if args.machine_profile:
+                args.machine_profile = os.path.join(cwd, args.machine_profile)
+
+            compiler = self.compiler(args.jobs, args.frontend, not args.no_split_frames, enabled_passes(args),
+                                     args.parse_cache)
+            try:
+                status = run(args, compiler, io.StringIO(stdin_text or ""), output, errors)
+            except Exception as error:
+                # Keep serving; report what the command line would have crashed with
+                status = 1
+                errors.write(f"Error: internal compiler error: {type(error).__name__}: {error}\n")
+            self.compile_seconds += time.perf_counter() - started
+        return {"status": status, "stdout": output.getvalue(), "stderr": errors.getvalue()}
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "compile_seconds": self.compile_seconds,
+            "compilers": len(self.compilers),
+            "cache_hits": sum(compiler.cache_hits for compiler in self.compilers.values()),
+            "cache_misses": sum(compiler.cache_misses for compiler in self.compilers.values()),
+        }
+
+    def bind(self):
+        # Create the listening socket, replacing a stale socket file but never a live server
+        if os.path.exists(self.socket_path):
+            try:
+                request({"command": "ping"}, self.socket_path, timeout=1)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"A compile server is already listening on {self.socket_path}")
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+        self._server.owner = self
+
+    def serve_forever(self):
+        if self._server is None:
+            self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def close(self):
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+        for compiler in self.compilers.values():
+            compiler.close()
+        self.compilers = {}
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-server", description="Serve NeoASM compiles from a warm process.")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: per-user runtime directory)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="generated chunks kept per compiler (0 disables the cache)")
+    parser.add_argument("--no-warm-up", action="store_true", help="skip the start-up compile")
+    parser.add_argument("--status", action="store_true", help="print the statistics of a running server and exit")
+    parser.add_argument("--stop", action="store_true", help="stop a running server and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+    if args.status or args.stop:
+        try:
+            reply = request({"command": "shutdown" if args.stop else "stats"}, socket_path)
+        except OSError:
+            print(f"No compile server listening on {socket_path}", file=sys.stderr)
+            return 1
+        for key, value in reply.items():
+            print(f"{key}: {value}")
+        return 0
+
+    server = NeoASMCompileServer(socket_path, args.cache_size)
+    try:
+        server.bind()
+    except (OSError, RuntimeError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    if not args.no_warm_up:
+        server.warm_up()
+    print(f"NeoASM compile server listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+import argparse
+import os
+import re
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from Code_Generator import NeoASMCodeGeneratorOptimized
+from Instruction_IR import iter_text
+from Machine_Profile import DEFAULT_CPU_ARCHITECTURE, machine_architecture
+from Parse_Cache import DEFAULT_CACHE_DIR, FRONTEND_PARSERS, open_parse_cache
+from Pass_Manager import DEFAULT_PIPELINE, PASSES
+from Profiler import NeoASMProfiler, active_profiler, phase
+
+OUTPUT_SUFFIX = ".asm"
+MIN_PARALLEL_BYTES = 64 * 1024  # Source bytes a batch needs before it is worth a pool
+FRONTENDS = ("parser", "analyzer", "table")
+
+# Only braces, comments and string literals matter when splitting a file into
+# top-level units, so the splitter skips full tokenization
+_SPLIT_REGEX = re.compile(r'//[^\n]*|"(?:[^"\\\n]|\\.)*"|[{}]')
+# A comment must run to the end of its line, so a banner of slashes can only
+# be matched one way and a unit that is not a frame fails in linear time
+_FRAME_HEAD_REGEX = re.compile(r"(?:\s|//[^\n]*(?:\n|\Z))*frame\b")
+
+
+def parse_source(source_code, frontend="parser", parse_cache=None):
+    # Run one of the frontends over source text; with a NeoASMParseCache the
+    # AST of a source parsed before is loaded instead
+    if parse_cache is not None:
+        return parse_cache.parse_source(source_code, frontend)
+    parse = FRONTEND_PARSERS.get(frontend)
+    if parse is None:
+        raise ValueError(f"Unknown frontend: {frontend}")
+    return parse(source_code)
+
+
+def compile_source(source_code, cpu_architecture=None, frontend="parser", passes=None):
+    ast = parse_source(source_code, frontend)
+    generator = NeoASMCodeGeneratorOptimized(cpu_architecture, passes)
+    return generator.generate_code(ast)
+
+
+def split_compile_units(source_code):
+    # Split a file into independently compiled chunks, in source order: every
+    # top-level frame is a chunk of its own, and each run of top-level
+    # declarations between frames forms one chunk
+    chunks = []
+    depth = 0
+    unit_start = 0
+    run_start = None  # Start of the current run of non-frame units
+
+    for match in _SPLIT_REGEX.finditer(source_code):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth <= 0:
+                depth = 0
+                unit_end = match.end()
+                if _FRAME_HEAD_REGEX.match(source_code, unit_start):
+                    if run_start is not None:
+                        chunks.append(source_code[run_start:unit_start])
+                        run_start = None
+                    chunks.append(source_code[unit_start:unit_end])
+                elif run_start is None:
+                    run_start = unit_start
+                unit_start = unit_end
+
+    # Trailing text (normally whitespace or comments) joins the last run
+    tail_start = run_start if run_start is not None else unit_start
+    if source_code[tail_start:].strip() or run_start is not None:
+        chunks.append(source_code[tail_start:])
+    return chunks
+
+
+def lower_source(source_code, cpu_architecture=None, frontend="parser", parse_cache=None):
+    # The instructions of source text as lowered, before passes, layout,
+    # scheduling and register allocation
+    ast = parse_source(source_code, frontend, parse_cache)
+    generator = NeoASMCodeGeneratorOptimized(cpu_architecture)
+    with phase("codegen.lower"):
+        generator.handle_nodes(ast)
+    return generator.code
+
+
+def finish_source(instructions, cpu_architecture=None, passes=None):
+    # Generated code of a whole file from its lowered instructions
+    generator = NeoASMCodeGeneratorOptimized(cpu_architecture, passes)
+    generator.build_from_lowered(instructions)
+    with phase("codegen.emit"):
+        return "\n".join(iter_text(generator.code))
+
+
+def _run_task(path, profile, function, *args):
+    # Worker body: function(*args), with errors prefixed by path. With profile
+    # set (the parent's trace_memory flag) it runs under a profiler of its own
+    # and (result, exported profile) is returned.
+    try:
+        if profile is None:
+            return function(*args)
+        with NeoASMProfiler(trace_memory=profile) as profiler:
+            result = function(*args)
+        return result, profiler.export()
+    except SyntaxError as error:
+        raise SyntaxError(f"{path}: {error}") from None
+    except ValueError as error:
+        raise ValueError(f"{path}: {error}") from None
+
+
+def compile_chunks(path, chunks, lowered, cpu_architecture=None, frontend="parser", passes=None,
+                   parse_cache_dir=None, keep_lowered=False):
+    # Generated code of one file from its chunks, in source order. lowered
+    # holds the instructions of chunks lowered before (None for the rest).
+    # Returns (code, instructions of the chunks lowered here, or None). With
+    # keep_lowered, the instructions are copied before layout and register
+    # allocation set their operands, so the caller can cache them.
+    parse_cache = open_parse_cache(parse_cache_dir) if parse_cache_dir else None
+    fresh = []
+    lowered = list(lowered)
+    for index, chunk in enumerate(chunks):
+        if lowered[index] is None:
+            lowered[index] = lower_source(chunk, cpu_architecture, frontend, parse_cache)
+            fresh.append(lowered[index])
+    if keep_lowered:
+        instructions = [instruction.copy() for chunk in lowered for instruction in chunk]
+    else:
+        instructions = [instruction for chunk in lowered for instruction in chunk]
+    return finish_source(instructions, cpu_architecture, passes), (fresh if keep_lowered else None)
+
+
+def _compile_file(task):
+    # Worker entry point: task is compile_chunks' arguments followed by profile
+    return _run_task(task[0], task[-1], compile_chunks, *task[:-1])
+
+
+class NeoASMBatchCompiler:
+    """Compile many .neo files, fanning the files out to a process pool.
+
+    Each file is split into chunks (one per top-level frame, one per run of
+    declarations between frames), and the chunks are parsed and lowered to
+    instructions independently. The instructions of a file are then joined
+    in source order and go through the passes, memory layout, scheduling and
+    register allocation as one program, so every file gets exactly the code
+    compile_source() would generate for it, whatever the number of workers.
+
+    A file is compiled start to finish by one worker, so only source text
+    and generated code cross process boundaries: lowered instructions cost
+    about half as much to pickle as to produce, and the whole-file stages
+    after lowering cannot be split anyway. Batches with a single file or
+    less than min_parallel_bytes of source compile in-process, where the
+    pool would cost more than it saves; so does max_workers=1. The pool is
+    created on first use and reused across batches until close() is
+    called. While a NeoASMProfiler is enabled, workers profile their tasks
+    and the results are merged into it.
+
+    With cache_size > 0 the lowered instructions of up to that many chunks
+    are kept in memory (least recently used first out), so a long-lived
+    compiler only parses the chunks that changed since the last batch. With
+    parse_cache_dir the ASTs of chunks are also kept on disk there (see
+    NeoASMParseCache), so separate builds skip lexing and parsing the chunks
+    an earlier build has seen.
+
+    passes names the optimization passes to run (see Pass_Manager); they
+    run over the joined instructions of each file.
+    """
+
+    def __init__(self, cpu_architecture=None, max_workers=None, frontend="parser", split_frames=True, cache_size=0,
+                 passes=None, parse_cache_dir=None, min_parallel_bytes=MIN_PARALLEL_BYTES):
+        self.cpu_architecture = cpu_architecture  # None: DEFAULT_CPU_ARCHITECTURE
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.frontend = frontend
+        self.passes = tuple(passes) if passes else None
+        self.split_frames = split_frames
+        self.cache_size = cache_size
+        self.parse_cache_dir = parse_cache_dir
+        self.min_parallel_bytes = min_parallel_bytes
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()  # Chunk source -> lowered instructions
+        self._cache_architecture = None  # cpu_architecture the cached instructions were lowered for
+        self._executor = None
+
+    def compile_batch(self, paths):
+        # Returns the generated code of every file, in the order of paths
+        sources = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as file:
+                sources.append(file.read())
+        return self.compile_sources(list(zip(paths, sources)))
+
+    def compile_sources(self, named_sources, cpu_architecture=None):
+        # named_sources: list of (name, source_code) pairs; cpu_architecture
+        # overrides the compiler's for this batch and, when it differs from
+        # the last one, invalidates the chunk cache
+        cpu_architecture = cpu_architecture or self.cpu_architecture or dict(DEFAULT_CPU_ARCHITECTURE)
+        if cpu_architecture != self._cache_architecture:
+            self._cache.clear()
+            self._cache_architecture = cpu_architecture
+
+        # Cached instructions go to the workers as they are: compile_chunks()
+        # copies them before setting operands
+        keep_lowered = self.cache_size > 0
+        tasks = []
+        for name, source_code in named_sources:
+            chunks = split_compile_units(source_code) if self.split_frames else [source_code]
+            tasks.append((name, chunks, [self._cached(chunk) for chunk in chunks], cpu_architecture, self.frontend,
+                          self.passes, self.parse_cache_dir, keep_lowered))
+        parallel = (self.max_workers > 1 and len(tasks) > 1
+                    and sum(len(source_code) for _, source_code in named_sources) >= self.min_parallel_bytes)
+        with phase("batch.compile"):
+            results = self._map(_compile_file, tasks, parallel)
+
+        outputs = []
+        for (_, chunks, lowered, *_), (code, fresh) in zip(tasks, results):
+            outputs.append(code)
+            if keep_lowered:
+                pending = [chunk for chunk, instructions in zip(chunks, lowered) if instructions is None]
+                for chunk, instructions in zip(pending, fresh):
+                    self._remember(chunk, instructions)
+        return outputs
+
+    def _map(self, worker, tasks, parallel):
+        # worker over tasks, in the pool when parallel is set; in-process
+        # tasks report to the active profiler directly
+        profiler = active_profiler()
+        profile = profiler.trace_memory if profiler is not None and parallel else None
+        tasks = [task + (profile,) for task in tasks]
+        if parallel:
+            results = list(self.executor().map(worker, tasks))
+        else:
+            results = [worker(task) for task in tasks]
+        if profile is not None:
+            for _, exported in results:
+                profiler.merge(exported)
+            results = [result for result, _ in results]
+        return results
+
+    def _cached(self, chunk):
+        if not self.cache_size:
+            return None
+        instructions = self._cache.get(chunk)
+        if instructions is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(chunk)
+        self.cache_hits += 1
+        return instructions
+
+    def _remember(self, chunk, instructions):
+        if not self.cache_size:
+            return
+        self._cache[chunk] = instructions
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def output_path(path, output_dir=None):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir or os.path.dirname(path), stem + OUTPUT_SUFFIX)
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm", description="Compile NeoASM source files.")
+    parser.add_argument("files", nargs="+", help=".neo source files to compile ('-' reads stdin, writes stdout)")
+    parser.add_argument("-o", "--output-dir", help="directory for generated files (default: next to each source)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--frontend", choices=FRONTENDS, default="parser",
+                        help="parser (hand-written), analyzer or table (LL(1), generated from Grammar.bnf)")
+    parser.add_argument("--no-split-frames", action="store_true", help="parse each file as a single unit")
+    parser.add_argument("--parse-cache", nargs="?", const=DEFAULT_CACHE_DIR, metavar="DIR",
+                        help=f"reuse the parsed ASTs of unchanged chunks from DIR (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--machine-profile", nargs="?", const="", metavar="PATH",
+                        help="generate code for the stored profile of this machine (see Machine_Profile) instead of "
+                             "the fixed default architecture")
+    parser.add_argument("-O", "--optimize", action="store_true",
+                        help=f"run the optimization passes ({', '.join(DEFAULT_PIPELINE)})")
+    parser.add_argument("--disable-pass", action="append", default=[], choices=sorted(PASSES), metavar="PASS",
+                        help="skip one optimization pass (repeatable)")
+    parser.add_argument("--stats", action="store_true", help="print per-phase times and counters to stderr")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace-event JSON file of the compile")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record the tracemalloc peak of every phase (slows compilation)")
+    return parser
+
+
+def enabled_passes(args):
+    # Optimization passes a parsed command line asks for, in pipeline order (None: no passes)
+    if not args.optimize:
+        return None
+    return tuple(name for name in DEFAULT_PIPELINE if name not in args.disable_pass)
+
+
+def run(args, compiler=None, stdin=None, stdout=None, stderr=None):
+    # Carry out a parsed command line and return the exit status. compiler
+    # is a NeoASMBatchCompiler to reuse (the compile server keeps them warm);
+    # by default one is created for this call and closed afterwards.
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    profiler = None
+    if args.stats or args.trace or args.trace_memory:
+        profiler = NeoASMProfiler(trace_memory=args.trace_memory).enable()
+
+    owned = compiler is None
+    if owned:
+        compiler = NeoASMBatchCompiler(max_workers=args.jobs, frontend=args.frontend,
+                                       split_frames=not args.no_split_frames, passes=enabled_passes(args),
+                                       parse_cache_dir=args.parse_cache)
+    try:
+        try:
+            cpu_architecture = None
+            if args.machine_profile is not None:
+                cpu_architecture = machine_architecture(args.machine_profile or None)
+            named_sources = []
+            for path in args.files:
+                if path == "-":
+                    named_sources.append(("<stdin>", stdin.read()))
+                else:
+                    with open(path, "r", encoding="utf-8") as file:
+                        named_sources.append((path, file.read()))
+            outputs = compiler.compile_sources(named_sources, cpu_architecture)
+        except (OSError, SyntaxError, ValueError) as error:
+            print(f"Error: {error}", file=stderr)
+            return 1
+
+        with phase("write"):
+            for path, code in zip(args.files, outputs):
+                if path == "-":
+                    stdout.write(code + "\n")
+                    continue
+                with open(output_path(path, args.output_dir), "w", encoding="utf-8") as file:
+                    file.write(code + "\n")
+    finally:
+        if owned:
+            compiler.close()
+        if profiler is not None:
+            profiler.disable()
+
+    if profiler is not None:
+        if args.stats or not args.trace:
+            print(profiler.format_summary(), file=stderr)
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+    return 0
+
+
+def main(argv=None):
+    return run(build_argument_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
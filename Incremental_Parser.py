@@ -0,0 +1,167 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from Parser import NeoASMParser, iter_source_tokens
+
+
+class SourceUnit:
+    """One top-level declaration or frame (a Grammar.bnf <block>) and its parse result."""
+
+    __slots__ = ('nodes', 'error')
+
+    def __init__(self, nodes, error=None):
+        self.nodes = nodes  # AST nodes parsed from the unit (normally exactly one)
+        self.error = error  # SyntaxError raised while parsing the unit, if any
+
+
+def scan_units(source_code, start, stop_at=None):
+    # Split source_code[start:] into top-level units at brace depth 0. When
+    # stop_at(offset) returns True for the offset at which a new unit would
+    # begin, scanning stops there. Returns (units, stop_offset) where units is
+    # a list of (unit_start, unit_end, tokens).
+    units = []
+    tokens = []
+    unit_start = None
+    depth = 0
+
+    for kind, value, token_start, token_end in iter_source_tokens(source_code, start):
+        if kind == 'COMMENT':
+            continue
+        if unit_start is None:
+            if stop_at is not None and stop_at(token_start):
+                return units, token_start
+            unit_start = token_start
+        tokens.append(value)
+
+        if kind == 'PUNCT':
+            if value == '{':
+                depth += 1
+            elif value == '}':
+                depth -= 1
+                if depth <= 0:
+                    # Closing brace of the unit (a stray '}' forms a unit of its own)
+                    units.append((unit_start, token_end, tokens))
+                    tokens = []
+                    unit_start = None
+                    depth = 0
+
+    if unit_start is not None:
+        # Unterminated unit running to the end of the text
+        units.append((unit_start, len(source_code), tokens))
+    return units, len(source_code)
+
+
+def parse_unit(tokens):
+    try:
+        return SourceUnit(NeoASMParser(tokens).parse())
+    except SyntaxError as error:
+        return SourceUnit([], error)
+
+
+class NeoASMIncrementalDocument:
+    """A NeoASM source document that reparses only what an edit touches.
+
+    The text is split into top-level units (declarations and frames). An edit
+    re-lexes from the nearest untouched unit before its line until scanning
+    is back at brace depth 0 at the start of an untouched unit after it, and
+    reparses only the units found in between; every other unit keeps its AST
+    nodes.
+    An edit that leaves a block open or comments out the start of the next
+    unit therefore grows the region only as far as it has to.
+    """
+
+    def __init__(self, source_code=""):
+        self.text = ""
+        self.units = []
+        self.starts = array('q')  # Start offset of every unit
+        self.ends = array('q')  # End offset of every unit (just past its '}')
+        self.last_edit = {}
+        self._ast = None
+        self.set_text(source_code)
+
+    def set_text(self, source_code):
+        # Parse the whole document from scratch
+        self.text = source_code
+        self.units = []
+        self.starts = array('q')
+        self.ends = array('q')
+        units, _ = scan_units(source_code, 0)
+        self._install_units(0, 0, units)
+        self._ast = None
+        self.last_edit = {"relexed_chars": len(source_code), "reparsed_units": len(units), "reused_units": 0}
+
+    def apply_edit(self, start, end, new_text):
+        # Replace text[start:end] with new_text and update the AST incrementally
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range {start}..{end} outside document of length {len(self.text)}")
+        delta = len(new_text) - (end - start)
+        # No token but whitespace spans a newline, so the text before the line
+        # of the edit lexes the same whatever the edit does. Within that line a
+        # quote an earlier unit left unmatched can pair with one the edit brings
+        # onto the line, and swallow that unit's closing brace.
+        line_start = self.text.rfind("\n", 0, start) + 1
+        self.text = self.text[:start] + new_text + self.text[end:]
+
+        # Units ending before the line of the edit and units starting after
+        # the edit are untouched
+        first = bisect_left(self.ends, line_start)
+        after = bisect_right(self.starts, end)
+        unit_count = len(self.units)
+
+        # Re-lex from the end of the last untouched unit before it until
+        # a new unit would begin exactly where an untouched unit after the edit
+        # starts; everything in between is reparsed.
+        next_unit = after
+
+        def reached_untouched_unit(offset):
+            nonlocal next_unit
+            while next_unit < unit_count and self.starts[next_unit] + delta < offset:
+                next_unit += 1
+            return next_unit < unit_count and self.starts[next_unit] + delta == offset
+
+        region_start = self.ends[first - 1] if first > 0 else 0
+        units, region_end = scan_units(self.text, region_start, reached_untouched_unit)
+        if region_end == len(self.text):
+            next_unit = unit_count
+
+        reused = unit_count - (next_unit - first)
+        self._install_units(first, next_unit, units)
+        self._shift(first + len(units), delta)
+        self._ast = None
+        self.last_edit = {
+            "relexed_chars": region_end - region_start,
+            "reparsed_units": len(units),
+            "reused_units": reused,
+        }
+        return self.last_edit
+
+    def _install_units(self, first, after, units):
+        self.units[first:after] = [parse_unit(tokens) for _, _, tokens in units]
+        self.starts[first:after] = array('q', [unit[0] for unit in units])
+        self.ends[first:after] = array('q', [unit[1] for unit in units])
+
+    def _shift(self, first, delta):
+        if delta and first < len(self.starts):
+            self.starts[first:] = array('q', [offset + delta for offset in self.starts[first:]])
+            self.ends[first:] = array('q', [offset + delta for offset in self.ends[first:]])
+
+    @property
+    def ast(self):
+        # The full program AST, rebuilt from the per-unit node lists after an edit
+        if self._ast is None:
+            self._ast = [node for unit in self.units for node in unit.nodes]
+        return self._ast
+
+    def unit_at(self, offset):
+        # Index of the unit containing offset, or None when offset is between units
+        index = bisect_right(self.starts, offset) - 1
+        if index >= 0 and offset < self.ends[index]:
+            return index
+        return None
+
+    def errors(self):
+        return [
+            (self.starts[index], self.ends[index], str(unit.error))
+            for index, unit in enumerate(self.units)
+            if unit.error is not None
+        ]
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_FORMAT_VERSION = 1
+DEFAULT_STATE_PATH = ".neoasm_install_state.json"
+DEFAULT_MAX_WORKERS = 4
+
+
+class InstallStep:
+    __slots__ = ('name', 'action', 'requires', 'inputs', 'description')
+
+    def __init__(self, name, action, requires, inputs, description):
+        self.name = name
+        self.action = action  # Callable run with no arguments; raises on failure
+        self.requires = tuple(requires)  # Names of steps that must finish first
+        self.inputs = inputs  # JSON-serializable values the step's result depends on
+        self.description = description
+
+    def key(self):
+        # Memoization key: a completed step is skipped while its key is unchanged
+        payload = json.dumps([self.name, self.inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class NeoASMInstallGraph:
+    """Run installation steps as a dependency graph on a thread pool.
+
+    A step starts as soon as every step it requires has finished, so
+    independent steps (package managers, downloads, file setup) overlap. Each
+    finished step is recorded in a JSON state file under a key built from
+    its inputs; a later run skips steps whose key is unchanged, which makes
+    an interrupted installation resumable. When a step fails, the steps that
+    depend on it are marked blocked, the independent steps still run, and
+    finished work stays recorded for the next run.
+    """
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH, max_workers=DEFAULT_MAX_WORKERS, log=print):
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.log = log
+        self.steps = {}  # Name -> InstallStep, in insertion order
+        self.timings = {}  # Step name -> wall seconds, for the steps the last run() executed
+        self.state = self.load_state()
+        self._state_lock = threading.Lock()
+
+    def add(self, name, action, requires=(), inputs=None, description=None):
+        if name in self.steps:
+            raise ValueError(f"Duplicate install step {name}")
+        self.steps[name] = InstallStep(name, action, requires, inputs, description or name)
+        return self.steps[name]
+
+    def order(self, names=None):
+        # Topological order of the named steps and everything they require
+        order = []
+        marks = {}  # Name -> 1 while visiting, 2 when done
+
+        def visit(name, parent):
+            if name not in self.steps:
+                raise ValueError(f"Unknown install step {name}" + (f" (required by {parent})" if parent else ""))
+            if marks.get(name) == 2:
+                return
+            if marks.get(name) == 1:
+                raise ValueError(f"Install steps form a cycle through {name}")
+            marks[name] = 1
+            for requirement in self.steps[name].requires:
+                visit(requirement, name)
+            marks[name] = 2
+            order.append(name)
+
+        for name in (names if names is not None else self.steps):
+            visit(name, None)
+        return order
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return {"format_version": STATE_FORMAT_VERSION, "steps": {}}
+        if state.get("format_version") != STATE_FORMAT_VERSION:
+            return {"format_version": STATE_FORMAT_VERSION, "steps": {}}
+        return state
+
+    def save_state(self):
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def is_done(self, step):
+        record = self.state["steps"].get(step.name)
+        return record is not None and record.get("key") == step.key()
+
+    def run(self, only=None, force=False):
+        # Run the named steps (default: all) and their requirements; returns
+        # {step name: "done" | "cached" | "failed" | "blocked"}
+        status = {}
+        seconds = self.timings = {}
+        waiting = {}  # Name -> unfinished requirements
+        for name in self.order(only):
+            step = self.steps[name]
+            if not force and self.is_done(step):
+                status[name] = "cached"
+                self.log(f"[{name}] already done, skipping")
+            else:
+                # Requirements come first in the order, so their status is known
+                waiting[name] = {requirement for requirement in step.requires if status.get(requirement) != "cached"}
+
+        def settle(name, result):
+            # Record a finished step and release or block its dependents
+            status[name] = result
+            for other, requirements in list(waiting.items()):
+                if other in waiting and name in requirements:
+                    if result in ("failed", "blocked"):
+                        del waiting[other]
+                        self.log(f"[{other}] blocked: {name} did not complete")
+                        settle(other, "blocked")
+                    else:
+                        requirements.discard(name)
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while waiting or in_flight:
+                for name in [name for name, requirements in waiting.items() if not requirements]:
+                    del waiting[name]
+                    step = self.steps[name]
+                    self.log(f"[{name}] {step.description}")
+                    in_flight[executor.submit(self._run_step, step)] = name
+                if not in_flight:
+                    break  # Everything left is blocked
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = in_flight.pop(future)
+                    error, seconds[name] = future.result()
+                    if error is None:
+                        self.log(f"[{name}] done in {seconds[name]:.1f}s")
+                        settle(name, "done")
+                    else:
+                        self.log(f"[{name}] failed: {error}")
+                        settle(name, "failed")
+        return status
+
+    def _run_step(self, step):
+        # (error or None, wall seconds); finished steps are saved at once so
+        # an interrupted run resumes after them
+        started = time.perf_counter()
+        try:
+            step.action()
+        except Exception as error:
+            return error, time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        with self._state_lock:
+            self.state["steps"][step.name] = {
+                "key": step.key(),
+                "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seconds": elapsed,
+            }
+            self.save_state()
+        return None, elapsed
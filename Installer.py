@@ -2,264 +2,235 @@ import os
 import sys
 import subprocess
 import platform
+import argparse
 from pathlib import Path
+from Install_Graph import DEFAULT_MAX_WORKERS, DEFAULT_STATE_PATH, NeoASMInstallGraph
+from Machine_Profile import probe_machine, save_machine_profile
 
-def check_python_version():
-    """Check if Python version is compatible."""
-    required_version = (3, 7)
-    current_version = sys.version_info
-    if current_version < required_version:
-        print(f"Error: NeoASM requires Python 3.7 or higher. You are using Python {current_version[0]}.{current_version[1]}")
-        sys.exit(1)
+# Constants for version and hardware requirements
+REQUIRED_PYTHON_VERSION = (3, 7)
+REQUIRED_LLVM_VERSION = "12.0.0"  # Example required LLVM version
+REQUIRED_CPU_ARCHITECTURE = "AMD Ryzen 3 7000"
+REQUIRED_GPU_ARCHITECTURE = "Radeon Graphics"
 
-def install_dependencies():
-    """Install necessary dependencies using pip."""
-    try:
-        print("Installing required dependencies...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "ply", "numpy", "llvmlite", "py-cpuinfo"])
-        print("Dependencies installed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error during dependencies installation: {e}")
-        sys.exit(1)
+PYTHON_PACKAGES = ["ply", "numpy", "llvmlite", "py-cpuinfo"]
+SYSTEM_PACKAGES = {
+    "Windows": ["llvm", "git"],
+    "Linux": ["llvm", "git", "build-essential", "python3-pip"],
+    "Darwin": ["llvm", "git", "python3"],
+}
+COMPILER_REPOSITORY = "https://github.com/NeoASM/NeoASMCompiler.git"
+COMPILER_DIRECTORY = "NeoASMCompiler"
+DIRECTORIES = ["neoasm_bin", "neoasm_lib", "neoasm_examples"]
 
-def create_directories():
-    """Create necessary directories for NeoASM."""
-    directories = ["neoasm_bin", "neoasm_lib", "neoasm_examples"]
-    for directory in directories:
-        path = Path(directory)
-        if not path.exists():
-            path.mkdir(parents=True)
-            print(f"Directory {directory} created.")
-        else:
-            print(f"Directory {directory} already exists.")
-
-def download_compiler():
-    """Download the NeoASM compiler or tools (this is a placeholder for actual download)."""
-    try:
-        print("Downloading NeoASM compiler...")
-        # In a real scenario, you would use an HTTP request to download the files or Git clone a repository
-        # subprocess.check_call(["git", "clone", "https://github.com/NeoASM/NeoASMCompiler.git"])
-        print("NeoASM compiler downloaded successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error downloading NeoASM compiler: {e}")
-        sys.exit(1)
+# Local artifact cache. When the directory exists, packages come from it
+# instead of the network:
+#   wheels/                  Python wheels (pip --no-index --find-links)
+#   apt/, brew/, choco/      package manager download caches
+#   git/NeoASMCompiler.git   mirror of the compiler repository
+DEFAULT_CACHE_DIR = os.environ.get("NEOASM_ARTIFACT_CACHE", "neoasm_cache")
 
-def setup_runtime():
-    """Setup runtime environment for NeoASM."""
-    try:
-        print("Setting up NeoASM runtime environment...")
-        # Placeholder for setting up runtime components
-        # e.g., linking libraries or runtime-specific setup steps
-        print("NeoASM runtime environment setup completed.")
-    except Exception as e:
-        print(f"Error during runtime setup: {e}")
-        sys.exit(1)
-
-def install_on_windows():
-    """Windows specific installation steps."""
-    if platform.system() == "Windows":
-        print("Setting up NeoASM on Windows...")
-        subprocess.check_call(["choco", "install", "llvm", "git"])  # Assuming you use Chocolatey for package management
-        print("Windows installation completed.")
-
-def install_on_linux():
-    """Linux specific installation steps."""
-    if platform.system() == "Linux":
-        print("Setting up NeoASM on Linux...")
-        subprocess.check_call(["sudo", "apt-get", "install", "llvm", "git", "build-essential", "python3-pip"])
-        print("Linux installation completed.")
-
-def install_on_mac():
-    """Mac specific installation steps."""
-    if platform.system() == "Darwin":
-        print("Setting up NeoASM on macOS...")
-        subprocess.check_call(["brew", "install", "llvm", "git", "python3"])
-        print("macOS installation completed.")
-
-def main():
-    """Main installer script."""
-    check_python_version()
-    install_dependencies()
-    create_directories()
-    download_compiler()
-    setup_runtime()
-
-    if platform.system() == "Windows":
-        install_on_windows()
-    elif platform.system() == "Linux":
-        install_on_linux()
-    elif platform.system() == "Darwin":
-        install_on_mac()
-    else:
-        print(f"Unsupported OS: {platform.system()}")
-        sys.exit(1)
 
-    print("NeoASM installation completed successfully.")
-    print("You can now start using NeoASM by running 'neoasm' from your terminal.")
+class InstallError(Exception):
+    """A step of the installation failed."""
 
-if __name__ == "__main__":
-    main()
 
+def run_command(command, env=None):
+    """Run a command, turning a failure into an InstallError."""
+    try:
+        subprocess.check_call(command, env=env)
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise InstallError(f"{' '.join(command)}: {e}") from None
 
 
+def cache_path(cache_dir, *parts):
+    """A location inside the artifact cache, or None when the cache is absent."""
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return None
+    return os.path.join(cache_dir, *parts)
 
-import os
-import sys
-import subprocess
-import platform
-from pathlib import Path
-import cpuinfo
-import shutil
-import time
-
-# Constants for version and hardware requirements
-REQUIRED_PYTHON_VERSION = (3, 7)
-REQUIRED_LLVM_VERSION = "12.0.0"  # Example required LLVM version
-REQUIRED_CPU_ARCHITECTURE = "AMD Ryzen 3 7000"
-REQUIRED_GPU_ARCHITECTURE = "Radeon Graphics"
 
 def check_python_version():
     """Ensure Python version is 3.7 or higher."""
     current_version = sys.version_info
     if current_version < REQUIRED_PYTHON_VERSION:
-        print(f"Error: NeoASM requires Python {REQUIRED_PYTHON_VERSION[0]}.{REQUIRED_PYTHON_VERSION[1]} or higher.")
-        sys.exit(1)
+        required = ".".join(str(part) for part in REQUIRED_PYTHON_VERSION)
+        raise InstallError(f"NeoASM requires Python {required} or higher.")
+
 
 def check_system_architecture():
     """Check the CPU and GPU architecture to ensure compatibility."""
-    print("Checking system architecture...")
-    
+    import cpuinfo  # Installed by the python_packages step
+
     cpu_info = cpuinfo.get_cpu_info()
-    if REQUIRED_CPU_ARCHITECTURE not in cpu_info['model']:
-        print(f"Error: This installer is designed for systems with {REQUIRED_CPU_ARCHITECTURE}.")
-        sys.exit(1)
+    cpu_model = cpu_info.get('brand_raw', '')
+    if REQUIRED_CPU_ARCHITECTURE not in cpu_model:
+        raise InstallError(f"This installer is designed for systems with {REQUIRED_CPU_ARCHITECTURE}.")
 
     gpu_info = subprocess.check_output("lspci | grep VGA", shell=True).decode('utf-8')
     if REQUIRED_GPU_ARCHITECTURE not in gpu_info:
-        print(f"Error: This installer requires a system with {REQUIRED_GPU_ARCHITECTURE}.")
-        sys.exit(1)
-    
-    print(f"System architecture check passed: {cpu_info['model']} and GPU {REQUIRED_GPU_ARCHITECTURE} detected.")
+        raise InstallError(f"This installer requires a system with {REQUIRED_GPU_ARCHITECTURE}.")
+
+    print(f"System architecture check passed: {cpu_model} and GPU {REQUIRED_GPU_ARCHITECTURE} detected.")
+
+    # Keep what was probed: the compiler reads this profile instead of probing on every run
+    profile_path = save_machine_profile(probe_machine(cpu_info=cpu_info, gpu_info=gpu_info))
+    print(f"Machine profile written to {profile_path}.")
+
+
+def install_python_packages(cache_dir, fill_cache=False):
+    """Install Python dependencies, from the wheel cache when there is one."""
+    pip = [sys.executable, "-m", "pip"]
+    if fill_cache:
+        os.makedirs(os.path.join(cache_dir, "wheels"), exist_ok=True)
+        run_command(pip + ["download", "--dest", os.path.join(cache_dir, "wheels")] + PYTHON_PACKAGES)
+    wheels = cache_path(cache_dir, "wheels")
+    if wheels and os.path.isdir(wheels):
+        run_command(pip + ["install", "--no-index", "--find-links", wheels] + PYTHON_PACKAGES)
+    else:
+        run_command(pip + ["install"] + PYTHON_PACKAGES)
+
+
+def install_system_packages(cache_dir):
+    """Install LLVM, git and the toolchain with the platform's package manager."""
+    system = platform.system()
+    packages = SYSTEM_PACKAGES.get(system)
+    if packages is None:
+        raise InstallError(f"Unsupported OS: {system}")
+
+    if system == "Linux":
+        command = ["apt-get", "install", "-y"]
+        archives = cache_path(cache_dir, "apt")
+        if archives:
+            # apt reuses .deb files already in its archive directory
+            os.makedirs(os.path.join(archives, "partial"), exist_ok=True)
+            command += ["-o", f"Dir::Cache::Archives={os.path.abspath(archives)}"]
+        if os.geteuid() != 0:
+            command = ["sudo"] + command
+        run_command(command + packages)
+    elif system == "Darwin":
+        env = dict(os.environ)
+        downloads = cache_path(cache_dir, "brew")
+        if downloads:
+            env["HOMEBREW_CACHE"] = os.path.abspath(downloads)
+        run_command(["brew", "install"] + packages, env=env)
+    else:
+        command = ["choco", "install", "-y"] + packages
+        downloads = cache_path(cache_dir, "choco")
+        if downloads:
+            command += ["--cache-location", os.path.abspath(downloads)]
+        run_command(command)
+
 
-def install_dependencies():
-    """Install required dependencies and check for the correct versions."""
+def check_llvm_version():
+    """Check that the installed LLVM has the required version."""
     try:
-        print("Installing dependencies...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "ply", "numpy", "llvmlite", "py-cpuinfo"])
-        
-        # Checking specific library versions
-        installed_llvm_version = subprocess.check_output("llvm-config --version", shell=True).decode().strip()
-        if installed_llvm_version != REQUIRED_LLVM_VERSION:
-            print(f"Error: NeoASM requires LLVM version {REQUIRED_LLVM_VERSION}. Installed version is {installed_llvm_version}.")
-            sys.exit(1)
-        print(f"LLVM version {installed_llvm_version} is valid.")
-        
-        print("Dependencies installed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error during dependency installation: {e}")
-        sys.exit(1)
+        installed_llvm_version = subprocess.check_output(["llvm-config", "--version"]).decode().strip()
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise InstallError(f"Could not query llvm-config: {e}") from None
+    if installed_llvm_version != REQUIRED_LLVM_VERSION:
+        raise InstallError(f"NeoASM requires LLVM version {REQUIRED_LLVM_VERSION}. "
+                           f"Installed version is {installed_llvm_version}.")
+    print(f"LLVM version {installed_llvm_version} is valid.")
+
 
 def create_directories():
     """Create necessary directories for NeoASM binaries and libraries."""
-    directories = ["neoasm_bin", "neoasm_lib", "neoasm_examples"]
-    for directory in directories:
-        path = Path(directory)
-        if not path.exists():
-            path.mkdir(parents=True)
-            print(f"Directory {directory} created.")
-        else:
-            print(f"Directory {directory} already exists.")
-
-def download_compiler():
-    """Download or clone the NeoASM compiler (example setup)."""
-    try:
-        print("Downloading NeoASM compiler...")
-        # Here we simulate downloading by using Git or a direct download
-        subprocess.check_call(["git", "clone", "https://github.com/NeoASM/NeoASMCompiler.git"])
-        print("NeoASM compiler downloaded successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error downloading NeoASM compiler: {e}")
-        sys.exit(1)
+    for directory in DIRECTORIES:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+
+def download_compiler(cache_dir):
+    """Clone the NeoASM compiler, from the local mirror when the cache has one."""
+    if os.path.isdir(os.path.join(COMPILER_DIRECTORY, ".git")):
+        print(f"{COMPILER_DIRECTORY} is already cloned.")
+        return
+    mirror = cache_path(cache_dir, "git", COMPILER_DIRECTORY + ".git")
+    source = mirror if mirror and os.path.isdir(mirror) else COMPILER_REPOSITORY
+    run_command(["git", "clone", source, COMPILER_DIRECTORY])
+
 
 def setup_runtime():
     """Configure the runtime environment for NeoASM, ensuring pre-structuring for AOT."""
-    try:
-        print("Setting up runtime environment for NeoASM...")
-        # Configure AOT pre-structuring and string theory logic.
-        # Assuming NeoASM setup requires LLVM or similar tools.
-        print("Linked mapping AOT, String Theory Logic, Static Frame-based AOT pre-structuring initialized.")
-        
-        # This section would involve creating necessary configuration files for AOT
-        with open("neoasm_lib/aot_config.txt", "w") as config_file:
-            config_file.write("AOT linked mappings and pre-structuring initialized for AMD Ryzen 3 7000 architecture.\n")
-        print("Runtime environment setup completed.")
-    except Exception as e:
-        print(f"Error during runtime setup: {e}")
-        sys.exit(1)
+    with open("neoasm_lib/aot_config.txt", "w") as config_file:
+        config_file.write("AOT linked mappings and pre-structuring initialized for AMD Ryzen 3 7000 architecture.\n")
+    print("Linked mapping AOT, String Theory Logic, Static Frame-based AOT pre-structuring initialized.")
+
 
 def apply_optimizations():
     """Apply CPU optimizations for register allocation, instruction scheduling, and memory alignment."""
-    try:
-        print("Applying CPU optimizations...")
-        
-        # Register allocation based on proximity and usage frequency
-        print("Register allocation set: Optimizing memory access overhead.")
-        
-        # Instruction scheduling to maximize CPU pipeline efficiency
-        print("Instruction scheduling optimized: Reordered to maximize pipeline efficiency.")
-        
-        # Memory alignment for faster access
-        print("Memory alignment set: Ensuring cache line alignment for optimal performance.")
-        
-        print("CPU optimizations completed.")
-    except Exception as e:
-        print(f"Error during optimizations: {e}")
-        sys.exit(1)
-
-def install_on_windows():
-    """Install dependencies on Windows."""
-    if platform.system() == "Windows":
-        print("Setting up NeoASM on Windows...")
-        subprocess.check_call(["choco", "install", "llvm", "git"])
-        print("Windows installation completed.")
-
-def install_on_linux():
-    """Install dependencies on Linux."""
-    if platform.system() == "Linux":
-        print("Setting up NeoASM on Linux...")
-        subprocess.check_call(["sudo", "apt-get", "install", "llvm", "git", "build-essential", "python3-pip"])
-        print("Linux installation completed.")
-
-def install_on_mac():
-    """Install dependencies on macOS."""
-    if platform.system() == "Darwin":
-        print("Setting up NeoASM on macOS...")
-        subprocess.check_call(["brew", "install", "llvm", "git", "python3"])
-        print("macOS installation completed.")
-
-def main():
+    print("Register allocation set: Optimizing memory access overhead.")
+    print("Instruction scheduling optimized: Reordered to maximize pipeline efficiency.")
+    print("Memory alignment set: Ensuring cache line alignment for optimal performance.")
+
+
+def build_install_graph(state_path=DEFAULT_STATE_PATH, jobs=DEFAULT_MAX_WORKERS, cache_dir=DEFAULT_CACHE_DIR,
+                        fill_cache=False):
+    """Describe the installation as steps and the steps each one needs first."""
+    graph = NeoASMInstallGraph(state_path, jobs)
+    system = platform.system()
+    cache_inputs = {"cache": os.path.abspath(cache_dir) if cache_path(cache_dir) else None}
+
+    graph.add("python_version", check_python_version, inputs=list(sys.version_info[:2]),
+              description="Checking Python version")
+    graph.add("directories", create_directories, inputs=DIRECTORIES, description="Creating directories")
+    graph.add("python_packages", lambda: install_python_packages(cache_dir, fill_cache), requires=["python_version"],
+              inputs=dict(cache_inputs, python=sys.executable, packages=PYTHON_PACKAGES),
+              description="Installing Python dependencies")
+    graph.add("system_packages", lambda: install_system_packages(cache_dir),
+              inputs=dict(cache_inputs, system=system, packages=SYSTEM_PACKAGES.get(system)),
+              description=f"Installing system packages on {system}")
+    graph.add("system_architecture", check_system_architecture, requires=["python_packages"],
+              inputs=platform.node(), description="Checking system architecture")
+    graph.add("llvm_version", check_llvm_version, requires=["system_packages"], inputs=REQUIRED_LLVM_VERSION,
+              description="Checking LLVM version")
+    graph.add("compiler", lambda: download_compiler(cache_dir), requires=["system_packages"],
+              inputs=COMPILER_REPOSITORY, description="Downloading NeoASM compiler")
+    graph.add("runtime", setup_runtime, requires=["directories"], description="Setting up runtime environment")
+    graph.add("optimizations", apply_optimizations, requires=["system_architecture"],
+              description="Applying CPU optimizations")
+    return graph
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-install", description="Install NeoASM and its dependencies.")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_MAX_WORKERS, help="steps to run at once")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="file recording finished steps")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="local artifact cache, used when it exists (default: neoasm_cache)")
+    parser.add_argument("--fill-cache", action="store_true", help="download wheels into the cache before installing")
+    parser.add_argument("--force", action="store_true", help="rerun steps that are already recorded as done")
+    parser.add_argument("--only", nargs="+", metavar="STEP", help="run only these steps and the steps they need")
+    parser.add_argument("--list", action="store_true", help="list the steps in dependency order and exit")
+    return parser
+
+
+def main(argv=None):
     """Main installer function."""
-    check_python_version()
-    check_system_architecture()
-    install_dependencies()
-    create_directories()
-    download_compiler()
-    setup_runtime()
-    apply_optimizations()
-
-    # Platform-specific installation steps
-    if platform.system() == "Windows":
-        install_on_windows()
-    elif platform.system() == "Linux":
-        install_on_linux()
-    elif platform.system() == "Darwin":
-        install_on_mac()
-    else:
-        print(f"Unsupported OS: {platform.system()}")
-        sys.exit(1)
+    args = build_argument_parser().parse_args(argv)
+    graph = build_install_graph(args.state, args.jobs, args.cache_dir, args.fill_cache)
+    if args.list:
+        for name in graph.order():
+            step = graph.steps[name]
+            done = "done" if graph.is_done(step) else "pending"
+            print(f"{name:<20} {done:<8} needs: {', '.join(step.requires) or '-'}")
+        return 0
+
+    try:
+        status = graph.run(args.only, args.force)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    failed = sorted(name for name, result in status.items() if result in ("failed", "blocked"))
+    if failed:
+        print(f"NeoASM installation incomplete; unfinished steps: {', '.join(failed)}. "
+              f"Rerun to resume; finished steps are skipped.")
+        return 1
 
     print("NeoASM installation completed successfully.")
     print("You can now start using NeoASM by running 'neoasm' from your terminal.")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import struct
+from enum import IntEnum
+
+# Instruction IR shared by the code generator passes. Every instruction keeps
+# its opcode, the symbol it names, its operands as (KEY, value) pairs and the
+# names it defines and uses, so the layout, scheduling and register
+# allocation passes never have to parse generated text. Text (or a compact
+# binary encoding) is only produced at the very end, one instruction at a
+# time, straight into a file object.
+
+
+class Opcode(IntEnum):
+    VAR = 1
+    MAP = 2
+    AOT = 3
+    PACKET = 4
+    VEC = 5  # The vector operation itself ("ADD", "MUL", ...) is the TYPE operand
+    STR_MAP = 6
+    EXEC = 7
+    VALIDATE = 8
+    LINK = 9
+    SPILL = 10
+    RELOAD = 11
+
+
+# Text layout of every opcode: a head template and the operands it consumes.
+# Remaining operands follow the head as " KEY value", in operand order.
+_TEXT_LAYOUTS = {
+    Opcode.VAR: ("VAR {TYPE} {name}", ("TYPE",)),
+    Opcode.MAP: ("MAP {name} ({SRC} -> {DST})", ("SRC", "DST")),
+    Opcode.AOT: ("AOT {name} {KIND}", ("KIND",)),
+    Opcode.VEC: ("VEC_{TYPE} {name}", ("TYPE",)),
+    Opcode.LINK: ("LINK {name} ({SRC} -> {DST})", ("SRC", "DST")),
+    Opcode.SPILL: ("SPILL {name} {REGISTER} -> [{ADDRESS}]", ("REGISTER", "ADDRESS")),
+    Opcode.RELOAD: ("RELOAD {name} [{ADDRESS}] -> {REGISTER}", ("ADDRESS", "REGISTER")),
+}
+
+# Vector operations with defined semantics (see LLVM_Backend and Vector_Executor)
+ELEMENTWISE_OPERATIONS = ("ADD", "SUB", "MUL", "DIV")
+VECTOR_OPERATIONS = ELEMENTWISE_OPERATIONS + ("DOT", "CROSS")
+
+BINARY_MAGIC = b'NEOI'
+BINARY_FORMAT_VERSION = 1
+_BINARY_HEADER = struct.Struct('<4sH')
+_STRING_RECORD = struct.Struct('<BI')  # tag, byte length
+_INSTRUCTION_RECORD = struct.Struct('<BBIIHHH')  # tag, opcode, name, context, operands, defs, uses
+_STRING_TAG = 0
+_INSTRUCTION_TAG = 1
+
+
+def split_names(value):
+    # Operand values such as "vector_a, vector_b" name several symbols
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+class NeoASMInstruction:
+    """One IR instruction: opcode, named symbol, operands and def/use sets."""
+
+    __slots__ = ('opcode', 'name', 'operands', 'defs', 'uses', 'context')
+
+    def __init__(self, opcode, name, operands=(), defs=(), uses=(), context=None):
+        self.opcode = opcode
+        self.name = name
+        self.operands = tuple(operands)  # (KEY, value) pairs
+        self.defs = tuple(defs)  # Names this instruction defines
+        self.uses = tuple(uses)  # Names this instruction reads
+        self.context = context  # Enclosing frame (None at top level)
+
+    @property
+    def mnemonic(self):
+        # Opcode as written in the output, e.g. "VAR" or "VEC_ADD"
+        if self.opcode == Opcode.VEC:
+            return f"VEC_{self.operand('TYPE')}"
+        return self.opcode.name
+
+    def operand(self, key, default=None):
+        for operand_key, value in self.operands:
+            if operand_key == key:
+                return value
+        return default
+
+    def set_operand(self, key, value):
+        # Replace the operand in place, or append it when it is not present yet
+        for index, (operand_key, _) in enumerate(self.operands):
+            if operand_key == key:
+                self.operands = self.operands[:index] + ((key, value),) + self.operands[index + 1:]
+                return
+        self.operands += ((key, value),)
+
+    def copy(self):
+        # A copy whose operands can be set without touching this instruction
+        return NeoASMInstruction(self.opcode, self.name, self.operands, self.defs, self.uses, self.context)
+
+    def add_operand(self, key, value):
+        self.operands += ((key, value),)
+
+    def render(self):
+        layout = _TEXT_LAYOUTS.get(self.opcode)
+        if layout is None:
+            head, consumed = f"{self.opcode.name} {self.name}", ()
+        else:
+            template, consumed = layout
+            head = template.format(name=self.name, **{key: self.operand(key) for key in consumed})
+        return head + "".join(f" {key} {value}" for key, value in self.operands if key not in consumed)
+
+    def __repr__(self):
+        return f"<NeoASMInstruction {self.render()}>"
+
+
+def iter_text(instructions):
+    for instruction in instructions:
+        yield instruction.render()
+
+
+def write_text(instructions, stream):
+    # Write one line per instruction; returns the number of lines written
+    count = 0
+    for instruction in instructions:
+        stream.write(instruction.render())
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_binary(instructions, stream):
+    # Stream of records after a '<4sH' header (magic, version). A string
+    # record (tag 0, byte length, UTF-8 bytes) defines the next string id,
+    # starting at 1; it precedes the first instruction that refers to the
+    # string. An instruction record (tag 1) holds the opcode, the name and
+    # context string ids (0 means absent), the operand, def and use counts,
+    # then that many '<I' string ids: operand key/value pairs, defs, uses.
+    stream.write(_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION))
+    string_ids = {}
+
+    def string_id(value):
+        if value is None:
+            return 0
+        value = str(value)
+        index = string_ids.get(value)
+        if index is None:
+            index = string_ids[value] = len(string_ids) + 1
+            encoded = value.encode("utf-8")
+            stream.write(_STRING_RECORD.pack(_STRING_TAG, len(encoded)))
+            stream.write(encoded)
+        return index
+
+    count = 0
+    for instruction in instructions:
+        references = [string_id(part) for pair in instruction.operands for part in pair]
+        references += [string_id(name) for name in instruction.defs]
+        references += [string_id(name) for name in instruction.uses]
+        name_id = string_id(instruction.name)
+        context_id = string_id(instruction.context)
+        stream.write(_INSTRUCTION_RECORD.pack(
+            _INSTRUCTION_TAG, instruction.opcode, name_id, context_id,
+            len(instruction.operands), len(instruction.defs), len(instruction.uses),
+        ))
+        stream.write(struct.pack(f'<{len(references)}I', *references))
+        count += 1
+    return count
+
+
+def read_binary(stream):
+    # Yield the instructions of a write_binary stream; operand values come
+    # back as strings
+    header = stream.read(_BINARY_HEADER.size)
+    if len(header) < _BINARY_HEADER.size:
+        raise ValueError("Truncated instruction stream header")
+    magic, version = _BINARY_HEADER.unpack(header)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a NeoASM instruction stream")
+    if version != BINARY_FORMAT_VERSION:
+        raise ValueError(f"Unsupported instruction stream version {version}")
+
+    def read_exact(size):
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated instruction stream")
+        return data
+
+    strings = [None]
+    while True:
+        tag = stream.read(1)
+        if not tag:
+            return
+        if tag[0] == _STRING_TAG:
+            _, length = _STRING_RECORD.unpack(tag + read_exact(_STRING_RECORD.size - 1))
+            strings.append(read_exact(length).decode("utf-8"))
+        elif tag[0] == _INSTRUCTION_TAG:
+            _, opcode, name_id, context_id, operand_count, def_count, use_count = _INSTRUCTION_RECORD.unpack(
+                tag + read_exact(_INSTRUCTION_RECORD.size - 1)
+            )
+            reference_count = 2 * operand_count + def_count + use_count
+            reference_ids = struct.unpack(f'<{reference_count}I', read_exact(4 * reference_count))
+            try:
+                references = [strings[index] for index in reference_ids]
+                operands = tuple(zip(references[0:2 * operand_count:2], references[1:2 * operand_count:2]))
+                defs = references[2 * operand_count:2 * operand_count + def_count]
+                uses = references[2 * operand_count + def_count:]
+                instruction = NeoASMInstruction(Opcode(opcode), strings[name_id], operands, defs, uses,
+                                                strings[context_id])
+            except (IndexError, ValueError):
+                raise ValueError("Corrupt instruction stream") from None
+            yield instruction
+        else:
+            raise ValueError(f"Unknown instruction stream record tag {tag[0]}")
+
+
+def vector_operands(instruction):
+    # (operation, input names, output name) of a VEC instruction
+    operation = str(instruction.operand("TYPE")).upper()
+    if operation not in VECTOR_OPERATIONS:
+        raise ValueError(f"Unsupported vector operation VEC_{operation} in {instruction.name}")
+    inputs = split_names(instruction.operand("IN", ""))
+    outputs = split_names(instruction.operand("OUT", ""))
+    if len(outputs) != 1 or not 1 <= len(inputs) <= 2:
+        raise ValueError(f"VEC_{operation} {instruction.name} needs one or two inputs and one output")
+    if operation == "CROSS" and len(inputs) != 2:
+        raise ValueError(f"VEC_CROSS {instruction.name} needs two inputs")
+    return operation, inputs, outputs[0]
+
+
+def resolve_exec_links(instructions):
+    # Map the index of every EXEC instruction to the indices of the VEC and
+    # EXEC instructions it runs, in link order: a linked name selects the
+    # operations and exec blocks of that name, or failing that every vector
+    # operation whose OUT operand names that buffer. Raises ValueError on
+    # cyclic links.
+    by_name = {}
+    writers = {}
+    for index, instruction in enumerate(instructions):
+        if instruction.opcode in (Opcode.VEC, Opcode.EXEC):
+            by_name.setdefault(instruction.name, []).append(index)
+        if instruction.opcode == Opcode.VEC:
+            for name in split_names(instruction.operand("OUT", "")):
+                writers.setdefault(name, []).append(index)
+
+    links = {}
+    for index, instruction in enumerate(instructions):
+        if instruction.opcode == Opcode.EXEC:
+            links[index] = callees = []
+            for name in split_names(instruction.operand("LINK", "")):
+                linked = by_name.get(name) or writers.get(name, ())
+                callees.extend(callee for callee in linked if callee != index)
+
+    state = {}  # Exec index -> "visiting" or "done"
+
+    def visit(index):
+        state[index] = "visiting"
+        for callee in links[index]:
+            if callee in links:
+                if state.get(callee) == "visiting":
+                    raise ValueError(f"Exec blocks link each other in a cycle through {instructions[callee].name}")
+                if callee not in state:
+                    visit(callee)
+        state[index] = "done"
+
+    for index in links:
+        if index not in state:
+            visit(index)
+    return links
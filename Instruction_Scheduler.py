@@ -0,0 +1,223 @@
+import heapq
+import math
+
+# Per-target instruction timing: opcode -> (latency in cycles, reciprocal
+# throughput in cycles, functional unit). Opcodes missing from a table use
+# DEFAULT_TIMING.
+LATENCY_TABLES = {
+    "generic": {
+        "VAR": (1, 1, "ALU"),
+        "MAP": (4, 1, "MEM"),
+        "AOT": (3, 1, "MEM"),
+        "PACKET": (2, 1, "CTRL"),
+        "EXEC": (5, 1, "CTRL"),
+        "LINK": (2, 1, "MEM"),
+        "VALIDATE": (1, 1, "ALU"),
+        "STR_MAP": (6, 2, "VEC"),
+        "VEC_ADD": (3, 1, "VEC"),
+        "VEC_SUB": (3, 1, "VEC"),
+        "VEC_MUL": (4, 1, "VEC"),
+        "VEC_DIV": (13, 5, "VEC"),
+        "VEC_DOT": (9, 2, "VEC"),
+        "VEC_CROSS": (7, 2, "VEC"),
+    },
+    # AMD Zen 4 (Ryzen 7000): two FP multiply/add pipes, wide load/store
+    "znver4": {
+        "VAR": (1, 0.25, "ALU"),
+        "MAP": (4, 0.33, "MEM"),
+        "AOT": (3, 0.5, "MEM"),
+        "PACKET": (2, 1, "CTRL"),
+        "EXEC": (5, 1, "CTRL"),
+        "LINK": (2, 0.5, "MEM"),
+        "VALIDATE": (1, 0.25, "ALU"),
+        "STR_MAP": (5, 1, "VEC"),
+        "VEC_ADD": (3, 0.5, "VEC"),
+        "VEC_SUB": (3, 0.5, "VEC"),
+        "VEC_MUL": (3, 0.5, "VEC"),
+        "VEC_DIV": (11, 5, "VEC"),
+        "VEC_DOT": (8, 1, "VEC"),
+        "VEC_CROSS": (6, 1, "VEC"),
+    },
+    # Intel Skylake client
+    "skylake": {
+        "VAR": (1, 0.25, "ALU"),
+        "MAP": (5, 0.5, "MEM"),
+        "AOT": (4, 0.5, "MEM"),
+        "PACKET": (2, 1, "CTRL"),
+        "EXEC": (5, 1, "CTRL"),
+        "LINK": (2, 0.5, "MEM"),
+        "VALIDATE": (1, 0.25, "ALU"),
+        "STR_MAP": (6, 1, "VEC"),
+        "VEC_ADD": (4, 0.5, "VEC"),
+        "VEC_SUB": (4, 0.5, "VEC"),
+        "VEC_MUL": (4, 0.5, "VEC"),
+        "VEC_DIV": (14, 8, "VEC"),
+        "VEC_DOT": (11, 1.5, "VEC"),
+        "VEC_CROSS": (8, 1.5, "VEC"),
+    },
+}
+DEFAULT_TIMING = (1, 1, "ALU")
+DEFAULT_ISSUE_WIDTH = 4
+
+# Substrings of a CPU model name that select a table
+_TARGET_ALIASES = (
+    ("znver4", "znver4"),
+    ("zen 4", "znver4"),
+    ("ryzen", "znver4"),
+    ("skylake", "skylake"),
+    ("intel", "skylake"),
+)
+
+
+def select_latency_table(cpu_architecture):
+    # An explicit "latency_table" wins; otherwise "target" (or the CPU "model")
+    # picks one of LATENCY_TABLES, falling back to the generic table
+    explicit = cpu_architecture.get("latency_table")
+    if explicit:
+        return dict(LATENCY_TABLES["generic"], **explicit)
+    target = str(cpu_architecture.get("target") or cpu_architecture.get("model") or "").lower()
+    if target in LATENCY_TABLES:
+        return LATENCY_TABLES[target]
+    for alias, table_name in _TARGET_ALIASES:
+        if alias in target:
+            return LATENCY_TABLES[table_name]
+    return LATENCY_TABLES["generic"]
+
+
+def build_dependency_graph(instructions):
+    # Successor lists from read-after-write, write-after-write and
+    # write-after-read hazards on the names each instruction defines and uses.
+    # Edges always point forward in program order.
+    successors = [[] for _ in instructions]
+    last_writer = {}
+    readers = {}  # Readers of each name since its last write
+    edge_count = 0
+
+    for index, instruction in enumerate(instructions):
+        defs = instruction.defs
+        uses = instruction.uses
+        predecessors = set()
+        for name in uses:
+            writer = last_writer.get(name)
+            if writer is not None:
+                predecessors.add(writer)
+        for name in defs:
+            writer = last_writer.get(name)
+            if writer is not None:
+                predecessors.add(writer)
+            predecessors.update(readers.get(name, ()))
+        predecessors.discard(index)
+
+        for predecessor in predecessors:
+            successors[predecessor].append(index)
+        edge_count += len(predecessors)
+
+        for name in uses:
+            readers.setdefault(name, []).append(index)
+        for name in defs:
+            last_writer[name] = index
+            readers[name] = []
+
+    return successors, edge_count
+
+
+class NeoASMListScheduler:
+    """Critical-path list scheduler over a def/use dependency DAG.
+
+    Every instruction's priority is the latency-weighted length of the longest
+    path from it to the end of the program. A cycle-by-cycle simulation then
+    issues up to issue_width ready instructions per cycle, highest priority
+    first, respecting operand latencies and keeping each functional unit busy
+    for the instruction's reciprocal throughput. Heaps keep the whole pass at
+    O((n + e) log n).
+    """
+
+    def __init__(self, cpu_architecture):
+        self.timings = select_latency_table(cpu_architecture)
+        self.issue_width = cpu_architecture.get("issue_width", DEFAULT_ISSUE_WIDTH)
+        self.stats = {}
+
+    def timing(self, instruction):
+        return self.timings.get(instruction.mnemonic, DEFAULT_TIMING)
+
+    def schedule(self, instructions):
+        # Returns the new instruction order as a list of indices into instructions
+        count = len(instructions)
+        successors, edge_count = build_dependency_graph(instructions)
+        timings = [self.timing(instruction) for instruction in instructions]
+
+        # Critical path priorities; program order is a topological order
+        priority = [0] * count
+        for index in range(count - 1, -1, -1):
+            tail = max((priority[successor] for successor in successors[index]), default=0)
+            priority[index] = timings[index][0] + tail
+
+        remaining_predecessors = [0] * count
+        for index in range(count):
+            for successor in successors[index]:
+                remaining_predecessors[successor] += 1
+
+        # Ready instructions are kept in one heap per functional unit, so a
+        # busy unit never blocks ready work for the others
+        earliest = [0] * count  # Cycle at which all operands are available
+        ready = {}
+        for index in range(count):
+            if remaining_predecessors[index] == 0:
+                ready.setdefault(timings[index][2], []).append((-priority[index], index))
+        for heap in ready.values():
+            heapq.heapify(heap)
+        waiting = []  # (cycle, -priority, index) for instructions whose operands are not ready
+        unit_free_at = {}
+        order = []
+        cycle = 0
+        makespan = 0
+
+        while len(order) < count:
+            while waiting and waiting[0][0] <= cycle:
+                _, negative_priority, index = heapq.heappop(waiting)
+                heapq.heappush(ready.setdefault(timings[index][2], []), (negative_priority, index))
+
+            issued = 0
+            while issued < self.issue_width:
+                # Highest-priority ready instruction among units with capacity left this cycle
+                best_unit = None
+                for unit, heap in ready.items():
+                    if heap and unit_free_at.get(unit, 0) < cycle + 1:
+                        if best_unit is None or heap[0] < ready[best_unit][0]:
+                            best_unit = unit
+                if best_unit is None:
+                    break
+
+                _, index = heapq.heappop(ready[best_unit])
+                latency, reciprocal_throughput, unit = timings[index]
+                order.append(index)
+                issued += 1
+                unit_free_at[unit] = max(unit_free_at.get(unit, 0), cycle) + reciprocal_throughput
+                done = cycle + latency
+                makespan = max(makespan, done)
+                for successor in successors[index]:
+                    earliest[successor] = max(earliest[successor], done)
+                    remaining_predecessors[successor] -= 1
+                    if remaining_predecessors[successor] == 0:
+                        entry = (-priority[successor], successor)
+                        if earliest[successor] <= cycle:
+                            heapq.heappush(ready.setdefault(timings[successor][2], []), entry)
+                        else:
+                            heapq.heappush(waiting, (earliest[successor],) + entry)
+
+            if issued:
+                cycle += 1
+            else:
+                # Idle cycle: skip ahead to the next operand or unit becoming available
+                next_events = [math.floor(unit_free_at.get(unit, 0)) for unit, heap in ready.items() if heap]
+                if waiting:
+                    next_events.append(waiting[0][0])
+                cycle = max(cycle + 1, min(next_events))
+
+        self.stats = {
+            "instructions": count,
+            "edges": edge_count,
+            "critical_path": max(priority, default=0),
+            "cycles": makespan,
+        }
+        return order
@@ -0,0 +1,336 @@
+import ctypes
+import re
+
+try:
+    import llvmlite.binding as llvm
+    from llvmlite import ir
+except ImportError:  # llvmlite is optional; only this backend needs it
+    llvm = None
+    ir = None
+
+from Instruction_IR import ELEMENTWISE_OPERATIONS, Opcode, resolve_exec_links, vector_operands
+
+ELEMENT_TYPES = ("double", "float")
+
+# Host CPU features reported by describe_target()
+_SIMD_FEATURES = ("sse4.2", "avx", "avx2", "fma", "avx512f", "avx512vl", "neon", "sve")
+_SYMBOL_REGEX = re.compile(r'[^A-Za-z0-9_]')
+
+_initialized = False
+
+
+def _initialize_llvm():
+    global _initialized
+    if _initialized:
+        return
+    try:
+        llvm.initialize()
+    except RuntimeError:
+        pass  # Newer llvmlite releases initialize LLVM automatically
+    llvm.initialize_native_target()
+    llvm.initialize_native_asmprinter()
+    _initialized = True
+
+
+def host_cpu():
+    # (cpu name, feature string) of the machine we are running on
+    _initialize_llvm()
+    return llvm.get_host_cpu_name(), llvm.get_host_cpu_features().flatten()
+
+
+class NeoASMJITProgram:
+    """Natively compiled vec_ kernels and exec blocks, callable from Python.
+
+    Every function takes the program's buffer table and an element count.
+    run() fills the table from a name -> buffer mapping; buffers are any
+    writable objects exposing the buffer protocol with the backend's element
+    type (array.array('d'), NumPy float64 arrays, bytearrays of the right
+    size...).
+    """
+
+    def __init__(self, engine, backend):
+        self.engine = engine  # Keeps the machine code alive
+        self.symbols = backend.symbols
+        self.slots = backend.slots
+        self.requirements = backend.requirements
+        self.element_ctype = backend.element_ctype
+        self._functions = {}
+
+    def function(self, name):
+        symbol = self.symbols.get(name)
+        if symbol is None:
+            raise KeyError(f"No compiled vec_ operation or exec block named {name}")
+        function = self._functions.get(symbol)
+        if function is None:
+            address = self.engine.get_function_address(symbol)
+            function = ctypes.CFUNCTYPE(None, ctypes.POINTER(ctypes.c_void_p), ctypes.c_int64)(address)
+            self._functions[symbol] = function
+        return function
+
+    def run(self, name, buffers, count):
+        # Run the vec_ operation or exec block called name over count elements
+        function = self.function(name)
+        element_ctype = self.element_ctype
+        element_size = ctypes.sizeof(element_ctype)
+        table = (ctypes.c_void_p * max(len(self.slots), 1))()
+        views = []  # Keep the ctypes views alive for the duration of the call
+
+        for buffer_name, minimum in self.requirements[self.symbols[name]](count).items():
+            if buffer_name not in buffers:
+                raise ValueError(f"{name} needs buffer {buffer_name}")
+            view = memoryview(buffers[buffer_name]).cast("B")
+            if view.readonly:
+                raise ValueError(f"Buffer {buffer_name} is read-only")
+            length = view.nbytes // element_size
+            if length < minimum:
+                raise ValueError(f"Buffer {buffer_name} holds {length} elements, {name} needs {minimum}")
+            array = (element_ctype * length).from_buffer(view)
+            views.append(array)
+            table[self.slots.index(buffer_name)] = ctypes.addressof(array)
+
+        function(table, count)
+
+
+class NeoASMLLVMBackend:
+    """Lower the vec_ operations and exec blocks of an instruction list to LLVM.
+
+    Each vec_ operation becomes a counted loop over the buffers named by its
+    IN and OUT operands, compiled for the host CPU (or an explicit cpu_name
+    and cpu_features) at opt_level, so LLVM's loop and SLP vectorizers use
+    whatever vector width the target offers, AVX2 or AVX-512 included.
+    Element-wise ADD/SUB/MUL/DIV compute out[i] = a[i] op b[i] (out[i] op a[i]
+    with a single input), DOT stores the sum of a[i] * b[i] in out[0] and
+    CROSS takes the cross product of consecutive 3-element vectors. An exec
+    block calls, in program order, the operations and exec blocks its LINK
+    operand names; a linked buffer name selects every operation writing it.
+    """
+
+    def __init__(self, cpu_name=None, cpu_features=None, triple=None, opt_level=3, element_type="double"):
+        if llvm is None:
+            raise ImportError("The LLVM backend requires llvmlite (pip install llvmlite)")
+        if element_type not in ELEMENT_TYPES:
+            raise ValueError(f"Unsupported element type {element_type}, expected one of {ELEMENT_TYPES}")
+        _initialize_llvm()
+        host_name, host_features = host_cpu()
+        self.triple = triple or llvm.get_process_triple()
+        self.cpu_name = cpu_name if cpu_name is not None else host_name
+        self.cpu_features = cpu_features if cpu_features is not None else host_features
+        self.opt_level = opt_level
+        self.element_type = element_type
+        self.element_ctype = ctypes.c_double if element_type == "double" else ctypes.c_float
+        self.slots = []  # Buffer table: slot index -> buffer name
+        self.symbols = {}  # Operation or exec name (and LLVM symbol) -> LLVM symbol
+        self.requirements = {}  # LLVM symbol -> function(count) -> {buffer name: minimum length}
+
+    def describe_target(self):
+        enabled = {feature[1:] for feature in self.cpu_features.split(",") if feature.startswith("+")}
+        return {
+            "triple": self.triple,
+            "cpu": self.cpu_name,
+            "simd": [feature for feature in _SIMD_FEATURES if feature in enabled],
+        }
+
+    def target_machine(self, reloc="default"):
+        # reloc="pic" for object files, the default relocation model for the JIT
+        target = llvm.Target.from_triple(self.triple)
+        codemodel = "jitdefault" if reloc == "default" else "default"
+        return target.create_target_machine(cpu=self.cpu_name, features=self.cpu_features,
+                                            opt=min(self.opt_level, 3), reloc=reloc, codemodel=codemodel)
+
+    def lower(self, instructions):
+        # Returns the LLVM IR text of the module
+        element = ir.DoubleType() if self.element_type == "double" else ir.FloatType()
+        module = ir.Module(name="neoasm")
+        module.triple = self.triple
+        function_type = ir.FunctionType(ir.VoidType(), [ir.PointerType(ir.PointerType(element)), ir.IntType(64)])
+
+        self.slots = []
+        self.symbols = {}
+        self.requirements = {}
+        slot_of = {}
+        functions = {}  # Instruction index -> LLVM function
+
+        def slot(name):
+            if name not in slot_of:
+                slot_of[name] = len(self.slots)
+                self.slots.append(name)
+            return slot_of[name]
+
+        def define(name, prefix):
+            symbol = base = f"neo_{prefix}_{_SYMBOL_REGEX.sub('_', name)}"
+            suffix = 1
+            while symbol in module.globals:
+                symbol = f"{base}_{suffix}"
+                suffix += 1
+            function = ir.Function(module, function_type, name=symbol)
+            function.args[0].name = "buffers"
+            function.args[1].name = "count"
+            self.symbols.setdefault(name, symbol)
+            self.symbols[symbol] = symbol
+            return function
+
+        for index, instruction in enumerate(instructions):
+            if instruction.opcode == Opcode.VEC:
+                operation, inputs, output = vector_operands(instruction)
+                function = functions[index] = define(instruction.name, "vec")
+                self._lower_vector(function, element, operation, [slot(name) for name in inputs], slot(output))
+                self.requirements[function.name] = self._vector_requirements(operation, inputs, output)
+            elif instruction.opcode == Opcode.EXEC:
+                functions[index] = define(instruction.name, "exec")
+
+        for index, callees in resolve_exec_links(instructions).items():
+            function = functions[index]
+            builder = ir.IRBuilder(function.append_basic_block("entry"))
+            for callee in callees:
+                builder.call(functions[callee], function.args)
+            builder.ret_void()
+            self.requirements[function.name] = self._exec_requirements(functions[callee].name for callee in callees)
+
+        return str(module)
+
+    def _vector_requirements(self, operation, inputs, output):
+        def requirements(count):
+            if operation == "CROSS":
+                count -= count % 3
+            needed = {name: count for name in inputs}
+            needed[output] = 1 if operation == "DOT" else count
+            return needed
+        return requirements
+
+    def _exec_requirements(self, symbols):
+        symbols = list(symbols)
+        table = self.requirements
+
+        def requirements(count):
+            needed = {}
+            for symbol in symbols:
+                for name, minimum in table[symbol](count).items():
+                    needed[name] = max(needed.get(name, 0), minimum)
+            return needed
+        return requirements
+
+    def _lower_vector(self, function, element, operation, input_slots, output_slot):
+        builder = ir.IRBuilder(function.append_basic_block("entry"))
+        buffers, count = function.args
+        i64 = ir.IntType(64)
+
+        def buffer_at(slot):
+            return builder.load(builder.gep(buffers, [ir.Constant(i64, slot)], inbounds=True))
+
+        output = buffer_at(output_slot)
+        if len(input_slots) == 1 and operation in ELEMENTWISE_OPERATIONS:
+            left, right = output, buffer_at(input_slots[0])
+        else:
+            left = buffer_at(input_slots[0])
+            right = buffer_at(input_slots[-1])
+
+        def load(pointer, index):
+            return builder.load(builder.gep(pointer, [index], inbounds=True))
+
+        def store(value, pointer, index):
+            builder.store(value, builder.gep(pointer, [index], inbounds=True))
+
+        if operation in ELEMENTWISE_OPERATIONS:
+            combine = {"ADD": builder.fadd, "SUB": builder.fsub, "MUL": builder.fmul, "DIV": builder.fdiv}[operation]
+
+            def body(index, _):
+                store(combine(load(left, index), load(right, index)), output, index)
+            self._counted_loop(builder, count, body)
+
+        elif operation == "DOT":
+            def body(index, total):
+                product = builder.fmul(load(left, index), load(right, index))
+                total = builder.fadd(total, product)
+                product.flags.append("fast")  # Reassociation lets the reduction vectorize
+                total.flags.append("fast")
+                return total
+            store(self._counted_loop(builder, count, body, ir.Constant(element, 0.0)), output, ir.Constant(i64, 0))
+
+        else:  # CROSS over consecutive (x, y, z) triples
+            def body(triple, _):
+                base = builder.mul(triple, ir.Constant(i64, 3))
+                offsets = [builder.add(base, ir.Constant(i64, component)) for component in range(3)]
+                a = [load(left, offset) for offset in offsets]
+                b = [load(right, offset) for offset in offsets]
+                for component in range(3):
+                    first, second = (component + 1) % 3, (component + 2) % 3
+                    value = builder.fsub(builder.fmul(a[first], b[second]), builder.fmul(a[second], b[first]))
+                    store(value, output, offsets[component])
+            self._counted_loop(builder, builder.sdiv(count, ir.Constant(i64, 3)), body)
+
+        builder.ret_void()
+
+    def _counted_loop(self, builder, count, body, initial=None):
+        # for (index = 0; index < count; index++) carried = body(index, carried);
+        # returns the final carried value when initial is given
+        i64 = ir.IntType(64)
+        zero = ir.Constant(i64, 0)
+        function = builder.function
+        preheader = builder.block
+        loop = function.append_basic_block("loop")
+        exit_block = function.append_basic_block("exit")
+        builder.cbranch(builder.icmp_signed(">", count, zero), loop, exit_block)
+
+        builder.position_at_end(loop)
+        index = builder.phi(i64, name="index")
+        index.add_incoming(zero, preheader)
+        carried = None
+        if initial is not None:
+            carried = builder.phi(initial.type, name="carried")
+            carried.add_incoming(initial, preheader)
+        result = body(index, carried)
+        following = builder.add(index, ir.Constant(i64, 1), name="next")
+        index.add_incoming(following, builder.block)
+        if initial is not None:
+            carried.add_incoming(result, builder.block)
+        latch = builder.block
+        builder.cbranch(builder.icmp_signed("<", following, count), loop, exit_block)
+
+        builder.position_at_end(exit_block)
+        if initial is None:
+            return None
+        final = builder.phi(initial.type, name="final")
+        final.add_incoming(initial, preheader)
+        final.add_incoming(result, latch)
+        return final
+
+    def optimized_module(self, instructions, target_machine):
+        module = llvm.parse_assembly(self.lower(instructions))
+        module.verify()
+        module.data_layout = str(target_machine.target_data)
+        if hasattr(llvm, "create_pass_builder"):
+            tuning = llvm.create_pipeline_tuning_options(speed_level=self.opt_level)
+            tuning.loop_vectorization = True
+            tuning.slp_vectorization = True
+            pass_builder = llvm.create_pass_builder(target_machine, tuning)
+            pass_builder.getModulePassManager().run(module, pass_builder)
+        else:
+            # Legacy pass manager (llvmlite < 0.44)
+            pass_manager_builder = llvm.create_pass_manager_builder()
+            pass_manager_builder.opt_level = self.opt_level
+            pass_manager_builder.loop_vectorize = True
+            pass_manager_builder.slp_vectorize = True
+            pass_manager = llvm.create_module_pass_manager()
+            target_machine.add_analysis_passes(pass_manager)
+            pass_manager_builder.populate(pass_manager)
+            pass_manager.run(module)
+        return module
+
+    def compile(self, instructions):
+        # JIT-compile in-process; returns a NeoASMJITProgram
+        target_machine = self.target_machine()
+        module = self.optimized_module(instructions, target_machine)
+        engine = llvm.create_mcjit_compiler(module, target_machine)
+        engine.finalize_object()
+        return NeoASMJITProgram(engine, self)
+
+    def emit_object(self, instructions, stream):
+        # Write a relocatable object file for ahead-of-time linking
+        target_machine = self.target_machine(reloc="pic")
+        data = target_machine.emit_object(self.optimized_module(instructions, target_machine))
+        stream.write(data)
+        return len(data)
+
+    def emit_assembly(self, instructions):
+        target_machine = self.target_machine(reloc="pic")
+        return target_machine.emit_assembly(self.optimized_module(instructions, target_machine))
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+from Instruction_IR import NeoASMInstruction, write_text
+from Machine_Profile import DEFAULT_CPU_ARCHITECTURE, machine_architecture
+from Object_File import (ADDRESS_OPERANDS, ADDRESS_RELOCATION, DATA_SYMBOL, OBJECT_SUFFIX, compile_object,
+                         load_object, source_hash)
+
+
+def _align_up(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+
+class LinkedProgram:
+    __slots__ = ('instructions', 'symbols', 'undefined', 'bases', 'data_size')
+
+    def __init__(self, instructions, symbols, undefined, bases, data_size):
+        self.instructions = instructions  # Every module's relocated instructions, in module order
+        self.symbols = symbols  # Name -> (module, kind, address or None for code symbols)
+        self.undefined = undefined  # Imported name no module exports -> modules importing it
+        self.bases = bases  # Module name -> base address of its data segment
+        self.data_size = data_size
+
+
+class NeoASMLinker:
+    """Link separately compiled modules (see Object_File) into one program.
+
+    Modules are laid out in the order they were added: each module's data
+    segment starts at the next multiple of its alignment, and the address
+    operands listed in its relocations are moved by that base. Imports are
+    resolved through a hash index from every exported name to the module
+    exporting it; a name exported twice is an error, and a name nobody
+    exports is an external endpoint (reported in undefined, an error with
+    strict=True).
+
+    The linker is incremental. The index is updated only for modules whose
+    interface (exports and imports) changed, and a module is relocated
+    again only when its object, its base address or the resolution of one
+    of its imports changed; every other module reuses its instructions from
+    the previous link().
+    """
+
+    def __init__(self, strict=False):
+        self.strict = strict
+        self.modules = {}  # Module name -> NeoASMObject, in link order
+        self.index = {}  # Exported name -> module name
+        self.stats = {}  # Report of the last link()
+        self._indexed = {}  # Module name -> (interface hash, names it has in the index)
+        self._linked = {}  # Module name -> (relink key, relocated instructions)
+
+    def add(self, module):
+        # Add a module, or replace the module of the same name
+        self.modules[module.name] = module
+
+    def remove(self, name):
+        self.modules.pop(name, None)
+        self._linked.pop(name, None)
+
+    def _update_index(self):
+        # Re-index the exports of modules that are new, gone or have a changed interface
+        for name in [name for name in self._indexed if name not in self.modules]:
+            self._unindex(name)
+        for name, module in self.modules.items():
+            interface = module.interface_hash()
+            indexed = self._indexed.get(name)
+            if indexed is not None and indexed[0] == interface:
+                continue
+            self._unindex(name)
+            symbols = []
+            self._indexed[name] = (None, symbols)  # Unusable until fully indexed
+            for symbol in module.exports:
+                owner = self.index.get(symbol)
+                if owner is not None:
+                    self._unindex(name)
+                    raise ValueError(f"Duplicate symbol {symbol}: defined in {owner} and {name}")
+                self.index[symbol] = name
+                symbols.append(symbol)
+            self._indexed[name] = (interface, symbols)
+
+    def _unindex(self, name):
+        _, symbols = self._indexed.pop(name, (None, ()))
+        for symbol in symbols:
+            del self.index[symbol]
+
+    def link(self):
+        started = time.perf_counter()
+        self._update_index()
+
+        undefined = {}
+        for name, module in self.modules.items():
+            for symbol in module.imports:
+                if symbol not in self.index:
+                    undefined.setdefault(symbol, []).append(name)
+        if self.strict and undefined:
+            listed = ", ".join(f"{symbol} (used by {', '.join(users)})" for symbol, users in sorted(undefined.items()))
+            raise ValueError(f"Undefined symbols: {listed}")
+
+        instructions = []
+        bases = {}
+        relinked = 0
+        cursor = 0
+        for name, module in self.modules.items():
+            base = bases[name] = _align_up(cursor, module.alignment)
+            cursor = base + module.data_size
+            key = (module.digest, base, tuple(self.index.get(symbol) for symbol in module.imports))
+            linked = self._linked.get(name)
+            if linked is None or linked[0] != key:
+                linked = self._linked[name] = (key, self._relocate(module, base))
+                relinked += 1
+            instructions.extend(linked[1])
+        for name in [name for name in self._linked if name not in self.modules]:
+            del self._linked[name]
+
+        symbols = {}
+        for symbol, owner in self.index.items():
+            index, kind = self.modules[owner].exports[symbol]
+            address = None
+            if kind == DATA_SYMBOL:
+                address = self._linked[owner][1][index].operand("ALIGNED")
+            symbols[symbol] = (owner, kind, address)
+
+        self.stats = {
+            "modules": len(self.modules),
+            "relinked": relinked,
+            "reused": len(self.modules) - relinked,
+            "symbols": len(symbols),
+            "undefined": len(undefined),
+            "seconds": time.perf_counter() - started,
+        }
+        return LinkedProgram(instructions, symbols, undefined, bases, cursor)
+
+    def _relocate(self, module, base):
+        # The module's instructions with every address operand moved by base;
+        # unrelocated instructions are shared with the object
+        relocated = list(module.instructions)
+        if base:
+            for index, kind, _ in module.relocations:
+                if kind != ADDRESS_RELOCATION:
+                    continue
+                original = module.instructions[index]
+                instruction = NeoASMInstruction(original.opcode, original.name, original.operands, original.defs,
+                                                original.uses, original.context)
+                key = ADDRESS_OPERANDS[original.opcode]
+                instruction.set_operand(key, int(original.operand(key)) + base)
+                relocated[index] = instruction
+        return relocated
+
+
+def object_path(path, object_dir=None):
+    # Next to the source by default. In a shared object directory the name
+    # also carries a hash of the source path, so a/util.neo and b/util.neo
+    # do not overwrite each other's objects.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if not object_dir:
+        return os.path.join(os.path.dirname(path), stem + OBJECT_SUFFIX)
+    tag = hashlib.sha256(os.path.normpath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(object_dir, f"{stem}-{tag}{OBJECT_SUFFIX}")
+
+
+def build_module(path, object_dir=None, cpu_architecture=None, frontend="parser"):
+    # The object of one source file: reused from its object file while the
+    # source and the target are unchanged, else compiled and saved. Returns
+    # (object, compiled).
+    cpu_architecture = cpu_architecture or dict(DEFAULT_CPU_ARCHITECTURE)
+    with open(path, "r", encoding="utf-8") as file:
+        source_code = file.read()
+    target = object_path(path, object_dir)
+    try:
+        module = load_object(target)
+    except (OSError, ValueError):
+        module = None
+    unchanged = (module is not None and module.name == path and module.source_hash == source_hash(source_code)
+                 and module.architecture == cpu_architecture)
+    if unchanged:
+        return module, False
+    module = compile_object(source_code, path, cpu_architecture, frontend)
+    module.save(target)
+    return module, True
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-link", description="Compile NeoASM modules separately and link them.")
+    parser.add_argument("files", nargs="+", help=".neo modules, in link order")
+    parser.add_argument("-o", "--output", required=True, help="linked program to write")
+    parser.add_argument("--object-dir", help="directory for object files (default: next to each source)")
+    parser.add_argument("--frontend", choices=("parser", "analyzer", "table"), default="parser")
+    parser.add_argument("--machine-profile", nargs="?", const="", metavar="PATH",
+                        help="compile for the stored profile of this machine instead of the fixed default")
+    parser.add_argument("--strict", action="store_true", help="fail on imported names no module exports")
+    parser.add_argument("-v", "--verbose", action="store_true", help="report recompiled modules and link statistics")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    if args.object_dir:
+        os.makedirs(args.object_dir, exist_ok=True)
+    linker = NeoASMLinker(strict=args.strict)
+    compiled = []
+    try:
+        cpu_architecture = None
+        if args.machine_profile is not None:
+            cpu_architecture = machine_architecture(args.machine_profile or None)
+        for path in args.files:
+            module, rebuilt = build_module(path, args.object_dir, cpu_architecture, args.frontend)
+            linker.add(module)
+            if rebuilt:
+                compiled.append(path)
+        program = linker.link()
+    except (OSError, SyntaxError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        write_text(program.instructions, file)
+    if args.verbose:
+        print(f"{len(compiled)} of {len(args.files)} modules compiled: {', '.join(compiled) or '-'}", file=sys.stderr)
+        print(f"Linked {linker.stats['modules']} modules, {linker.stats['symbols']} symbols, "
+              f"{program.data_size} B of data; external: {', '.join(sorted(program.undefined)) or '-'}",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
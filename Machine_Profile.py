@@ -0,0 +1,216 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+try:
+    import cpuinfo
+except ImportError:  # py-cpuinfo is optional; /proc and /sys cover Linux hosts
+    cpuinfo = None
+
+PROFILE_FORMAT_VERSION = 1
+PROFILE_ENV = "NEOASM_MACHINE_PROFILE"
+DEFAULT_PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "neoasm", "machine_profile.json")
+DEFAULT_CPU_ARCHITECTURE = {"cache_line_size": 64}  # Used unless a machine profile is asked for
+
+# SIMD extensions recorded in a profile, under the names LLVM uses
+SIMD_FEATURES = ("sse2", "sse4.1", "sse4.2", "avx", "avx2", "fma", "avx512f", "avx512bw", "avx512vl", "neon", "sve")
+_FEATURE_ALIASES = {"sse4_1": "sse4.1", "sse4_2": "sse4.2", "asimd": "neon"}
+
+# Architectural general-purpose registers by machine type
+_REGISTER_COUNTS = {"x86_64": 16, "amd64": 16, "aarch64": 31, "arm64": 31, "riscv64": 31, "ppc64le": 32}
+
+_loaded = {}  # Profile path -> (mtime_ns, cpu_architecture); reread only when the file changes
+
+
+def profile_path(path=None):
+    return path or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE_PATH
+
+
+def _cpu_model():
+    # First model line of /proc/cpuinfo (read in one small chunk), else the machine type
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="replace") as file:
+            head = file.read(8192)
+    except OSError:
+        return platform.machine()
+    for line in head.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() in ("model name", "Hardware", "cpu model", "Model"):
+            return value.strip()
+    return platform.machine()
+
+
+def host_fingerprint():
+    # Cheap identity of the host hardware; a profile is reused while it matches
+    identity = "\0".join((platform.system(), platform.machine(), str(os.cpu_count()), _cpu_model()))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+
+def _parse_cache_size(text):
+    # "48K" -> 49152
+    text = text.strip().upper()
+    scale = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}.get(text[-1:], 1)
+    digits = text.rstrip("KMG")
+    return int(digits) * scale if digits.isdigit() else None
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read().strip()
+
+
+def _sysfs_caches():
+    # {"l1d": size, "l2": size, "l3": size, "line": size} from /sys (Linux)
+    caches = {}
+    for directory in sorted(glob.glob("/sys/devices/system/cpu/cpu0/cache/index*")):
+        try:
+            level = int(_read(os.path.join(directory, "level")))
+            kind = _read(os.path.join(directory, "type"))
+            size = _parse_cache_size(_read(os.path.join(directory, "size")))
+            line = int(_read(os.path.join(directory, "coherency_line_size")))
+        except (OSError, ValueError):
+            continue
+        if kind == "Instruction":
+            continue
+        caches["l1d" if level == 1 else f"l{level}"] = size
+        if level == 1:
+            caches["line"] = line
+    return caches
+
+
+def _physical_cores():
+    cores = set()
+    for directory in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/topology"):
+        try:
+            package = _read(os.path.join(directory, "physical_package_id"))
+            cores.add((package, _read(os.path.join(directory, "core_id"))))
+        except OSError:
+            continue
+    return len(cores) or None
+
+
+def _proc_flags():
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    return value.split()
+    except OSError:
+        pass
+    return []
+
+
+def probe_machine(cpu_info=None, gpu_info=None):
+    # Measure the host (slow: seconds with py-cpuinfo). cpu_info is a
+    # cpuinfo.get_cpu_info() result the caller already has; gpu_info is
+    # free-form text such as lspci output. Returns a profile dict.
+    if cpu_info is None and cpuinfo is not None:
+        cpu_info = cpuinfo.get_cpu_info()
+    cpu_info = cpu_info or {}
+
+    caches = _sysfs_caches()
+    flags = cpu_info.get("flags") or _proc_flags()
+    enabled = {_FEATURE_ALIASES.get(flag, flag) for flag in flags}
+    machine = platform.machine().lower()
+    simd = [feature for feature in SIMD_FEATURES if feature in enabled]
+    if machine in ("aarch64", "arm64") and "neon" not in simd:
+        simd.append("neon")  # Mandatory on 64-bit ARM
+
+    architecture = {
+        "model": str(cpu_info.get("brand_raw") or _cpu_model()),
+        "machine": machine,
+        "cache_line_size": caches.get("line") or cpu_info.get("l2_cache_line_size") or 64,
+        "l1d_cache_size": caches.get("l1d") or cpu_info.get("l1_data_cache_size"),
+        "l2_cache_size": caches.get("l2") or cpu_info.get("l2_cache_size"),
+        "l3_cache_size": caches.get("l3") or cpu_info.get("l3_cache_size"),
+        "cores": _physical_cores() or os.cpu_count(),
+        "threads": os.cpu_count(),
+        "simd": simd,
+        "register_count": _REGISTER_COUNTS.get(machine, 8),
+        "vector_register_count": 32 if "avx512f" in enabled or machine in ("aarch64", "arm64") else 16,
+    }
+    profile = {
+        "format_version": PROFILE_FORMAT_VERSION,
+        "fingerprint": host_fingerprint(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cpu_architecture": architecture,
+    }
+    if gpu_info:
+        profile["gpu"] = gpu_info.strip()
+    return profile
+
+
+def save_machine_profile(profile, path=None):
+    # Write atomically so a compiler never reads a partial profile
+    path = profile_path(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        json.dump(profile, file, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_machine_profile(path=None):
+    # The stored profile if it was written by this format version on this host, else None
+    try:
+        with open(profile_path(path), "r", encoding="utf-8") as file:
+            profile = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(profile, dict) or profile.get("format_version") != PROFILE_FORMAT_VERSION:
+        return None
+    if profile.get("fingerprint") != host_fingerprint():
+        return None
+    return profile
+
+
+def machine_architecture(path=None):
+    # cpu_architecture for the code generator from the stored profile of this
+    # host. Never probes: a missing or stale profile is a ValueError, and
+    # running this module (python Machine_Profile.py) writes a fresh one.
+    path = profile_path(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return dict(cached[1])
+
+    profile = load_machine_profile(path) if mtime is not None else None
+    if profile is None:
+        raise ValueError(f"No machine profile of this host at {path}; run Machine_Profile.py to probe it")
+    architecture = profile["cpu_architecture"]
+    _loaded[path] = (mtime, architecture)
+    return dict(architecture)
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-profile", description="Probe this machine for the NeoASM compiler.")
+    parser.add_argument("--path", default=None,
+                        help=f"profile location (default: ${PROFILE_ENV} or {DEFAULT_PROFILE_PATH})")
+    parser.add_argument("--refresh", action="store_true", help="probe only if the stored profile is missing or stale")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    profile = load_machine_profile(args.path) if args.refresh else None
+    if profile is None:
+        profile = probe_machine()
+        save_machine_profile(profile, args.path)
+    print(json.dumps(profile, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import re
+from bisect import bisect_left, insort
+
+# Storage size in bytes of each declared variable type
+VAR_TYPE_SIZES = {
+    "BOOL": 1,
+    "INT": 4,
+    "FLOAT": 4,
+    "STRING": 16,  # Pointer and length
+    "VECTOR": 32,  # One 256-bit SIMD register
+    "AOT": 8,  # Handle to an AOT block
+}
+DEFAULT_OBJECT_SIZE = 8
+
+# Storage size in bytes of the integer types range analysis narrows INT to
+STORAGE_SIZES = {"u8": 1, "i8": 1, "u16": 2, "i16": 2, "u32": 4, "i32": 4, "u64": 8, "i64": 8}
+
+_SIZE_REGEX = re.compile(r'^\s*(\d+)\s*([KMGT]?)B?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text, default=None):
+    # "1024", "512B", "1KB" -> bytes; default when the size is missing or malformed
+    if text is None:
+        return default
+    match = _SIZE_REGEX.match(str(text))
+    if not match:
+        return default
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
+
+def _align_up(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def _size_class(size):
+    # Smallest power of two that holds size
+    return 1 << max(size - 1, 0).bit_length()
+
+
+class LayoutObject:
+    __slots__ = ('name', 'kind', 'size', 'isolated', 'address')
+
+    def __init__(self, name, kind, size, isolated=False):
+        self.name = name
+        self.kind = kind  # "variable", "map" or "AOT"
+        self.size = size
+        self.isolated = isolated  # Gets cache lines of its own (no false sharing)
+        self.address = None
+
+
+class NeoASMMemoryLayoutPlanner:
+    """Deterministic, cache-aware placement of declared objects.
+
+    Objects of a cache line or larger, and isolated objects, are placed first
+    at line-aligned addresses, each in its own lines. Smaller objects are
+    rounded up to a power-of-two size class and placed largest class first:
+    best fit into the unused tails of large objects, then packed back to back,
+    which never needs padding because every class divides the one before it.
+    Ties are broken by name, so the same program always gets the same layout.
+    """
+
+    def __init__(self, cache_line_size=64):
+        self.cache_line_size = cache_line_size
+        self.objects = {}
+
+    def add(self, name, kind, size, isolated=False):
+        self.objects[name] = LayoutObject(name, kind, max(int(size), 1), isolated)
+
+    def plan(self):
+        line = self.cache_line_size
+        large = []
+        small = []
+        for obj in self.objects.values():
+            if obj.isolated or obj.size >= line:
+                large.append(obj)
+            else:
+                small.append(obj)
+
+        # Step 1: Large and isolated objects, line-aligned, biggest first
+        cursor = 0
+        tails = []  # (free bytes, start address) left at the end of large objects
+        for obj in sorted(large, key=lambda obj: (-obj.size, obj.name)):
+            obj.address = cursor
+            end = cursor + obj.size
+            cursor = _align_up(end, line)
+            if not obj.isolated and cursor > end:
+                insort(tails, (cursor - end, end))
+
+        # Step 2: Small objects by size class, into tails first, then packed
+        for obj in sorted(small, key=lambda obj: (-_size_class(obj.size), obj.name)):
+            slot = _size_class(obj.size)
+            obj.address = self._place_in_tail(tails, slot)
+            if obj.address is None:
+                cursor = _align_up(cursor, slot)
+                obj.address = cursor
+                cursor += slot
+
+        return self.report(_align_up(cursor, line))
+
+    def _place_in_tail(self, tails, slot):
+        # Best fit: the tail with the least free space that still holds the slot
+        index = bisect_left(tails, (slot, -1))
+        while index < len(tails):
+            free, start = tails[index]
+            address = _align_up(start, slot)
+            remaining = start + free - (address + slot)
+            if remaining >= 0:
+                del tails[index]
+                if address > start:
+                    insort(tails, (address - start, start))
+                if remaining:
+                    insort(tails, (remaining, address + slot))
+                return address
+            index += 1
+        return None
+
+    def report(self, total_bytes):
+        used_bytes = sum(obj.size for obj in self.objects.values())
+        return {
+            "cache_line_size": self.cache_line_size,
+            "total_bytes": total_bytes,
+            "used_bytes": used_bytes,
+            "wasted_bytes": total_bytes - used_bytes,
+            "objects": [
+                {"name": obj.name, "kind": obj.kind, "size": obj.size,
+                 "address": obj.address, "isolated": obj.isolated}
+                for obj in sorted(self.objects.values(), key=lambda obj: (obj.address, obj.name))
+            ],
+        }
+
+    def addresses(self):
+        return {name: obj.address for name, obj in self.objects.items()}
+
+
+def format_layout_report(report):
+    lines = [
+        f"Memory layout (cache line {report['cache_line_size']} B): "
+        f"{report['total_bytes']} B total, {report['used_bytes']} B used, {report['wasted_bytes']} B wasted"
+    ]
+    for obj in report["objects"]:
+        flag = " isolated" if obj["isolated"] else ""
+        lines.append(f"  {obj['address']:>8}  {obj['size']:>8} B  {obj['kind']:<8} {obj['name']}{flag}")
+    return "\n".join(lines)
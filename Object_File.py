@@ -0,0 +1,193 @@
+import hashlib
+import io
+import json
+import struct
+
+from Code_Generator import NeoASMCodeGeneratorOptimized
+from Compiler_Driver import parse_source
+from Instruction_IR import Opcode, read_binary, write_binary
+
+# Object files: one separately compiled module. An object holds the module's
+# instructions with addresses relative to its own data segment, the symbols
+# it exports and imports (names interned in one string table) and
+# relocation entries telling the linker which operands hold segment
+# addresses and which instructions refer to which symbols.
+
+OBJECT_MAGIC = b'NEOO'
+OBJECT_FORMAT_VERSION = 2  # 2: maps define their destination, named vec_ operations their name
+OBJECT_SUFFIX = ".nobj"
+
+# Declarations export data symbols (they own storage in the data segment);
+# named operations export code symbols that exec and link can refer to
+DATA_SYMBOL_OPCODES = (Opcode.VAR, Opcode.MAP, Opcode.AOT)
+CODE_SYMBOL_OPCODES = (Opcode.VEC, Opcode.STR_MAP, Opcode.EXEC, Opcode.LINK, Opcode.PACKET)
+DATA_SYMBOL, CODE_SYMBOL = 0, 1
+
+# Operands holding an address inside the module's data segment
+ADDRESS_OPERANDS = {Opcode.VAR: "ALIGNED", Opcode.MAP: "ALIGNED", Opcode.AOT: "ALIGNED",
+                    Opcode.SPILL: "ADDRESS", Opcode.RELOAD: "ADDRESS"}
+ADDRESS_RELOCATION, SYMBOL_RELOCATION = 0, 1
+
+# magic, version, reserved, data alignment, data size, string, export,
+# import and relocation counts, then the string ids of the module name, the
+# source hash and the cpu_architecture (JSON) it was compiled for
+_HEADER = struct.Struct('<4sHHIQIIIIIII')
+_STRING = struct.Struct('<I')  # byte length
+_EXPORT = struct.Struct('<IIB')  # name id, instruction index, symbol kind
+_IMPORT = struct.Struct('<I')  # name id
+_RELOCATION = struct.Struct('<IBI')  # instruction index, relocation kind, name id (0 for addresses)
+
+
+def source_hash(source_code):
+    return hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+
+
+class NeoASMObject:
+    """A separately compiled module: instructions, symbol tables and relocations.
+
+    exports maps each name the module defines to (instruction index, kind),
+    kind being DATA_SYMBOL or CODE_SYMBOL. imports lists the names the module
+    uses without defining them; the linker resolves them against the
+    exports of the other modules, and names no module exports are external
+    endpoints (RAM, GPU...). relocations are (instruction index, kind, name)
+    entries: ADDRESS_RELOCATION marks an address operand to be moved by the
+    module's base address, SYMBOL_RELOCATION an imported name the
+    instruction refers to.
+    """
+
+    def __init__(self, name, instructions, data_size, alignment=64, source_hash=None, architecture=None):
+        self.name = name
+        self.instructions = instructions
+        self.data_size = data_size  # Bytes of the module's data segment
+        self.alignment = alignment  # Its required base alignment (the cache line)
+        self.source_hash = source_hash
+        self.architecture = architecture  # cpu_architecture it was compiled for
+        self.exports = {}
+        self.imports = []
+        self.relocations = []
+        self._digest = None
+        self._build_tables()
+
+    def _build_tables(self):
+        for index, instruction in enumerate(self.instructions):
+            if instruction.opcode in DATA_SYMBOL_OPCODES:
+                self.exports.setdefault(instruction.name, (index, DATA_SYMBOL))
+            elif instruction.opcode in CODE_SYMBOL_OPCODES:
+                # Unnamed vec_ operations are named after their operation; they are not symbols
+                if not (instruction.opcode == Opcode.VEC and instruction.name == instruction.operand("TYPE")):
+                    self.exports.setdefault(instruction.name, (index, CODE_SYMBOL))
+
+        imports = set()
+        for index, instruction in enumerate(self.instructions):
+            if ADDRESS_OPERANDS.get(instruction.opcode) in dict(instruction.operands):
+                self.relocations.append((index, ADDRESS_RELOCATION, None))
+            for name in dict.fromkeys(instruction.uses):
+                if name not in self.exports:
+                    imports.add(name)
+                    self.relocations.append((index, SYMBOL_RELOCATION, name))
+        self.imports = sorted(imports)
+
+    def interface_hash(self):
+        # What other modules see of this one: the names it exports (and their
+        # kinds) and the names it imports
+        interface = json.dumps([sorted((name, kind) for name, (_, kind) in self.exports.items()), self.imports])
+        return hashlib.sha256(interface.encode("utf-8")).hexdigest()
+
+    @property
+    def digest(self):
+        # Hash of the serialized object; changes whenever anything in it does
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.to_bytes()).hexdigest()
+        return self._digest
+
+    def to_bytes(self):
+        stream = io.BytesIO()
+        self.write(stream)
+        return stream.getvalue()
+
+    def write(self, stream):
+        strings = {}  # Interned string -> id; 0 means absent
+
+        def string_id(value):
+            if value is None:
+                return 0
+            return strings.setdefault(value, len(strings) + 1)
+
+        meta = (string_id(self.name), string_id(self.source_hash),
+                string_id(json.dumps(self.architecture, sort_keys=True) if self.architecture is not None else None))
+        exports = [_EXPORT.pack(string_id(name), index, kind) for name, (index, kind) in self.exports.items()]
+        imports = [_IMPORT.pack(string_id(name)) for name in self.imports]
+        relocations = [_RELOCATION.pack(index, kind, string_id(name)) for index, kind, name in self.relocations]
+
+        stream.write(_HEADER.pack(OBJECT_MAGIC, OBJECT_FORMAT_VERSION, 0, self.alignment, self.data_size,
+                                  len(strings), len(exports), len(imports), len(relocations), *meta))
+        for value in strings:
+            encoded = value.encode("utf-8")
+            stream.write(_STRING.pack(len(encoded)))
+            stream.write(encoded)
+        stream.write(b"".join(exports + imports + relocations))
+        write_binary(self.instructions, stream)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+
+def read_object(stream):
+    # The NeoASMObject serialized by NeoASMObject.write(); ValueError when
+    # the stream is not an object of this format version
+    def read_exact(size):
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated object file")
+        return data
+
+    (magic, version, _, alignment, data_size, string_count, export_count, import_count, relocation_count,
+     name_id, hash_id, architecture_id) = _HEADER.unpack(read_exact(_HEADER.size))
+    if magic != OBJECT_MAGIC:
+        raise ValueError("Not a NeoASM object file")
+    if version != OBJECT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported object file version {version}")
+
+    strings = [None]
+    for _ in range(string_count):
+        (length,) = _STRING.unpack(read_exact(_STRING.size))
+        strings.append(read_exact(length).decode("utf-8"))
+    try:
+        exports = {strings[name]: (index, kind)
+                   for name, index, kind in _EXPORT.iter_unpack(read_exact(_EXPORT.size * export_count))}
+        imports = [strings[name] for (name,) in _IMPORT.iter_unpack(read_exact(_IMPORT.size * import_count))]
+        relocations = [(index, kind, strings[name]) for index, kind, name
+                       in _RELOCATION.iter_unpack(read_exact(_RELOCATION.size * relocation_count))]
+        name, hash_value, architecture = strings[name_id], strings[hash_id], strings[architecture_id]
+    except IndexError:
+        raise ValueError("Corrupt object file symbol table") from None
+
+    module = NeoASMObject.__new__(NeoASMObject)
+    module.name = name
+    module.instructions = list(read_binary(stream))
+    module.data_size = data_size
+    module.alignment = alignment
+    module.source_hash = hash_value
+    module.architecture = json.loads(architecture) if architecture is not None else None
+    module.exports = exports
+    module.imports = imports
+    module.relocations = relocations
+    module._digest = None
+    return module
+
+
+def load_object(path):
+    with open(path, "rb") as file:
+        return read_object(file)
+
+
+def compile_object(source_code, name, cpu_architecture=None, frontend="parser"):
+    # Compile one module to an object. No optimization passes run: they
+    # assume they see the whole program, and other modules may use any of
+    # this module's declarations.
+    generator = NeoASMCodeGeneratorOptimized(cpu_architecture)
+    instructions = generator.build_instructions(parse_source(source_code, frontend))
+    return NeoASMObject(name, instructions, generator.layout_report["total_bytes"],
+                        generator.cpu_architecture["cache_line_size"], source_hash(source_code),
+                        generator.cpu_architecture)
@@ -0,0 +1,249 @@
+import heapq
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+from Instruction_IR import Opcode
+from Memory_Layout import parse_size
+
+# Dispatch order of the pkt priority: operand; lower runs first. Unknown
+# priorities run after RAM.
+PRIORITY_LEVELS = {"L1": 0, "L2": 1, "L3": 2, "RAM": 3}
+UNKNOWN_PRIORITY = len(PRIORITY_LEVELS)
+
+_attached_segments = {}  # Shared memory segments opened by this (worker) process, oldest first
+_MAX_ATTACHED_SEGMENTS = 8
+
+
+def priority_rank(priority):
+    # "L1_cache", "l2", "RAM" -> dispatch rank
+    level = str(priority or "").upper()
+    if level.endswith("_CACHE"):
+        level = level[:-len("_CACHE")]
+    return PRIORITY_LEVELS.get(level, UNKNOWN_PRIORITY)
+
+
+class PacketSpec:
+    __slots__ = ('name', 'size', 'exec_target', 'priority')
+
+    def __init__(self, name, size, exec_target, priority):
+        self.name = name
+        self.size = size  # Packet size in bytes
+        self.exec_target = exec_target  # Name of the handler that processes each packet
+        self.priority = priority
+
+
+class PacketRecord:
+    __slots__ = ('packet', 'index', 'start', 'stop', 'rank', 'queue_depth', 'enqueued', 'started', 'finished')
+
+    def __init__(self, packet, index, start, stop, rank, enqueued):
+        self.packet = packet
+        self.index = index  # Position of the packet within its stream
+        self.start = start  # Byte range of the packet in the stream
+        self.stop = stop
+        self.rank = rank
+        self.queue_depth = None  # Packets still queued when this one was dispatched
+        self.enqueued = enqueued  # time.perf_counter() timestamps
+        self.started = None
+        self.finished = None
+
+
+def _run_in_thread(handler, view, index):
+    started = time.perf_counter()
+    result = handler(view, index)
+    return result, started, time.perf_counter()
+
+
+def _run_in_process(handler, segment_name, start, stop, index):
+    # Workers keep segments attached, so each is mapped once per process
+    segment = _attached_segments.get(segment_name)
+    if segment is None:
+        while len(_attached_segments) >= _MAX_ATTACHED_SEGMENTS:
+            oldest = _attached_segments.pop(next(iter(_attached_segments)))
+            try:
+                oldest.close()
+            except BufferError:
+                pass  # A handler still holds a view; the mapping goes when it does
+        segment = _attached_segments[segment_name] = shared_memory.SharedMemory(name=segment_name)
+    started = time.perf_counter()
+    result = handler(segment.buf[start:stop], index)
+    return result, started, time.perf_counter()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class NeoASMPacketRuntime:
+    """Run pkt declarations: split a data stream into packets and process them on a pool.
+
+    Data submitted for a pkt is cut into packets of its size: bytes.
+    Packets are never copied. Each one is a memoryview slice of the
+    submitted buffer, or with use_processes of a shared memory segment that
+    the stream is placed in once. run() dispatches every queued packet to a
+    thread or process pool. Lower priority: levels go first
+    (L1_cache < L2_cache < L3_cache < RAM), and packets of equal priority go
+    in submission order. At most max_in_flight packets are outstanding at a
+    time, so a high-priority packet never waits behind a long backlog that
+    was already handed to the pool. A handler is called as
+    handler(packet_view, packet_index) and may modify the packet in place.
+    With use_processes the handler must be picklable, and its writes reach
+    the caller only when the stream was submitted as a SharedMemory.
+
+    Each packet records the times it was queued, started and finished, and
+    how many packets were still queued when it was dispatched; metrics()
+    summarizes them.
+    """
+
+    def __init__(self, handlers=None, max_workers=None, use_processes=False, max_in_flight=None):
+        self.handlers = dict(handlers or {})  # exec target -> handler
+        self.packets = {}  # pkt name -> PacketSpec
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.records = []  # PacketRecord of every packet run so far
+        self._queue = []  # (rank, sequence, record, handler, payload)
+        self._sequence = 0
+        self._segments = []  # Shared memory segments created for queued streams
+        self._executor = None
+
+    def register(self, exec_target, handler):
+        self.handlers[exec_target] = handler
+
+    def declare(self, name, size, exec_target, priority):
+        size = parse_size(size)
+        if not size or size < 1:
+            raise ValueError(f"Packet {name} needs a positive size")
+        self.packets[name] = PacketSpec(name, size, exec_target, priority)
+
+    def load(self, instructions):
+        # Declare every PACKET instruction of a generated program
+        for instruction in instructions:
+            if instruction.opcode == Opcode.PACKET:
+                self.declare(instruction.name, instruction.operand("SIZE"), instruction.operand("EXEC"),
+                             instruction.operand("PRIORITY"))
+
+    def submit(self, packet_name, data):
+        # Queue data (bytes-like, mmap or SharedMemory) for a declared pkt;
+        # returns the number of packets queued
+        spec = self.packets.get(packet_name)
+        if spec is None:
+            raise KeyError(f"Undeclared packet {packet_name}")
+        handler = self.handlers.get(spec.exec_target)
+        if handler is None:
+            raise ValueError(f"No handler registered for {spec.exec_target} (packet {packet_name})")
+
+        if isinstance(data, shared_memory.SharedMemory):
+            segment, view = data, data.buf
+        else:
+            view = memoryview(data).cast("B")
+            segment = None
+            if self.use_processes:
+                segment = shared_memory.SharedMemory(create=True, size=max(len(view), 1))
+                segment.buf[:len(view)] = view
+                self._segments.append(segment)
+
+        rank = priority_rank(spec.priority)
+        enqueued = time.perf_counter()
+        count = 0
+        for index, start in enumerate(range(0, len(view), spec.size)):
+            stop = min(start + spec.size, len(view))
+            record = PacketRecord(packet_name, index, start, stop, rank, enqueued)
+            payload = (segment.name, start, stop) if self.use_processes else view[start:stop]
+            heapq.heappush(self._queue, (rank, self._sequence, record, handler, payload))
+            self._sequence += 1
+            count += 1
+        return count
+
+    def run(self):
+        # Process every queued packet; returns {pkt name: [handler results in packet order]}
+        results = {}
+        in_flight = {}
+        executor = self.executor()
+        try:
+            while self._queue or in_flight:
+                while self._queue and len(in_flight) < self.max_in_flight:
+                    _, _, record, handler, payload = heapq.heappop(self._queue)
+                    record.queue_depth = len(self._queue)
+                    if self.use_processes:
+                        future = executor.submit(_run_in_process, handler, *payload, record.index)
+                    else:
+                        future = executor.submit(_run_in_thread, handler, payload, record.index)
+                    in_flight[future] = record
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = in_flight.pop(future)
+                    result, record.started, record.finished = future.result()
+                    results.setdefault(record.packet, {})[record.index] = result
+                    self.records.append(record)
+        except BaseException:
+            self._queue = []  # Queued packets may refer to segments released below
+            raise
+        finally:
+            if in_flight:
+                wait(in_flight)
+            self._release_segments()
+        return {name: [by_index[index] for index in sorted(by_index)] for name, by_index in results.items()}
+
+    def run_packet(self, packet_name, data):
+        self.submit(packet_name, data)
+        return self.run().get(packet_name, [])
+
+    def metrics(self):
+        # Latency is queued -> finished, wait is queued -> started, service is started -> finished (seconds)
+        def summary(values):
+            values = sorted(values)
+            return {
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p50": _percentile(values, 0.5),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1] if values else 0.0,
+            }
+
+        depths = [record.queue_depth for record in self.records]
+        by_priority = {}
+        for record in self.records:
+            by_priority[record.rank] = by_priority.get(record.rank, 0) + 1
+        levels = {rank: level for level, rank in PRIORITY_LEVELS.items()}
+        return {
+            "packets": len(self.records),
+            "bytes": sum(record.stop - record.start for record in self.records),
+            "max_queue_depth": max(depths, default=0),
+            "mean_queue_depth": sum(depths) / len(depths) if depths else 0.0,
+            "latency": summary(record.finished - record.enqueued for record in self.records),
+            "wait": summary(record.started - record.enqueued for record in self.records),
+            "service": summary(record.finished - record.started for record in self.records),
+            "by_priority": {levels.get(rank, "OTHER"): count for rank, count in sorted(by_priority.items())},
+        }
+
+    def reset_metrics(self):
+        self.records = []
+
+    def executor(self):
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.max_workers)
+        return self._executor
+
+    def _release_segments(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def close(self):
+        self._queue = []
+        self._release_segments()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
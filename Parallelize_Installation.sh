@@ -1,11 +1,5 @@
-# Installing dependencies in parallel (Linux/macOS example)
-DEPENDENCIES=(
-  "llvm"
-  "python3"
-  "git"
-  "make"
-  "build-essential"
-)
-
-# Run in parallel
-echo "${DEPENDENCIES[@]}" | xargs -n 1 -P 4 sudo apt-get install -y
+# Install NeoASM and its dependencies with independent steps running in parallel
+# (Linux/macOS example). Installer.py runs the steps as a dependency graph,
+# skips steps a previous run finished, and takes packages from the local
+# artifact cache (neoasm_cache/ or $NEOASM_ARTIFACT_CACHE) when it exists.
+cd "$(dirname "$0")" && python3 Installer.py --jobs 4 "$@"
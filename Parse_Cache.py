@@ -0,0 +1,187 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+from AST_Nodes import NeoASMNodeArena
+from Parser import NeoASMParser, tokenize_source
+from Profiler import count
+from Syntax_analyser import NeoASMSyntaxAnalyzer
+from Table_Parser import NeoASMTableParser
+
+COMPILER_VERSION = "1.2"  # Part of every cache key; bump to invalidate old entries
+CACHE_SUFFIX = ".neoc"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "neoasm", "parse")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _analyzer_frontend(source_code):
+    analyzer = NeoASMSyntaxAnalyzer()
+    analyzer.tokenize(source_code)
+    return analyzer.parse()
+
+
+def _parser_frontend(source_code):
+    return NeoASMParser(tokenize_source(source_code)).parse()
+
+
+def _table_frontend(source_code):
+    return NeoASMTableParser().parse(source_code)
+
+
+# Frontend name -> function from source text to AST
+FRONTEND_PARSERS = {"parser": _parser_frontend, "analyzer": _analyzer_frontend, "table": _table_frontend}
+
+_open_caches = {}  # Cache directory -> NeoASMParseCache shared by this process
+
+
+def open_parse_cache(cache_dir=DEFAULT_CACHE_DIR):
+    # The cache of cache_dir for this process; workers open it by name, so
+    # the directory scan for eviction happens once per process, not per task
+    cache = _open_caches.get(cache_dir)
+    if cache is None:
+        cache = _open_caches[cache_dir] = NeoASMParseCache(cache_dir)
+    return cache
+
+
+class NeoASMParseCache:
+    """Content-addressed on-disk cache of parsed ASTs.
+
+    Entries are .neoc files named after a hash of the frontend name, the
+    compiler version and the source. Each file holds a NeoASMNodeArena image;
+    a hit maps it read-only and returns the arena without lexing or parsing.
+    The directory is kept under max_bytes by evicting the least recently used
+    entries (entry mtimes are bumped on every hit).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._sizes = None  # Entry path -> size in bytes, scanned lazily
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, frontend, source):
+        # Hash the frontend name and compiler version together with the source
+        digest = hashlib.sha256()
+        digest.update(frontend.encode("utf-8") + b"\0")
+        digest.update(COMPILER_VERSION.encode("utf-8") + b"\0")
+        digest.update(source if isinstance(source, bytes) else source.encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def parse_source(self, source_code, frontend="parser"):
+        # Source text -> AST through one of FRONTEND_PARSERS; a hit skips
+        # lexing as well as parsing
+        parse = FRONTEND_PARSERS.get(frontend)
+        if parse is None:
+            raise ValueError(f"Unknown frontend: {frontend}")
+        return self.get_or_parse(frontend, source_code, lambda: parse(source_code))
+
+    def get_or_parse(self, frontend, source, parse):
+        # Return the cached AST for source, or run parse() and store its result
+        key = self.cache_key(frontend, source)
+        cached = self.load(key)
+        if cached is not None:
+            self.hits += 1
+            count("parse_cache.hits")
+            return cached
+
+        self.misses += 1
+        count("parse_cache.misses")
+        ast = parse()
+        self.store(key, ast)
+        return ast
+
+    def load(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                image = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        try:
+            arena = NeoASMNodeArena.from_buffer(image)
+        except (ValueError, TypeError, struct.error):
+            # Truncated or stale entry: drop it and treat as a miss
+            self._remove(path)
+            return None
+
+        os.utime(path)  # Mark as most recently used
+        return arena
+
+    def store(self, key, ast):
+        image = NeoASMNodeArena.from_nodes(ast).to_bytes()
+        path = self.entry_path(key)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(image)
+        os.replace(temp_path, path)
+
+        self.stores += 1
+        self._entry_sizes()[path] = len(image)
+        self._evict()
+
+    def _entry_sizes(self):
+        if self._sizes is None:
+            self._sizes = {}
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(CACHE_SUFFIX):
+                    self._sizes[entry.path] = entry.stat().st_size
+        return self._sizes
+
+    def _evict(self):
+        sizes = self._entry_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(path):
+            try:
+                return os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                return 0
+
+        for path in sorted(sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[path]
+            self._remove(path)
+            self.evictions += 1
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self._sizes is not None:
+            self._sizes.pop(path, None)
+
+    def clear(self):
+        for path in list(self._entry_sizes()):
+            self._remove(path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(self._entry_sizes()),
+            "bytes": sum(self._entry_sizes().values()),
+            "max_bytes": self.max_bytes,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.stores = self.evictions = 0
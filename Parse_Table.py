@@ -0,0 +1,463 @@
+# Generated by Parser_Generator.py from Grammar.bnf. Do not edit; regenerate instead.
+
+GRAMMAR_HASH = '83198f1b4c63eac13cbf2220dfc4547c69f2c0929d302ab94e33e10facc59f80'
+TERMINALS = (
+    '$end',
+    '$error',
+    '<string>',
+    '<key>',
+    '<range>',
+    '<memory_size>',
+    '<number>',
+    '<identifier>',
+    '<punctuation>',
+    '"frame"',
+    '"{"',
+    '"}"',
+    '","',
+    '"map"',
+    '":"',
+    '"var"',
+    '"range:"',
+    '"check:"',
+    '"INT"',
+    '"FLOAT"',
+    '"STRING"',
+    '"VECTOR"',
+    '"BOOL"',
+    '"AOT"',
+    '"rigid"',
+    '"soft"',
+    '"size:"',
+    '"STATIC"',
+    '"SOFT"',
+    '"RIGID"',
+    '"PRELINK"',
+    '"pkt"',
+    '"exec:"',
+    '"priority:"',
+    '"vec_mul"',
+    '"vec_add"',
+    '"vec_sub"',
+    '"vec_div"',
+    '"vec_dot"',
+    '"vec_cross"',
+    '"in:"',
+    '"out:"',
+    '"op:"',
+    '"device:"',
+    '"str_map"',
+    '"exec"',
+    '"link:"',
+    '"validate"',
+    '"rule:"',
+    '"link"',
+    '"src:"',
+    '"dst:"',
+)
+NONTERMINALS = (
+    'statement*',
+    'program',
+    'statement',
+    'frame',
+    '","?',
+    'map_declaration.1',
+    'map_declaration.1*',
+    'map_declaration',
+    'map_entry',
+    'variable_declaration.1',
+    'variable_declaration.1*',
+    'variable_declaration',
+    'variable_attribute',
+    'type',
+    'check_type',
+    'AOT_declaration.1',
+    'AOT_declaration.1*',
+    'AOT_declaration',
+    'AOT_attribute',
+    'AOT_kind',
+    'packetized_execution.1',
+    'packetized_execution.1*',
+    'packetized_execution',
+    'packet_attribute',
+    'identifier?',
+    'simd_operation.1',
+    'simd_operation.1*',
+    'simd_operation',
+    'simd_type',
+    'operation_attribute',
+    'operands',
+    'str_map_operation.1',
+    'str_map_operation.1*',
+    'str_map_operation',
+    'exec_operation.1',
+    'exec_operation.1*',
+    'exec_operation',
+    'exec_attribute',
+    'validate_operation.1',
+    'validate_operation.1*',
+    'validate_operation',
+    'validate_attribute',
+    'link_operation.1',
+    'link_operation.1*',
+    'link_operation',
+    'link_attribute',
+    'size',
+    'value',
+)
+ACTIONS = (
+    'frame',
+    'map',
+    'variable',
+    'AOT',
+    'packet',
+    'simd',
+    'str_map',
+    'exec',
+    'validate',
+    'link',
+)
+START = 53
+MARK = 100
+TOKEN_PATTERN = '(?:\\s+|//[^\\n]*)*+("(?:[^"\\\\\\n]|\\\\.)*"|[A-Za-z_][A-Za-z0-9_]*[ \\t]*:|[0-9]+\\.\\.[0-9]+|[0-9]+[KMGT]?B\\b|[0-9]+|[A-Za-z_][A-Za-z0-9_]*|[{}()\\[\\],;=:]|\\S|$)'
+TOKEN_CLASSES = (
+    ('"(?:[^"\\\\\\n]|\\\\.)*"', 2),
+    ('[A-Za-z_][A-Za-z0-9_]*[ \\t]*:', 3),
+    ('[0-9]+\\.\\.[0-9]+', 4),
+    ('[0-9]+[KMGT]?B\\b', 5),
+    ('[0-9]+', 6),
+    ('[A-Za-z_][A-Za-z0-9_]*', 7),
+    ('[{}()\\[\\],;=:]', 8),
+)
+LITERALS = {
+    'frame': 9,
+    '{': 10,
+    '}': 11,
+    ',': 12,
+    'map': 13,
+    ':': 14,
+    'var': 15,
+    'range:': 16,
+    'check:': 17,
+    'INT': 18,
+    'FLOAT': 19,
+    'STRING': 20,
+    'VECTOR': 21,
+    'BOOL': 22,
+    'AOT': 23,
+    'rigid': 24,
+    'soft': 25,
+    'size:': 26,
+    'STATIC': 27,
+    'SOFT': 28,
+    'RIGID': 29,
+    'PRELINK': 30,
+    'pkt': 31,
+    'exec:': 32,
+    'priority:': 33,
+    'vec_mul': 34,
+    'vec_add': 35,
+    'vec_sub': 36,
+    'vec_div': 37,
+    'vec_dot': 38,
+    'vec_cross': 39,
+    'in:': 40,
+    'out:': 41,
+    'op:': 42,
+    'device:': 43,
+    'str_map': 44,
+    'exec': 45,
+    'link:': 46,
+    'validate': 47,
+    'rule:': 48,
+    'link': 49,
+    'src:': 50,
+    'dst:': 51,
+}
+FALLBACK = (
+    0,
+    1,
+    2,
+    3,
+    4,
+    5,
+    6,
+    7,
+    8,
+    7,
+    8,
+    8,
+    8,
+    7,
+    8,
+    7,
+    3,
+    3,
+    7,
+    7,
+    7,
+    7,
+    7,
+    7,
+    7,
+    7,
+    3,
+    7,
+    7,
+    7,
+    7,
+    7,
+    3,
+    3,
+    7,
+    7,
+    7,
+    7,
+    7,
+    7,
+    3,
+    3,
+    3,
+    3,
+    7,
+    7,
+    3,
+    7,
+    3,
+    7,
+    3,
+    3,
+)
+ENTRIES = (
+    (0, 0, ()),
+    (1, 1, (52, 101, 11, 52, 10, 7)),
+    (1, 1, (52, 102, 11, 58, 10, 7)),
+    (1, 1, (52, 103, 11, 62, 10, 7, 65)),
+    (1, 1, (52, 104, 11, 68, 10, 7)),
+    (1, 1, (52, 105, 11, 73, 10, 7)),
+    (1, 1, (52, 106, 11, 78, 10, 76)),
+    (1, 1, (52, 107, 11, 84, 10, 7)),
+    (1, 1, (52, 108, 11, 87, 10, 7)),
+    (1, 1, (52, 109, 11, 91, 10, 7)),
+    (1, 1, (52, 110, 11, 95, 10, 7)),
+    (1, 1, (101, 11, 52, 10, 7)),
+    (1, 1, (102, 11, 58, 10, 7)),
+    (1, 1, (103, 11, 62, 10, 7, 65)),
+    (1, 1, (104, 11, 68, 10, 7)),
+    (1, 1, (105, 11, 73, 10, 7)),
+    (1, 1, (106, 11, 78, 10, 76)),
+    (1, 1, (107, 11, 84, 10, 7)),
+    (1, 1, (108, 11, 87, 10, 7)),
+    (1, 1, (109, 11, 91, 10, 7)),
+    (1, 1, (110, 11, 95, 10, 7)),
+    (1, 0, ()),
+    (1, 0, (56, 99)),
+    (1, 0, (56, 99, 14)),
+    (1, 0, (58, 56, 99)),
+    (1, 0, (58, 56, 99, 14)),
+    (1, 0, (99,)),
+    (1, 0, (99, 14)),
+    (1, 0, (56, 4)),
+    (1, 0, (56, 66)),
+    (1, 0, (62, 56, 4)),
+    (1, 0, (62, 56, 66)),
+    (1, 0, (4,)),
+    (1, 0, (66,)),
+    (1, 0, (56, 98)),
+    (1, 0, (56,)),
+    (1, 0, (68, 56, 98)),
+    (1, 0, (68, 56)),
+    (1, 0, (98,)),
+    (1, 0, (56, 7)),
+    (1, 0, (73, 56, 98)),
+    (1, 0, (73, 56, 7)),
+    (1, 0, (7,)),
+    (1, 0, (56, 82)),
+    (1, 0, (78, 56, 82)),
+    (1, 0, (78, 56, 7)),
+    (1, 0, (78, 56, 99)),
+    (1, 0, (82,)),
+    (1, 0, (84, 56, 82)),
+    (1, 0, (84, 56, 7)),
+    (1, 0, (84, 56, 99)),
+    (1, 0, (87, 56, 98)),
+    (1, 0, (87, 56, 99)),
+    (1, 0, (87, 56, 7)),
+    (1, 0, (91, 56, 99)),
+    (1, 0, (95, 56, 7)),
+)
+TABLE = (
+    # statement*
+    0, -1, -1, -1, -1, -1, -1, -1, -1, 1, -1, 0, -1, 2, -1, 3, -1, -1, -1, -1, -1, -1, -1, 4, -1, -1, -1, -1, -1,
+    -1, -1, 5, -1, -1, 6, 6, 6, 6, 6, 6, -1, -1, -1, -1, 7, 8, -1, 9, -1, 10, -1, -1,
+    # program
+    0, -1, -1, -1, -1, -1, -1, -1, -1, 1, -1, -1, -1, 2, -1, 3, -1, -1, -1, -1, -1, -1, -1, 4, -1, -1, -1, -1, -1,
+    -1, -1, 5, -1, -1, 6, 6, 6, 6, 6, 6, -1, -1, -1, -1, 7, 8, -1, 9, -1, 10, -1, -1,
+    # statement
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, 11, -1, -1, -1, 12, -1, 13, -1, -1, -1, -1, -1, -1, -1, 14, -1, -1, -1, -1,
+    -1, -1, -1, 15, -1, -1, 16, 16, 16, 16, 16, 16, -1, -1, -1, -1, 17, 18, -1, 19, -1, 20, -1, -1,
+    # frame
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, 11, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # ","?
+    -1, -1, -1, 0, -1, -1, -1, 0, -1, -1, -1, 0, 21, -1, -1, -1, 0, 0, -1, -1, -1, -1, -1, -1, -1, -1, 0, 0, 0, 0,
+    0, -1, 0, 0, -1, -1, -1, -1, -1, -1, 0, 0, 0, 0, -1, -1, 0, -1, 0, -1, 0, 0,
+    # map_declaration.1
+    -1, -1, -1, 22, -1, -1, -1, 23, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # map_declaration.1*
+    -1, -1, -1, 24, -1, -1, -1, 25, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # map_declaration
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 12, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # map_entry
+    -1, -1, -1, 26, -1, -1, -1, 27, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # variable_declaration.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 28, 29, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # variable_declaration.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, 30, 31, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # variable_declaration
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 13, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # variable_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 32, 33, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # type
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 21, 21, 21, 21, 21, 21, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # check_type
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 21, 21, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # AOT_declaration.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 34, 35,
+    35, 35, 35, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # AOT_declaration.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 36, 37,
+    37, 37, 37, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # AOT_declaration
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 14, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # AOT_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 38, 21,
+    21, 21, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # AOT_kind
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 21,
+    21, 21, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # packetized_execution.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 34, -1,
+    -1, -1, -1, -1, 39, 39, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # packetized_execution.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 40, -1,
+    -1, -1, -1, -1, 41, 41, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # packetized_execution
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, 15, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # packet_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 38, -1,
+    -1, -1, -1, -1, 42, 42, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # identifier?
+    -1, -1, -1, -1, -1, -1, -1, 21, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # simd_operation.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 43, 39, 22, 39, -1, -1, -1, -1, -1, -1, -1, -1,
+    # simd_operation.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 44, 45, 46, 45, -1, -1, -1, -1, -1, -1, -1, -1,
+    # simd_operation
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, 16, 16, 16, 16, 16, 16, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # simd_type
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, 21, 21, 21, 21, 21, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # operation_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 47, 42, 26, 42, -1, -1, -1, -1, -1, -1, -1, -1,
+    # operands
+    -1, -1, 21, -1, -1, -1, -1, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # str_map_operation.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 43, 39, 22, 39, -1, -1, -1, -1, -1, -1, -1, -1,
+    # str_map_operation.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 48, 49, 50, 49, -1, -1, -1, -1, -1, -1, -1, -1,
+    # str_map_operation
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 17, -1, -1, -1, -1, -1, -1, -1,
+    # exec_operation.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 34, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 22, 39, -1, -1, 39, -1, -1, -1, -1, -1,
+    # exec_operation.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 51, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 52, 53, -1, -1, 53, -1, -1, -1, -1, -1,
+    # exec_operation
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 18, -1, -1, -1, -1, -1, -1,
+    # exec_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 38, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 26, 42, -1, -1, 42, -1, -1, -1, -1, -1,
+    # validate_operation.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 22, -1, -1, -1,
+    # validate_operation.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 54, -1, -1, -1,
+    # validate_operation
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 19, -1, -1, -1, -1,
+    # validate_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 26, -1, -1, -1,
+    # link_operation.1
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 39, 39,
+    # link_operation.1*
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 0, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 55, 55,
+    # link_operation
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 20, -1, -1,
+    # link_attribute
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, 42, 42,
+    # size
+    -1, -1, -1, -1, -1, 21, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    # value
+    -1, -1, 21, -1, 21, 21, 21, 21, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+    -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1,
+)
+FIRST = {
+    'program': (9, 13, 15, 23, 31, 34, 35, 36, 37, 38, 39, 44, 45, 47, 49),
+    'statement': (9, 13, 15, 23, 31, 34, 35, 36, 37, 38, 39, 44, 45, 47, 49),
+    'frame': (9,),
+    'map_declaration': (13,),
+    'map_entry': (3, 7),
+    'variable_declaration': (15,),
+    'variable_attribute': (16, 17),
+    'type': (18, 19, 20, 21, 22, 23),
+    'check_type': (24, 25),
+    'AOT_declaration': (23,),
+    'AOT_attribute': (26, 27, 28, 29, 30),
+    'AOT_kind': (27, 28, 29, 30),
+    'packetized_execution': (31,),
+    'packet_attribute': (26, 32, 33),
+    'simd_operation': (34, 35, 36, 37, 38, 39),
+    'simd_type': (34, 35, 36, 37, 38, 39),
+    'operation_attribute': (40, 41, 42, 43),
+    'operands': (2, 7),
+    'str_map_operation': (44,),
+    'exec_operation': (45,),
+    'exec_attribute': (26, 42, 43, 46),
+    'validate_operation': (47,),
+    'validate_attribute': (48,),
+    'link_operation': (49,),
+    'link_attribute': (50, 51),
+    'size': (5, 6),
+    'value': (2, 4, 5, 6, 7),
+}
@@ -1,3 +1,53 @@
+import re
+
+from AST_Nodes import (AOTNode, ExecNode, FrameNode, LinkNode, MapEntry, MapNode, PacketNode,
+                       SimdNode, StrMapNode, ValidateNode, VariableNode)
+from Profiler import count, phase
+
+# Source lexemes for NeoASMParser. Attribute keys keep their colon ("range:"),
+# string literals lose their quotes, and comments/whitespace are dropped.
+SOURCE_TOKEN_REGEX = re.compile(r'''
+    (?P<COMMENT>//[^\n]*)
+  | (?P<STRING>"(?:[^"\\\n]|\\.)*")
+  | (?P<KEY>[A-Za-z_][A-Za-z0-9_]*[ \t]*:)
+  | (?P<RANGE>\d+\.\.\d+)
+  | (?P<SIZE>\d+[KMGT]?B\b)
+  | (?P<NUMBER>\d+)
+  | (?P<WORD>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<PUNCT>[{}()\[\],;=:])
+  | (?P<SPACE>\s+)
+  | (?P<OTHER>.)
+''', re.VERBOSE)
+
+# Kinds an AOT block can be declared with
+AOT_KINDS = ("STATIC", "SOFT", "RIGID", "PRELINK")
+
+
+def iter_source_tokens(source_code, start=0, end=None):
+    # Yield (kind, value, start, end) for the tokens of source_code[start:end];
+    # COMMENT lexemes are included so callers can see where they end
+    if end is None:
+        end = len(source_code)
+    for match in SOURCE_TOKEN_REGEX.finditer(source_code, start, end):
+        kind = match.lastgroup
+        if kind == 'SPACE':
+            continue
+        value = match.group()
+        if kind == 'STRING':
+            value = value[1:-1]
+        elif kind == 'KEY':
+            value = value[:-1].rstrip() + ':'
+        yield kind, value, match.start(), match.end()
+
+
+def tokenize_source(source_code):
+    # Turn NeoASM source text into the token list NeoASMParser expects
+    with phase("parser.tokenize"):
+        tokens = [value for kind, value, _, _ in iter_source_tokens(source_code) if kind != 'COMMENT']
+        count("tokens", len(tokens))
+    return tokens
+
+
 class NeoASMParser:
     def __init__(self, tokens):
         self.tokens = tokens  # List of tokens
@@ -5,23 +55,125 @@ class NeoASMParser:
         self.ast = []  # Abstract Syntax Tree
 
     def parse(self):
-        while self.position < len(self.tokens):
+        with phase("parser.parse"):
+            try:
+                while self.position < len(self.tokens):
+                    self.ast.append(self.parse_statement())
+            except IndexError:
+                # A block ran past the last token
+                raise SyntaxError("Unexpected end of input") from None
+            count("nodes", len(self.ast))
+
+        return self.ast
+
+    def parse_statement(self):
+        # Each parse_* method leaves position just past the closing '}'
+        token = self.tokens[self.position]
+
+        if token == "frame":
+            return self.parse_frame()
+        elif token == "map":
+            return self.parse_map_declaration()
+        elif token == "var":
+            return self.parse_variable_declaration()
+        elif token == "AOT":
+            return self.parse_AOT_declaration()
+        elif token == "pkt":
+            return self.parse_packetized_execution()
+        elif token.startswith("vec_"):
+            return self.parse_simd_operation()
+        elif token == "str_map":
+            return self.parse_quantum_operation()
+        elif token == "exec":
+            return self.parse_exec_operation()
+        elif token == "validate":
+            return self.parse_validate_operation()
+        elif token == "link":
+            return self.parse_link_operation()
+        else:
+            raise SyntaxError(f"Unexpected token: {token}")
+
+    def parse_frame(self):
+        self.position += 1  # Skip 'frame' token
+        identifier = self.tokens[self.position]  # Expecting frame identifier
+        self.position += 1
+
+        if self.tokens[self.position] != "{":
+            raise SyntaxError("Expected '{' after frame identifier")
+        self.position += 1  # Skip '{'
+
+        body = []
+        while self.tokens[self.position] != "}":
+            body.append(self.parse_statement())
+
+        self.position += 1  # Skip '}'
+        count("nodes", len(body))
+        return FrameNode(identifier, body)
+
+    def parse_attribute_block(self, context):
+        # Parse '{' key: value [, key: value ...] '}' into a dict
+        if self.tokens[self.position] != "{":
+            raise SyntaxError(f"Expected '{{' after {context}")
+        self.position += 1  # Skip '{'
+
+        attributes = {}
+        while self.tokens[self.position] != "}":
             token = self.tokens[self.position]
+            if token.endswith(":"):
+                self.position += 1
+                attributes[token[:-1]] = self.tokens[self.position]
+            self.position += 1
 
-            if token == "map":
-                self.ast.append(self.parse_map_declaration())
-            elif token == "var":
-                self.ast.append(self.parse_variable_declaration())
-            elif token == "AOT":
-                self.ast.append(self.parse_AOT_declaration())
-            elif token == "pkt":
-                self.ast.append(self.parse_packetized_execution())
-            else:
-                raise SyntaxError(f"Unexpected token: {token}")
+        self.position += 1  # Skip '}'
+        return attributes
+
+    def parse_simd_operation(self):
+        simd_type = self.tokens[self.position][len("vec_"):]
+        self.position += 1  # Skip 'vec_*' token
 
+        # The identifier is optional: "vec_mul { ... }" and "vec_mul SIMD { ... }"
+        identifier = None
+        if self.tokens[self.position] != "{":
+            identifier = self.tokens[self.position]
             self.position += 1
 
-        return self.ast
+        attributes = self.parse_attribute_block("vec_" + simd_type)
+        return SimdNode(simd_type, identifier, attributes.get("in"), attributes.get("out"),
+                        attributes.get("op"), attributes.get("device"))
+
+    def parse_quantum_operation(self):
+        self.position += 1  # Skip 'str_map' token
+        identifier = self.tokens[self.position]
+        self.position += 1
+
+        attributes = self.parse_attribute_block("str_map identifier")
+        return StrMapNode(identifier, attributes.get("op"), attributes.get("in"),
+                          attributes.get("out"), attributes.get("device"))
+
+    def parse_exec_operation(self):
+        self.position += 1  # Skip 'exec' token
+        identifier = self.tokens[self.position]
+        self.position += 1
+
+        attributes = self.parse_attribute_block("exec identifier")
+        return ExecNode(identifier, attributes.get("link"), attributes.get("size"),
+                        attributes.get("op"), attributes.get("device"))
+
+    def parse_validate_operation(self):
+        self.position += 1  # Skip 'validate' token
+        identifier = self.tokens[self.position]
+        self.position += 1
+
+        attributes = self.parse_attribute_block("validate identifier")
+        return ValidateNode(identifier, attributes.get("rule"))
+
+    def parse_link_operation(self):
+        self.position += 1  # Skip 'link' token
+        identifier = self.tokens[self.position]
+        self.position += 1
+
+        attributes = self.parse_attribute_block("link identifier")
+        return LinkNode(identifier, attributes.get("src"), attributes.get("dst"))
 
     def parse_map_declaration(self):
         self.position += 1  # Skip 'map' token
@@ -36,17 +188,20 @@ class NeoASMParser:
         while self.tokens[self.position] != "}":
             key = self.tokens[self.position]
             self.position += 1
-            if self.tokens[self.position] != ":":
-                raise SyntaxError("Expected ':' in map entry")
-            self.position += 1  # Skip ':'
+            if key.endswith(":"):
+                key = key[:-1]  # Key and ':' lexed as one token
+            else:
+                if self.tokens[self.position] != ":":
+                    raise SyntaxError("Expected ':' in map entry")
+                self.position += 1  # Skip ':'
             value = self.tokens[self.position]
-            map_entries.append((key, value))
+            map_entries.append(MapEntry(key, value))
             self.position += 1
             if self.tokens[self.position] == ",":
                 self.position += 1  # Skip ','
 
         self.position += 1  # Skip '}'
-        return {"type": "map", "identifier": identifier, "entries": map_entries}
+        return MapNode(identifier, map_entries)
 
     def parse_variable_declaration(self):
         self.position += 1  # Skip 'var' token
@@ -70,7 +225,7 @@ class NeoASMParser:
             self.position += 1
 
         self.position += 1  # Skip '}'
-        return {"type": "variable", "var_type": var_type, "identifier": identifier, "attributes": attributes}
+        return VariableNode(var_type, identifier, attributes.get("range"), attributes.get("check"))
 
     def parse_AOT_declaration(self):
         self.position += 1  # Skip 'AOT' token
@@ -83,7 +238,7 @@ class NeoASMParser:
 
         attributes = {}
         while self.tokens[self.position] != "}":
-            if self.tokens[self.position] == "STATIC" or self.tokens[self.position] == "SOFT" or self.tokens[self.position] == "RIGID":
+            if self.tokens[self.position] in AOT_KINDS:
                 attributes["type"] = self.tokens[self.position]
             elif self.tokens[self.position] == "size:":
                 self.position += 1
@@ -91,7 +246,7 @@ class NeoASMParser:
             self.position += 1
 
         self.position += 1  # Skip '}'
-        return {"type": "AOT", "identifier": identifier, "attributes": attributes}
+        return AOTNode(identifier, attributes.get("type"), attributes.get("size"))
 
     def parse_packetized_execution(self):
         self.position += 1  # Skip 'pkt' token
@@ -116,4 +271,4 @@ class NeoASMParser:
             self.position += 1
 
         self.position += 1  # Skip '}'
-        return {"type": "packet", "identifier": identifier, "attributes": attributes}
+        return PacketNode(identifier, attributes.get("size"), attributes.get("exec"), attributes.get("priority"))
@@ -0,0 +1,420 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import textwrap
+
+# LL(1) parser generator for Grammar.bnf. The grammar is read into plain
+# productions (optional, repeated and grouped symbols become helper rules),
+# FIRST and FOLLOW sets are computed, and every production is entered into a
+# flat parse table indexed by nonterminal * terminal count + terminal. A
+# grammar that is not LL(1) is rejected with the conflicting rule and token.
+# The tables are written out ahead of time as a Python module (Parse_Table.py)
+# that Table_Parser.py imports.
+#
+# Symbols are integers: terminals first (EOF, the error kind, then token
+# classes and literals in grammar order), then nonterminals, then MARK and the
+# actions. MARK starts every production that ends in an action, so the driver
+# knows where the node began.
+
+DEFAULT_GRAMMAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Grammar.bnf")
+DEFAULT_TABLE_MODULE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Parse_Table.py")
+
+EOF = "$end"
+ERROR = "$error"  # Kind of lexemes no token class matches
+SKIPPED_CLASSES = ("comment",)  # Token classes the lexer drops, like whitespace
+NO_PRODUCTION = -1
+
+_RULE_REGEX = re.compile(r'<([A-Za-z_][A-Za-z0-9_]*)>\s*::=(.*)$')
+_SYMBOL_REGEX = re.compile(r'''\s*(?:
+    <(?P<RULE>[A-Za-z_][A-Za-z0-9_]*)>
+  | "(?P<LITERAL>[^"\s]+)"
+  | @(?P<ACTION>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<EMPTY>ε)
+  | (?P<OPERATOR>[|()?*+])
+)''', re.VERBOSE)
+
+
+def grammar_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _split_symbols(text):
+    # The symbols of a right-hand side as (kind, value) pairs, or None when
+    # it is not made of symbols (a token class regex)
+    symbols = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _SYMBOL_REGEX.match(text, position)
+        if not match:
+            return None
+        symbols.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return symbols
+
+
+def read_grammar(text):
+    # Parse Grammar.bnf text into (rules, token_classes): rules maps each rule
+    # name to its right-hand side as symbol pairs, token_classes maps class
+    # names to regular expressions; both in grammar order
+    rules = {}
+    token_classes = {}
+    current = None
+    for number, line in enumerate(text.splitlines(), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = _RULE_REGEX.match(stripped)
+        if match:
+            name, body = match.groups()
+            if name in rules or name in token_classes:
+                raise SyntaxError(f"Grammar line {number}: rule <{name}> is defined twice")
+            symbols = _split_symbols(body)
+            if symbols is None:
+                pattern = body.strip()
+                try:
+                    compiled = re.compile(pattern)
+                except re.error as error:
+                    raise SyntaxError(f"Grammar line {number}: bad token class <{name}>: {error}") from None
+                if compiled.groups:
+                    raise SyntaxError(f"Grammar line {number}: token class <{name}> must not capture groups")
+                token_classes[name] = pattern
+                current = None
+            else:
+                rules[name] = symbols
+                current = name
+        elif current is not None:
+            symbols = _split_symbols(stripped)  # Continuation of the previous rule
+            if symbols is None:
+                raise SyntaxError(f"Grammar line {number}: cannot read {stripped!r}")
+            rules[current].extend(symbols)
+        else:
+            raise SyntaxError(f"Grammar line {number}: expected a rule, got {stripped!r}")
+    return rules, token_classes
+
+
+class _Desugarer:
+    # Turns EBNF right-hand sides into plain alternatives of symbol sequences.
+    # Symbols become ('rule', name), ('class', name), ('literal', text) or
+    # ('action', name); helper rules are named after what they stand for.
+
+    def __init__(self, rules, token_classes):
+        self.rules = rules
+        self.token_classes = token_classes
+        self.productions = {}  # Rule name -> list of alternatives
+        self.group_counts = {}
+
+    def run(self):
+        for name, symbols in self.rules.items():
+            self.productions[name] = self.alternatives(name, symbols)
+        return self.productions
+
+    def alternatives(self, owner, symbols):
+        alternatives = [[]]
+        position = 0
+        while position < len(symbols):
+            kind, value = symbols[position]
+            position += 1
+            if kind == "OPERATOR" and value == "|":
+                alternatives.append([])
+                continue
+            if kind == "OPERATOR" and value == "(":
+                depth, end = 1, position
+                while depth:
+                    if end == len(symbols):
+                        raise SyntaxError(f"Unbalanced '(' in rule <{owner}>")
+                    if symbols[end] == ("OPERATOR", "("):
+                        depth += 1
+                    elif symbols[end] == ("OPERATOR", ")"):
+                        depth -= 1
+                    end += 1
+                index = self.group_counts[owner] = self.group_counts.get(owner, 0) + 1
+                group = f"{owner}.{index}"
+                self.productions[group] = self.alternatives(group, symbols[position:end - 1])
+                symbol = ("rule", group)
+                position = end
+            elif kind == "OPERATOR":
+                raise SyntaxError(f"Misplaced {value!r} in rule <{owner}>")
+            elif kind == "EMPTY":
+                continue
+            elif kind == "RULE":
+                symbol = ("class" if value in self.token_classes else "rule", value)
+            else:
+                symbol = (kind.lower(), value)
+
+            if position < len(symbols) and symbols[position][0] == "OPERATOR" and symbols[position][1] in "?*+":
+                symbol = self.repeat(symbol, symbols[position][1])
+                position += 1
+            alternatives[-1].extend(symbol if isinstance(symbol, list) else [symbol])
+        return alternatives
+
+    def repeat(self, symbol, operator):
+        if symbol[0] == "action":
+            raise SyntaxError(f"Action @{symbol[1]} cannot be repeated")
+        name = f"{symbol[1]}{operator}" if symbol[0] != "literal" else f'"{symbol[1]}"{operator}'
+        if operator == "+":
+            return [symbol, self.repeat(symbol, "*")]
+        if name not in self.productions:
+            if operator == "?":
+                self.productions[name] = [[symbol], []]
+            else:
+                self.productions[name] = [[symbol, ("rule", name)], []]
+        return ("rule", name)
+
+
+def _first_of_sequence(sequence, first, nullable):
+    # FIRST set of a symbol sequence and whether it derives the empty string
+    result = set()
+    for symbol in sequence:
+        if symbol[0] == "action":
+            continue
+        if symbol[0] != "rule":
+            result.add(symbol)
+            return result, False
+        result |= first[symbol[1]]
+        if symbol[1] not in nullable:
+            return result, False
+    return result, True
+
+
+def first_and_follow(productions, start):
+    # FIRST and FOLLOW sets (of terminal symbols, EOF as ('eof', EOF)) and
+    # the set of nullable rules, by fixed-point iteration
+    first = {name: set() for name in productions}
+    follow = {name: set() for name in productions}
+    nullable = set()
+    follow[start].add(("eof", EOF))
+
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in productions.items():
+            for sequence in alternatives:
+                symbols, empty = _first_of_sequence(sequence, first, nullable)
+                if not symbols <= first[name]:
+                    first[name] |= symbols
+                    changed = True
+                if empty and name not in nullable:
+                    nullable.add(name)
+                    changed = True
+
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in productions.items():
+            for sequence in alternatives:
+                for index, symbol in enumerate(sequence):
+                    if symbol[0] != "rule":
+                        continue
+                    symbols, empty = _first_of_sequence(sequence[index + 1:], first, nullable)
+                    if empty:
+                        symbols = symbols | follow[name]
+                    if not symbols <= follow[symbol[1]]:
+                        follow[symbol[1]] |= symbols
+                        changed = True
+    return first, follow, nullable
+
+
+def _derive(table, encoded, width, mark, production, terminal):
+    # Expand production against lookahead terminal until the terminal is
+    # matched or derived away; returns the table entry described in
+    # build_parse_table
+    stack = list(encoded[production])
+    marks = 0
+    while stack:
+        symbol = stack.pop()
+        if symbol < width:
+            return 1, marks, tuple(stack)  # symbol == terminal: the lookahead is consumed
+        if symbol == mark:
+            marks += 1
+        elif symbol > mark:
+            return 0, 0, encoded[production]
+        else:
+            stack.extend(encoded[table[(symbol - width) * width + terminal]])
+    return 0, marks, ()
+
+
+def _literal_class(literal, token_classes):
+    # The token class the lexer files a literal under
+    for name, pattern in token_classes.items():
+        if name not in SKIPPED_CLASSES and re.fullmatch(pattern, literal):
+            return name
+    raise SyntaxError(f'No token class matches the literal "{literal}"')
+
+
+def build_parse_table(grammar_text):
+    # Everything the table-driven parser needs, as a dict of plain data
+    rules, token_classes = read_grammar(grammar_text)
+    if not rules:
+        raise SyntaxError("The grammar has no rules")
+    for name in rules:
+        for kind, value in rules[name]:
+            if kind == "RULE" and value not in rules and value not in token_classes:
+                raise SyntaxError(f"Rule <{name}> refers to undefined <{value}>")
+    start = next(iter(rules))
+    productions = _Desugarer(rules, token_classes).run()
+    first, follow, nullable = first_and_follow(productions, start)
+
+    classes = [name for name in token_classes if name not in SKIPPED_CLASSES]
+    literals = []
+    for alternatives in productions.values():
+        for sequence in alternatives:
+            for kind, value in sequence:
+                if kind == "literal" and value not in literals:
+                    literals.append(value)
+
+    terminals = [EOF, ERROR] + [f"<{name}>" for name in classes] + [f'"{literal}"' for literal in literals]
+    terminal_ids = {("eof", EOF): 0}
+    terminal_ids.update({("class", name): 2 + index for index, name in enumerate(classes)})
+    terminal_ids.update({("literal", literal): 2 + len(classes) + index for index, literal in enumerate(literals)})
+    nonterminals = list(productions)
+    nonterminal_ids = {name: len(terminals) + index for index, name in enumerate(nonterminals)}
+    mark = len(terminals) + len(nonterminals)
+    actions = []
+    for alternatives in productions.values():
+        for sequence in alternatives:
+            for kind, value in sequence:
+                if kind == "action" and value not in actions:
+                    actions.append(value)
+
+    # A keyword that is not expected where it appears is retried as its token class
+    fallback = [index for index in range(len(terminals))]
+    for literal in literals:
+        fallback[terminal_ids[("literal", literal)]] = terminal_ids[("class", _literal_class(literal, token_classes))]
+
+    def encode(symbol):
+        if symbol[0] == "rule":
+            return nonterminal_ids[symbol[1]]
+        if symbol[0] == "action":
+            return mark + 1 + actions.index(symbol[1])
+        return terminal_ids[symbol]
+
+    width = len(terminals)
+    table = [NO_PRODUCTION] * (len(nonterminals) * width)
+    encoded = []  # Right-hand sides reversed, ready to be pushed on the parse stack
+    for name in nonterminals:
+        row = (nonterminal_ids[name] - width) * width
+        for sequence in productions[name]:
+            production = len(encoded)
+            body = [encode(symbol) for symbol in sequence]
+            if any(symbol[0] == "action" for symbol in sequence):
+                if sequence[-1][0] != "action":
+                    raise SyntaxError(f"The action of rule <{name}> must come last")
+                body.insert(0, mark)
+            encoded.append(tuple(reversed(body)))
+
+            lookahead, empty = _first_of_sequence(sequence, first, nullable)
+            if empty:
+                lookahead = lookahead | follow[name]
+            for terminal in lookahead:
+                index = row + terminal_ids[terminal]
+                if table[index] != NO_PRODUCTION and table[index] != production:
+                    raise SyntaxError(f"Grammar is not LL(1): rule <{name}> has two productions for "
+                                      f"{terminals[terminal_ids[terminal]]}")
+                table[index] = production
+
+    # Each table cell becomes an entry that does the whole leftmost derivation
+    # for its token at once: (1 if the token is matched, MARKs passed, symbols
+    # left to push). A cell whose derivation would run an action before the
+    # token is matched keeps its bare production: (0, 0, right-hand side).
+    entries = []
+    entry_ids = {}
+    production_table = list(table)
+    for cell, production in enumerate(production_table):
+        if production != NO_PRODUCTION:
+            entry = _derive(production_table, encoded, width, mark, production, cell % width)
+            table[cell] = entry_ids.setdefault(entry, len(entries))
+            if table[cell] == len(entries):
+                entries.append(entry)
+
+    first_sets = {name: tuple(sorted(terminal_ids[symbol] for symbol in first[name])) for name in rules}
+    return {
+        "GRAMMAR_HASH": grammar_hash(grammar_text),
+        "TERMINALS": tuple(terminals),
+        "NONTERMINALS": tuple(nonterminals),
+        "ACTIONS": tuple(actions),
+        "START": nonterminal_ids[start],
+        "MARK": mark,
+        "TOKEN_PATTERN": _token_pattern(token_classes, classes),
+        "TOKEN_CLASSES": tuple((token_classes[name], terminal_ids[("class", name)]) for name in classes),
+        "LITERALS": {literal: terminal_ids[("literal", literal)] for literal in literals},
+        "FALLBACK": tuple(fallback),
+        "ENTRIES": tuple(entries),
+        "TABLE": tuple(table),
+        "FIRST": first_sets,
+    }
+
+
+def _token_pattern(token_classes, classes):
+    # One pattern for re.findall: whitespace and skipped classes are consumed
+    # outside the only group, which captures a token, a stray character
+    # (an error token) or, at the end of the input, the empty string (EOF)
+    skipped = "".join(f"|{token_classes[name]}" for name in SKIPPED_CLASSES if name in token_classes)
+    tokens = "|".join(token_classes[name] for name in classes)
+    return rf"(?:\s+{skipped})*+({tokens}|\S|$)"
+
+
+def write_table_module(tables, path, grammar_name="Grammar.bnf"):
+    # Write the tables as a Python module of literals
+    lines = [f"# Generated by Parser_Generator.py from {grammar_name}. Do not edit; regenerate instead.", ""]
+    for name, value in tables.items():
+        if name == "TABLE":
+            # One row per nonterminal, wrapped
+            width = len(tables["TERMINALS"])
+            rows = []
+            for index, nonterminal in enumerate(tables["NONTERMINALS"]):
+                row = ", ".join(str(entry) for entry in value[index * width:(index + 1) * width]) + ","
+                rows.append(f"    # {nonterminal}")
+                rows.extend(textwrap.wrap(row, 116, initial_indent="    ", subsequent_indent="    "))
+            lines.append(f"{name} = (\n" + "\n".join(rows) + "\n)")
+        elif isinstance(value, (tuple, dict)) and len(value) > 4:
+            items = value.items() if isinstance(value, dict) else value
+            body = ",\n    ".join(f"{key!r}: {item!r}" for key, item in items) if isinstance(value, dict) \
+                else ",\n    ".join(repr(item) for item in items)
+            opening, closing = ("{", "}") if isinstance(value, dict) else ("(", ")")
+            lines.append(f"{name} = {opening}\n    {body},\n{closing}")
+        else:
+            lines.append(f"{name} = {value!r}")
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    os.replace(temp_path, path)
+
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(prog="neoasm-parsergen",
+                                     description="Generate the LL(1) parse table of the NeoASM grammar.")
+    parser.add_argument("grammar", nargs="?", default=DEFAULT_GRAMMAR, help="BNF grammar (default: Grammar.bnf)")
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLE_MODULE, help="table module to write")
+    parser.add_argument("--check", action="store_true", help="only check that the table module is up to date")
+    return parser
+
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    try:
+        with open(args.grammar, "r", encoding="utf-8") as file:
+            grammar_text = file.read()
+        if args.check:
+            with open(args.output, "r", encoding="utf-8") as file:
+                current = f"GRAMMAR_HASH = {grammar_hash(grammar_text)!r}" in file.read()
+            if not current:
+                print(f"{args.output} is out of date; run {os.path.basename(__file__)}", file=sys.stderr)
+                return 1
+            return 0
+        tables = build_parse_table(grammar_text)
+    except (OSError, SyntaxError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    write_table_module(tables, args.output, os.path.basename(args.grammar))
+    print(f"{args.output}: {len(tables['TERMINALS'])} terminals, {len(tables['NONTERMINALS'])} nonterminals, "
+          f"{len(tables['ENTRIES'])} table entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import time
+
+from Instruction_IR import Opcode
+from Profiler import count, phase
+from Range_Analysis import narrow_ranges
+
+# Instructions that only declare storage; the passes below may remove them
+DECLARATION_OPCODES = (Opcode.VAR, Opcode.MAP, Opcode.AOT)
+
+
+def _use_counts(instructions):
+    # Name -> number of instructions that use it
+    counts = {}
+    for instruction in instructions:
+        for name in set(instruction.uses):
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def coalesce_maps(instructions):
+    # Merge chained transfers: map A (X -> B) followed by map C (B -> Y)
+    # becomes one map C (X -> Y) when A is the last write to B before C,
+    # nothing but the two maps uses B, nothing refers to map A itself and
+    # nothing between A and C writes X. One forward pass; a merged map can
+    # merge again with the next map of its chain. Merging moves no other
+    # use of any name, so the use counts taken up front stay valid.
+    uses = _use_counts(instructions)
+    removed = set()  # Positions of merged-away maps
+    merged = []
+    last_writer = {}  # Name -> position of the last instruction that defines it
+    for position, second in enumerate(instructions):
+        if second.opcode == Opcode.MAP:
+            intermediate = second.operand("SRC")
+            first_position = last_writer.get(intermediate)
+            first = instructions[first_position] if first_position is not None else None
+            if (first is not None and first.opcode == Opcode.MAP and first.operand("DST") == intermediate
+                    and uses.get(intermediate, 0) == 2 and uses.get(first.name, 0) == 0):
+                source = first.operand("SRC")
+                if source != intermediate and last_writer.get(source, -1) < first_position:
+                    second.set_operand("SRC", source)
+                    second.uses = (source, second.operand("DST"))
+                    removed.add(first_position)
+                    merged.append(f"{first.name}+{second.name}")
+        for name in second.defs:
+            last_writer[name] = position
+    return [instruction for position, instruction in enumerate(instructions) if position not in removed], \
+        {"merged": merged}
+
+
+def dedupe_validations(instructions):
+    # Drop a validate rule already applied to the same variable with no write
+    # to that variable in between
+    checked = {}  # Variable -> operand tuples validated since its last write
+    kept = []
+    dropped = 0
+    for instruction in instructions:
+        if instruction.opcode == Opcode.VALIDATE:
+            rules = checked.setdefault(instruction.name, set())
+            if instruction.operands in rules:
+                dropped += 1
+                continue
+            rules.add(instruction.operands)
+        else:
+            for name in instruction.defs:
+                checked.pop(name, None)
+        kept.append(instruction)
+    return kept, {"dropped": dropped}
+
+
+def eliminate_dead_declarations(instructions):
+    # Remove variables, maps and AOT blocks nothing refers to. Operations
+    # (exec, link, pkt, vec_, str_map) are the roots: every name they use or
+    # define is live. A declaration is live when any name it defines is, so a
+    # map writing a live variable stays, and a live declaration keeps the
+    # names it uses (a map's source) alive. Validate rules do not keep a
+    # declaration alive and go with it.
+    live = set()
+    declarations = {}  # Defined name -> declarations defining it
+    for instruction in instructions:
+        if instruction.opcode in DECLARATION_OPCODES:
+            for name in instruction.defs:
+                declarations.setdefault(name, []).append(instruction)
+        elif instruction.opcode != Opcode.VALIDATE:
+            live.update(instruction.uses)
+            live.update(instruction.defs)
+
+    pending = list(live)
+    while pending:
+        name = pending.pop()
+        for declaration in declarations.get(name, ()):
+            for related in declaration.uses + declaration.defs:
+                if related not in live:
+                    live.add(related)
+                    pending.append(related)
+
+    dead = {name for name in declarations if name not in live}
+    kept = [
+        instruction for instruction in instructions
+        if not (instruction.opcode in DECLARATION_OPCODES and instruction.name in dead)
+        and not (instruction.opcode == Opcode.VALIDATE and instruction.name in dead)
+    ]
+    return kept, {"removed": sorted(dead)}
+
+
+PASSES = {
+    "coalesce_maps": coalesce_maps,
+    "dedupe_validations": dedupe_validations,
+    "eliminate_dead_declarations": eliminate_dead_declarations,
+    "narrow_ranges": narrow_ranges,
+}
+# Map coalescing runs before dead-declaration elimination, which then drops
+# the intermediate blocks a merge left unreferenced; range analysis only
+# looks at the variables that survive
+DEFAULT_PIPELINE = ("coalesce_maps", "dedupe_validations", "eliminate_dead_declarations", "narrow_ranges")
+
+
+class NeoASMPassManager:
+    """Run an ordered pipeline of optimization passes over the instruction IR.
+
+    A pass is a function taking the instruction list (in program order, before
+    layout and scheduling) and returning (instructions, stats). Passes run in
+    pipeline order and can be switched off by name; register() adds new
+    ones. Each run records one report entry per pass with its wall time,
+    the instruction counts before and after and the pass's own stats, and
+    each pass is a Profiler phase ("pass.<name>").
+    """
+
+    def __init__(self, pipeline=DEFAULT_PIPELINE, disabled=()):
+        self.passes = dict(PASSES)
+        self.pipeline = list(pipeline)
+        self.disabled = set()
+        for name in self.pipeline:
+            self._check(name)
+        for name in disabled:
+            self.disable(name)
+        self.report = []  # One entry per pass of the last run()
+
+    def _check(self, name):
+        if name not in self.passes:
+            raise ValueError(f"Unknown pass {name}, expected one of {', '.join(self.passes)}")
+
+    def register(self, name, function, before=None):
+        # Add a pass to the pipeline, at the end or in front of pass before
+        self.passes[name] = function
+        if name in self.pipeline:
+            self.pipeline.remove(name)
+        if before is None:
+            self.pipeline.append(name)
+        else:
+            self._check(before)
+            self.pipeline.insert(self.pipeline.index(before), name)
+
+    def enable(self, name):
+        self._check(name)
+        self.disabled.discard(name)
+
+    def disable(self, name):
+        self._check(name)
+        self.disabled.add(name)
+
+    def enabled_passes(self):
+        return [name for name in self.pipeline if name not in self.disabled]
+
+    def run(self, instructions):
+        self.report = []
+        for name in self.enabled_passes():
+            before = len(instructions)
+            started = time.perf_counter()
+            with phase(f"pass.{name}"):
+                instructions, stats = self.passes[name](instructions)
+            self.report.append(dict(stats, name=name, seconds=time.perf_counter() - started,
+                                    instructions_before=before, instructions_after=len(instructions)))
+            count(f"pass.{name}.removed", before - len(instructions))
+        return instructions
+
+
+def format_pass_report(report):
+    lines = [f"{'pass':<28} {'ms':>9} {'before':>8} {'after':>8}"]
+    for entry in report:
+        lines.append(f"{entry['name']:<28} {entry['seconds'] * 1000:>9.3f} "
+                     f"{entry['instructions_before']:>8} {entry['instructions_after']:>8}")
+    return "\n".join(lines)
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Compile pipeline instrumentation. Code under measurement calls phase() and
+# count(); while no profiler is enabled both return after a single global
+# check, so the hooks can stay in place in production builds.
+
+_active = None  # The enabled NeoASMProfiler, if any
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name, category="compile"):
+    # Context manager timing one phase of the active profiler
+    if _active is None:
+        return _NULL_PHASE
+    return _Phase(_active, name, category)
+
+
+def count(name, value=1):
+    # Add value to a counter of the active profiler
+    if _active is not None:
+        _active.count(name, value)
+
+
+def active_profiler():
+    return _active
+
+
+class PhaseRecord:
+    __slots__ = ('name', 'category', 'start_ns', 'wall_ns', 'cpu_ns', 'peak_bytes', 'pid', 'tid', 'depth')
+
+    def __init__(self, name, category, start_ns, wall_ns, cpu_ns, peak_bytes, pid, tid, depth):
+        self.name = name
+        self.category = category
+        self.start_ns = start_ns  # time.perf_counter_ns() at phase start
+        self.wall_ns = wall_ns
+        self.cpu_ns = cpu_ns  # Thread CPU time
+        self.peak_bytes = peak_bytes  # tracemalloc peak during the phase, or None
+        self.pid = pid
+        self.tid = tid
+        self.depth = depth  # Nesting level; 0 for outermost phases
+
+    def to_tuple(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'category', 'start_ns', 'cpu_start_ns', 'peak_bytes', 'depth')
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._exit(self)
+        return False
+
+
+class NeoASMProfiler:
+    """Collects per-phase wall/CPU time, counters and peak memory for a compile.
+
+    Enable it with a with-block (or enable()/disable()); the phase() and
+    count() hooks in the analyzer, parser and code generator then report to
+    it. With trace_memory the tracemalloc peak of every phase is recorded as
+    well; nested phases each get their own peak. Hooks are objects with any
+    of on_phase_start(name, category), on_phase_end(record) and
+    on_counter(name, value, total), called as events happen. Results are
+    available as summary(), format_summary() and a Chrome trace-event file
+    (write_chrome_trace), which chrome://tracing and Perfetto open directly.
+    """
+
+    def __init__(self, trace_memory=False, hooks=()):
+        self.trace_memory = trace_memory
+        self.hooks = list(hooks)
+        self.records = []  # PhaseRecord of every finished phase
+        self.counters = {}  # Counter name -> total
+        self.counter_events = []  # (time ns, name, total, pid, tid)
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        self._previous = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def enable(self):
+        global _active
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._previous = _active
+        _active = self
+        return self
+
+    def disable(self):
+        global _active
+        _active = self._previous
+        self._previous = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, current):
+        stack = self._stack()
+        current.depth = len(stack)
+        current.peak_bytes = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Fold the peak so far into the enclosing phases before resetting
+            # it for this one
+            _, peak = tracemalloc.get_traced_memory()
+            for enclosing in stack:
+                enclosing.peak_bytes = max(enclosing.peak_bytes, peak)
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        stack.append(current)
+        for hook in self.hooks:
+            if hasattr(hook, "on_phase_start"):
+                hook.on_phase_start(current.name, current.category)
+        current.cpu_start_ns = time.thread_time_ns()
+        current.start_ns = time.perf_counter_ns()
+
+    def _exit(self, current):
+        end_ns = time.perf_counter_ns()
+        cpu_ns = time.thread_time_ns() - current.cpu_start_ns
+        stack = self._stack()
+        stack.pop()
+        peak_bytes = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(current.peak_bytes, peak)
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak_bytes)
+        record = PhaseRecord(current.name, current.category, current.start_ns, end_ns - current.start_ns, cpu_ns,
+                             peak_bytes, os.getpid(), threading.get_ident(), current.depth)
+        self.records.append(record)
+        for hook in self.hooks:
+            if hasattr(hook, "on_phase_end"):
+                hook.on_phase_end(record)
+
+    def count(self, name, value=1):
+        total = self.counters[name] = self.counters.get(name, 0) + value
+        self.counter_events.append((time.perf_counter_ns(), name, total, os.getpid(), threading.get_ident()))
+        for hook in self.hooks:
+            if hasattr(hook, "on_counter"):
+                hook.on_counter(name, value, total)
+
+    def export(self):
+        # Picklable snapshot, e.g. for sending from a worker process to merge()
+        return {
+            "records": [record.to_tuple() for record in self.records],
+            "counters": dict(self.counters),
+            "counter_events": list(self.counter_events),
+        }
+
+    def merge(self, exported):
+        self.records.extend(PhaseRecord(*fields) for fields in exported["records"])
+        for name, value in exported["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.counter_events.extend(exported["counter_events"])
+
+    def summary(self):
+        # Per phase name: calls, wall and CPU seconds, largest peak; plus counter totals
+        phases = {}
+        for record in self.records:
+            entry = phases.setdefault(record.name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                                                    "peak_bytes": None})
+            entry["calls"] += 1
+            entry["wall_seconds"] += record.wall_ns / 1e9
+            entry["cpu_seconds"] += record.cpu_ns / 1e9
+            if record.peak_bytes is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, record.peak_bytes)
+        return {"phases": phases, "counters": dict(self.counters)}
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [f"{'phase':<24} {'calls':>7} {'wall ms':>11} {'cpu ms':>11} {'peak MB':>9}"]
+        for name, entry in sorted(summary["phases"].items(), key=lambda item: -item[1]["wall_seconds"]):
+            peak = f"{entry['peak_bytes'] / (1 << 20):9.2f}" if entry["peak_bytes"] is not None else f"{'-':>9}"
+            lines.append(f"{name:<24} {entry['calls']:>7} {entry['wall_seconds'] * 1000:>11.2f} "
+                         f"{entry['cpu_seconds'] * 1000:>11.2f} {peak}")
+        if summary["counters"]:
+            lines.append("")
+            lines.extend(f"{name:<24} {value:>12,}" for name, value in sorted(summary["counters"].items()))
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        # Trace-event JSON object: complete ("X") events for phases, counter ("C") events for counters
+        events = []
+        for record in self.records:
+            args = {"cpu_ms": record.cpu_ns / 1e6}
+            if record.peak_bytes is not None:
+                args["peak_bytes"] = record.peak_bytes
+            events.append({
+                "name": record.name, "cat": record.category, "ph": "X",
+                "ts": record.start_ns / 1000, "dur": record.wall_ns / 1000,
+                "pid": record.pid, "tid": record.tid, "args": args,
+            })
+        for time_ns, name, total, pid, tid in self.counter_events:
+            events.append({"name": name, "ph": "C", "ts": time_ns / 1000, "pid": pid, "tid": tid,
+                           "args": {name: total}})
+        events.sort(key=lambda event: event["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
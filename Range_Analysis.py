@@ -0,0 +1,168 @@
+import math
+import re
+
+from Instruction_IR import ELEMENTWISE_OPERATIONS, Opcode, vector_operands
+from Memory_Layout import STORAGE_SIZES, VAR_TYPE_SIZES
+
+# Value range analysis over the instruction IR. A variable declared with
+# "check: rigid" is guaranteed to hold a value inside its declared range: the
+# runtime check rejects any write outside it. That makes the declared range
+# a fact every reader can rely on, so a write can be proven in range from
+# the ranges of its inputs alone, and a variable whose every write in the
+# program is proven needs no runtime check at all (CHECK becomes "proven"). Whether checked or
+# proven, a rigid integer variable never holds a value outside its range,
+# so it is stored in the smallest integer type that covers the range.
+
+_RANGE_REGEX = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*\.\.\s*(-?\d+(?:\.\d+)?)\s*$')
+
+# Variable types whose values the analysis reasons about
+NUMERIC_TYPES = ("INT", "FLOAT")
+
+# Storage types by preference; the first that covers a range is used
+_INTEGER_STORAGE = (
+    ("u8", 0, (1 << 8) - 1), ("i8", -(1 << 7), (1 << 7) - 1),
+    ("u16", 0, (1 << 16) - 1), ("i16", -(1 << 15), (1 << 15) - 1),
+    ("u32", 0, (1 << 32) - 1), ("i32", -(1 << 31), (1 << 31) - 1),
+    ("u64", 0, (1 << 64) - 1), ("i64", -(1 << 63), (1 << 63) - 1),
+)
+
+PROVEN_CHECK = "proven"
+
+
+def parse_range(text):
+    # "0..255" -> (0, 255); None when the range is missing, malformed or empty
+    if text is None:
+        return None
+    match = _RANGE_REGEX.match(str(text))
+    if not match:
+        return None
+    low, high = (float(part) if "." in part else int(part) for part in match.groups())
+    return (low, high) if low <= high else None
+
+
+def storage_type(low, high):
+    # Smallest integer storage holding every value of low..high, or None
+    for name, minimum, maximum in _INTEGER_STORAGE:
+        if minimum <= low and high <= maximum:
+            return name
+    return None
+
+
+def combine(operation, left, right, integer):
+    # Range of left op right for two ranges; None when it cannot be bounded
+    if left is None or right is None:
+        return None
+    if operation in ("ADD", "SUB", "MUL"):
+        if operation == "ADD":
+            return left[0] + right[0], left[1] + right[1]
+        if operation == "SUB":
+            return left[0] - right[1], left[1] - right[0]
+        corners = [a * b for a in left for b in right]
+        return min(corners), max(corners)
+    if operation == "DIV":
+        if right[0] <= 0 <= right[1]:
+            return None  # The divisor may be zero
+        corners = [a / b for a in left for b in right]
+        if integer:
+            return math.floor(min(corners)), math.ceil(max(corners))
+        return min(corners), max(corners)
+    return None  # DOT and CROSS depend on the vector length
+
+
+def declared_ranges(instructions):
+    # Name -> (type, range, rigid) of the variables declared exactly once
+    declared = {}
+    seen = set()
+    for instruction in instructions:
+        if instruction.opcode != Opcode.VAR:
+            continue
+        if instruction.name in seen:
+            declared.pop(instruction.name, None)  # Redeclared: nothing to rely on
+            continue
+        seen.add(instruction.name)
+        declared[instruction.name] = (
+            instruction.operand("TYPE"),
+            parse_range(instruction.operand("RANGE")),
+            instruction.operand("CHECK") == "rigid",
+        )
+    return declared
+
+
+def written_range(instruction, name, facts, integer):
+    # Range of the value instruction writes to variable name, or None
+    if instruction.opcode != Opcode.VEC:
+        return None  # str_map outputs and anything else are not modelled
+    try:
+        operation, inputs, output = vector_operands(instruction)
+    except ValueError:
+        return None
+    if output != name:
+        return None
+    if len(inputs) == 1 and operation in ELEMENTWISE_OPERATIONS:
+        left, right = output, inputs[0]  # out = out op in
+    else:
+        left, right = inputs[0], inputs[-1]
+    return combine(operation, facts.get(left), facts.get(right), integer)
+
+
+def written_names(instruction):
+    # Names instruction writes: its defs, plus the destination of a map, which
+    # overwrites dst whether or not the IR it came from lists dst as a def
+    names = list(instruction.defs)
+    if instruction.opcode == Opcode.MAP:
+        destination = instruction.operand("DST")
+        if destination is not None and destination not in names:
+            names.append(destination)
+    return names
+
+
+def analyze_ranges(instructions):
+    # {name: (proven, storage)} for every rigid numeric variable: whether all
+    # its writes are proven in range, and its narrowed storage type (or None)
+    declared = declared_ranges(instructions)
+    facts = {
+        name: value_range for name, (var_type, value_range, rigid) in declared.items()
+        if rigid and value_range is not None and var_type in NUMERIC_TYPES
+    }
+
+    # A variable the program never writes is filled from outside, and its
+    # check is what guards those values; it stays
+    proven = {}
+    for instruction in instructions:
+        if instruction.opcode == Opcode.VAR:
+            continue
+        for name in written_names(instruction):
+            if name not in facts or proven.get(name) is False:
+                continue
+            value_range = written_range(instruction, name, facts, declared[name][0] == "INT")
+            low, high = facts[name]
+            proven[name] = value_range is not None and low <= value_range[0] and value_range[1] <= high
+
+    results = {}
+    for name, value_range in facts.items():
+        storage = None
+        if declared[name][0] == "INT" and all(isinstance(bound, int) for bound in value_range):
+            storage = storage_type(*value_range)
+            if storage is not None and STORAGE_SIZES[storage] >= VAR_TYPE_SIZES["INT"]:
+                storage = None  # Never wider than the type itself
+        results[name] = (proven.get(name, False), storage)
+    return results
+
+
+def narrow_ranges(instructions):
+    # Pass (see Pass_Manager): elide the rigid checks that are proven and
+    # give rigid INT variables the narrowest storage their range allows
+    elided = narrowed = saved = 0
+    results = analyze_ranges(instructions)
+    for instruction in instructions:
+        if instruction.opcode != Opcode.VAR or instruction.name not in results:
+            continue
+        proven, storage = results[instruction.name]
+        if proven:
+            instruction.set_operand("CHECK", PROVEN_CHECK)
+            elided += 1
+        if storage is not None:
+            instruction.set_operand("STORAGE", storage)
+            narrowed += 1
+            saved += VAR_TYPE_SIZES["INT"] - STORAGE_SIZES[storage]
+    return instructions, {"checks_elided": elided, "narrowed": narrowed, "bytes_saved": saved}
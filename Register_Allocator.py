@@ -0,0 +1,193 @@
+import heapq
+
+from Instruction_IR import NeoASMInstruction, Opcode
+
+DEFAULT_REGISTER_COUNT = 8
+
+
+class LiveInterval:
+    __slots__ = ('name', 'start', 'end', 'uses', 'declarations', 'register', 'spill_at')
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start  # Index of the declaring instruction
+        self.end = start  # Index of the last instruction that uses the variable
+        self.uses = []  # Indices of every instruction that uses the variable
+        self.declarations = [start]  # Indices of the declaration and of every redeclaration
+        self.register = None  # Register held from start until spill_at (or end)
+        self.spill_at = None  # Instruction index at which the variable moves to memory
+
+
+def compute_live_intervals(instructions, variables):
+    # Build one live interval per declared variable from the names every
+    # instruction defines and uses; the interval runs from the first
+    # definition to the last instruction that reads or writes the variable.
+    # A redeclared variable keeps its one interval, which then covers every
+    # declaration.
+    intervals = {}
+    for index, instruction in enumerate(instructions):
+        for name in instruction.defs:
+            if name in variables and name not in intervals:
+                intervals[name] = LiveInterval(name, index)
+        if instruction.opcode == Opcode.VAR:
+            interval = intervals.get(instruction.name)
+            if interval is not None and index > interval.start:
+                interval.declarations.append(index)
+        for name in instruction.uses + instruction.defs:
+            interval = intervals.get(name)
+            if interval is not None and index > interval.start:
+                interval.end = index
+                if not interval.uses or interval.uses[-1] != index:
+                    interval.uses.append(index)
+    return sorted(intervals.values(), key=lambda interval: (interval.start, interval.name))
+
+
+def max_register_pressure(intervals):
+    # Largest number of intervals live at the same instruction
+    events = []
+    for interval in intervals:
+        events.append((interval.start, 1))
+        events.append((interval.end + 1, -1))
+    events.sort()
+    pressure = peak = 0
+    for _, change in events:
+        pressure += change
+        peak = max(peak, pressure)
+    return peak
+
+
+class NeoASMLinearScanAllocator:
+    """Linear-scan register allocation over the scheduled instruction stream.
+
+    When register pressure never exceeds the register count, every variable
+    gets a register for its whole live interval. Otherwise a few registers are
+    set aside as reload scratch registers (as many as the most variables any
+    single instruction touches), and whenever no register is free the interval
+    that ends last is spilled: a SPILL is emitted where it loses its register
+    and a RELOAD into a scratch register precedes each later use.
+    """
+
+    def __init__(self, register_count=DEFAULT_REGISTER_COUNT):
+        self.register_count = register_count
+        self.assignment = {}  # Variable -> register name, or "SPILLED"
+        self.stats = {}
+
+    def allocate(self, instructions, variables, memory_map):
+        # Returns the instruction list with REGISTER operands on the
+        # declarations and spill/reload instructions inserted
+        intervals = compute_live_intervals(instructions, variables)
+        pressure = max_register_pressure(intervals)
+
+        scratch_count = 0
+        if pressure > self.register_count:
+            scratch_count = max(
+                (sum(1 for name in set(instruction.defs + instruction.uses) if name in variables)
+                 for instruction in instructions),
+                default=1,
+            )
+        allocatable = self.register_count - scratch_count
+        if allocatable < 1:
+            raise ValueError(
+                f"Register allocation needs at least {scratch_count + 1} registers, "
+                f"the target has {self.register_count}"
+            )
+
+        self.scan(intervals, allocatable)
+        instructions, spills, reloads = self.rewrite(instructions, intervals, memory_map, allocatable)
+
+        self.assignment = {
+            interval.name: f"R{interval.register}" if interval.register is not None else "SPILLED"
+            for interval in intervals
+        }
+        self.stats = {
+            "registers": self.register_count,
+            "allocatable": allocatable,
+            "scratch": scratch_count,
+            "intervals": len(intervals),
+            "max_pressure": pressure,
+            "spilled": sum(1 for interval in intervals if interval.spill_at is not None),
+            "spill_instructions": spills,
+            "reload_instructions": reloads,
+        }
+        return instructions
+
+    def scan(self, intervals, allocatable):
+        free = list(range(allocatable))  # Min-heap, so the lowest free register is reused first
+        # Active intervals as (end, position) in a min-heap, to expire them,
+        # and as (-end, -position) in a max-heap, to pick spill victims.
+        # position is the index in intervals, which are sorted by (start,
+        # name), so ties break as before. Entries of intervals that expired or
+        # were spilled stay in the heaps and are skipped when they surface.
+        expiring = []
+        latest = []
+        active = [False] * len(intervals)
+
+        for position, interval in enumerate(intervals):
+            # Expire intervals that ended before this one starts
+            while expiring and expiring[0][0] < interval.start:
+                _, expired = heapq.heappop(expiring)
+                if active[expired]:
+                    active[expired] = False
+                    heapq.heappush(free, intervals[expired].register)
+
+            if free:
+                interval.register = heapq.heappop(free)
+            else:
+                # No free register: spill whichever interval ends last
+                while not active[-latest[0][1]]:
+                    heapq.heappop(latest)
+                victim_position = -latest[0][1]
+                victim = intervals[victim_position]
+                if victim.end <= interval.end:
+                    interval.spill_at = interval.start
+                    continue
+                heapq.heappop(latest)
+                active[victim_position] = False
+                interval.register = victim.register
+                victim.spill_at = interval.start
+
+            active[position] = True
+            heapq.heappush(expiring, (interval.end, position))
+            heapq.heappush(latest, (-interval.end, -position))
+
+    def rewrite(self, instructions, intervals, memory_map, allocatable):
+        # Emit the allocation into the instruction stream
+        declaration_registers = {}
+        spills_before = {}
+        reloads_before = {}
+        for interval in intervals:
+            spilled_whole = interval.spill_at == interval.start
+            for declaration in interval.declarations:
+                in_memory = interval.spill_at is not None and declaration >= interval.spill_at
+                register = "SPILLED" if in_memory else f"R{interval.register}"
+                declaration_registers.setdefault(declaration, []).append(register)
+            if interval.spill_at is None:
+                continue
+            address = memory_map.get(interval.name, 0)
+            if not spilled_whole:
+                spills_before.setdefault(interval.spill_at, []).append(
+                    (interval.name, f"R{interval.register}", address)
+                )
+            for use in interval.uses:
+                if use >= interval.spill_at:
+                    reloads_before.setdefault(use, []).append((interval.name, address))
+
+        rewritten = []
+        spill_count = reload_count = 0
+        for index, instruction in enumerate(instructions):
+            for name, register, address in spills_before.get(index, ()):
+                rewritten.append(NeoASMInstruction(
+                    Opcode.SPILL, name, (("REGISTER", register), ("ADDRESS", address)),
+                    uses=(name,), context=instruction.context,
+                ))
+                spill_count += 1
+            for scratch, (name, address) in enumerate(reloads_before.get(index, ())):
+                rewritten.append(NeoASMInstruction(
+                    Opcode.RELOAD, name, (("ADDRESS", address), ("REGISTER", f"R{allocatable + scratch}")),
+                    uses=(name,), context=instruction.context,
+                ))
+                reload_count += 1
+            for register in declaration_registers.get(index, ()):
+                instruction.add_operand("REGISTER", register)
+            rewritten.append(instruction)
+        return rewritten, spill_count, reload_count
@@ -0,0 +1,339 @@
+import mmap
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+from Instruction_IR import Opcode
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Bytes per staging slot
+DEFAULT_DEPTH = 2  # Staging slots: two gives classic double buffering
+REGION_KINDS = ("mmap", "file", "shared", "device", "arena")
+
+# Endpoint names that stand for device memory; on a CPU-only machine they are
+# backed by a local stand-in buffer
+_DEVICE_NAMES = ("GPU", "DEVICE", "VRAM")
+
+
+def default_region_kind(name):
+    return "device" if any(device in str(name).upper() for device in _DEVICE_NAMES) else "mmap"
+
+
+class MemoryRegion:
+    """A named block of memory exposed as a writable memoryview.
+
+    kind selects the backing: "mmap" (anonymous mapping), "file" (mapping of
+    path, created or grown to size), "shared" (multiprocessing shared memory,
+    attached by name when shared_name is given), "device" (a local stand-in
+    for device memory, where a real upload would go) or "arena" (a block of
+    a mapped AOT arena image, passed as view and owned by the arena).
+    """
+
+    __slots__ = ('name', 'kind', 'size', 'view', '_backing', '_file', '_owner')
+
+    def __init__(self, name, size, kind="mmap", path=None, shared_name=None, view=None):
+        if kind not in REGION_KINDS:
+            raise ValueError(f"Unknown region kind {kind}, expected one of {REGION_KINDS}")
+        if size < 1:
+            raise ValueError(f"Region {name} needs a positive size")
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self._file = None
+        self._owner = True
+        if kind == "mmap":
+            self._backing = mmap.mmap(-1, size)
+        elif kind == "file":
+            if path is None:
+                raise ValueError(f"File region {name} needs a path")
+            self._file = open(path, "a+b")
+            if os.fstat(self._file.fileno()).st_size < size:
+                self._file.truncate(size)
+            self._backing = mmap.mmap(self._file.fileno(), size)
+        elif kind == "arena":
+            if view is None or len(view) < size:
+                raise ValueError(f"Arena region {name} needs a view of at least {size} B")
+            self._backing = view
+            self._owner = False
+        elif kind == "shared":
+            if shared_name is not None:
+                self._backing = shared_memory.SharedMemory(name=shared_name)
+                self._owner = False
+            else:
+                self._backing = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._backing = bytearray(size)
+        buffer = self._backing.buf if kind == "shared" else self._backing
+        self.view = memoryview(buffer)[:size]
+
+    @property
+    def shared_name(self):
+        return self._backing.name if self.kind == "shared" else None
+
+    def close(self):
+        if self.view is None:
+            return
+        self.view.release()
+        self.view = None
+        if self.kind == "shared":
+            self._backing.close()
+            if self._owner:
+                self._backing.unlink()
+        elif self.kind in ("mmap", "file"):
+            self._backing.close()
+        elif self.kind == "arena":
+            self._backing.release()  # So the arena itself can be closed
+        if self._file is not None:
+            self._file.close()
+        self._backing = None
+
+
+class DoubleBuffer:
+    """A ring of equally sized staging slots carved out of one memory region.
+
+    A producer acquire()s a free slot, fills it and publish()es it; a consumer
+    takes filled slots in order with next_filled() and release()s them. With
+    two or more slots the producer fills one slot while the consumer drains
+    another. Time either side spends blocked is accumulated in
+    producer_stall and consumer_stall.
+    """
+
+    def __init__(self, slot_size=DEFAULT_CHUNK_SIZE, depth=DEFAULT_DEPTH, kind="mmap"):
+        self.slot_size = slot_size
+        self.region = MemoryRegion("staging", slot_size * depth, kind)
+        self.slots = [self.region.view[index * slot_size:(index + 1) * slot_size] for index in range(depth)]
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        for index in range(depth):
+            self._free.put(index)
+        self.producer_stall = 0.0
+        self.consumer_stall = 0.0
+        self.cancelled = False
+
+    def acquire(self):
+        started = time.perf_counter()
+        index = self._free.get()
+        self.producer_stall += time.perf_counter() - started
+        return index
+
+    def publish(self, index, nbytes, offset):
+        self._filled.put((index, nbytes, offset))
+
+    def finish(self, error=None):
+        # Producer side: no more slots will be published
+        self._filled.put((None, 0, error))
+
+    def next_filled(self):
+        # (slot index, filled view, stream offset), or None at the end of the stream
+        started = time.perf_counter()
+        index, nbytes, offset = self._filled.get()
+        self.consumer_stall += time.perf_counter() - started
+        if index is None:
+            if offset is not None:
+                raise offset  # The producer failed
+            return None
+        return index, self.slots[index][:nbytes], offset
+
+    def release(self, index):
+        self._free.put(index)
+
+    def cancel(self):
+        # Consumer side: stop the producer, waking it if it waits for a slot
+        self.cancelled = True
+        for _ in self.slots:
+            self._free.put(None)
+
+    def close(self):
+        for slot in self.slots:
+            slot.release()
+        self.slots = []
+        self.region.close()
+
+
+def _reader(source):
+    # A function filling a memoryview from source and returning the byte
+    # count (0 at the end): file objects and sockets read straight into the
+    # view, in-memory buffers are copied from with slice assignment
+    readinto = getattr(source, "readinto", None) or getattr(source, "recv_into", None)
+    if readinto is not None:
+        return readinto
+    data = source.view if isinstance(source, MemoryRegion) else memoryview(source).cast("B")
+    position = 0
+
+    def read_into(view):
+        nonlocal position
+        count = min(len(view), len(data) - position)
+        view[:count] = data[position:position + count]
+        position += count
+        return count
+    return read_into
+
+
+class NeoASMStreamTransport:
+    """Move data along map declarations between memory-mapped regions.
+
+    Every endpoint name (RAM, RAM_STREAM, GPU, an AOT block...) gets a
+    MemoryRegion, created by open_region() or on first use. transfer() moves
+    a map's data from its source to its destination:
+
+    * source region to destination region: chunk by chunk with memoryview
+      slice assignment, one copy per byte and no staging;
+    * a stream (file object, socket or bytes-like) to the destination: a
+      producer thread reads straight into a DoubleBuffer slot (readinto)
+      while the caller's thread drains the other slot into the destination,
+      or hands it to consumer(view, offset) to be processed in place.
+
+    Names that look like device memory (GPU, DEVICE, VRAM) default to the
+    "device" stand-in region.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, depth=DEFAULT_DEPTH):
+        self.chunk_size = chunk_size
+        self.depth = depth
+        self.regions = {}  # Endpoint name -> MemoryRegion
+        self.routes = {}  # Map name -> (source endpoint, destination endpoint)
+        self.stats = {}  # Report of the last transfer
+
+    def load(self, instructions):
+        # Record the route of every MAP instruction of a generated program
+        for instruction in instructions:
+            if instruction.opcode == Opcode.MAP:
+                self.routes[instruction.name] = (instruction.operand("SRC"), instruction.operand("DST"))
+
+    def open_region(self, name, size, kind=None, path=None, shared_name=None, view=None):
+        if name in self.regions:
+            self.regions[name].close()
+        region = MemoryRegion(name, size, kind or default_region_kind(name), path, shared_name, view)
+        self.regions[name] = region
+        return region
+
+    def attach_arena(self, arena):
+        # Use the blocks of a mapped AOT arena image (see AOT_Arena) as the
+        # regions of the endpoints they are named after
+        for name in arena:
+            view = arena.block(name)
+            self.open_region(name, len(view), "arena", view=view)
+
+    def region(self, name, size=None):
+        # The region of an endpoint, created with the default kind if needed
+        region = self.regions.get(name)
+        if region is None:
+            if size is None:
+                raise KeyError(f"No region for {name}; open it first or pass a size")
+            region = self.open_region(name, size)
+        return region
+
+    def transfer(self, map_name, source=None, consumer=None, offset=0):
+        # Move the map's data into its destination region, starting at
+        # offset; source defaults to the map's source region. Returns the
+        # number of bytes moved.
+        if map_name not in self.routes:
+            raise KeyError(f"Unknown map {map_name}")
+        source_name, destination_name = self.routes[map_name]
+        if source is None:
+            source = self.region(source_name)
+        destination = None
+        if consumer is None:
+            size = source.size if isinstance(source, MemoryRegion) else None
+            destination = self.region(destination_name, size)
+
+        started = time.perf_counter()
+        if isinstance(source, MemoryRegion) and consumer is None:
+            moved, chunks = self._copy_regions(source, destination, offset)
+            stalls = (0.0, 0.0)
+            staged = False
+        else:
+            moved, chunks, stalls = self._stream(_reader(source), destination, consumer, offset)
+            staged = True
+
+        elapsed = time.perf_counter() - started
+        self.stats = {
+            "map": map_name,
+            "bytes": moved,
+            "chunks": chunks,
+            "staged": staged,
+            "seconds": elapsed,
+            "bytes_per_second": moved / elapsed if elapsed > 0 else 0.0,
+            "producer_stall": stalls[0],
+            "consumer_stall": stalls[1],
+        }
+        return moved
+
+    def _copy_regions(self, source, destination, offset):
+        count = min(source.size, destination.size - offset)
+        if count < 0:
+            raise ValueError(f"Offset {offset} is past the end of region {destination.name}")
+        chunks = 0
+        for start in range(0, count, self.chunk_size):
+            stop = min(start + self.chunk_size, count)
+            destination.view[offset + start:offset + stop] = source.view[start:stop]
+            chunks += 1
+        return count, chunks
+
+    def _stream(self, read_into, destination, consumer, offset):
+        ring = DoubleBuffer(self.chunk_size, self.depth)
+        limit = destination.size if destination is not None else None
+
+        def produce():
+            position = offset
+            try:
+                while True:
+                    index = ring.acquire()
+                    if ring.cancelled:
+                        break
+                    space = len(ring.slots[index])
+                    if limit is not None:
+                        space = max(0, min(space, limit - position))
+                    # Released even when read_into raises: the traceback
+                    # would otherwise keep the staging region exported
+                    with ring.slots[index][:space] as slot:
+                        count = read_into(slot) if space else 0
+                    if not count:
+                        ring.release(index)
+                        break
+                    ring.publish(index, count, position)
+                    position += count
+                ring.finish()
+            except BaseException as error:
+                ring.finish(error)
+
+        producer = threading.Thread(target=produce, name="neoasm-map-producer", daemon=True)
+        producer.start()
+        moved = chunks = 0
+        try:
+            while True:
+                filled = ring.next_filled()
+                if filled is None:
+                    break
+                index, view, position = filled
+                count = len(view)
+                try:
+                    if consumer is not None:
+                        consumer(view, position)
+                    else:
+                        destination.view[position:position + count] = view
+                finally:
+                    view.release()
+                    ring.release(index)
+                moved += count
+                chunks += 1
+        except BaseException:
+            ring.cancel()
+            raise
+        finally:
+            producer.join()
+            stalls = (ring.producer_stall, ring.consumer_stall)
+            ring.close()
+        return moved, chunks, stalls
+
+    def close(self):
+        for region in self.regions.values():
+            region.close()
+        self.regions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
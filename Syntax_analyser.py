@@ -1,4 +1,237 @@
+import mmap
 import re
+from array import array
+
+from AST_Nodes import (AOTNode, ExecNode, FrameNode, LinkNode, MapEntry, MapNode, PacketNode,
+                       SimdNode, StrMapNode, ValidateNode, VariableNode)
+from Profiler import count, phase
+
+# Token specifications, in match-priority order, after the token classes of
+# Grammar.bnf. The position of each entry is also its integer kind ID in the
+# compact token storage. Attribute keys ("range:") come before the keywords,
+# so "exec:" is a key and not EXEC; keywords come before IDENTIFIER (which
+# would match them too) and end at a word boundary, so variant is an
+# identifier and not var followed by iant.
+TOKEN_SPECIFICATIONS = [
+    ('COMMENT', r'//[^\n]*'),
+    ('STRING', r'"(?:[^"\\\n]|\\.)*"'),
+    ('KEY', r'[A-Za-z_][A-Za-z0-9_]*[ \t]*:'),
+    ('FRAME', r'frame\b'),
+    ('MAP', r'map\b'),
+    ('VAR', r'var\b'),
+    ('AOT', r'AOT\b'),
+    ('PACKET', r'pkt\b'),
+    ('SIMD', r'vec_(?:mul|add|sub|div|dot|cross)\b'),
+    ('STR_MAP', r'str_map\b'),
+    ('EXEC', r'exec\b'),
+    ('VALIDATE', r'validate\b'),
+    ('LINK', r'link\b'),
+    ('IDENTIFIER', r'[A-Za-z_][A-Za-z0-9_]*'),
+    ('RANGE', r'\d+\.\.\d+'),
+    ('SIZE', r'\d+[KMGT]?B\b'),
+    ('NUMBER', r'\d+'),
+    ('COLON', r':'),
+    ('COMMA', r','),
+    ('LBRACE', r'\{'),
+    ('RBRACE', r'\}'),
+    ('PUNCTUATION', r'[()\[\];=]'),
+    ('WHITESPACE', r'\s+'),
+    ('OTHER', r'.'),
+]
+
+TOKEN_KINDS = tuple(pair[0] for pair in TOKEN_SPECIFICATIONS)
+TOKEN_KIND_IDS = {kind: kind_id for kind_id, kind in enumerate(TOKEN_KINDS)}
+
+# Kind IDs that never reach the token stream
+SKIPPED_KIND_IDS = frozenset((TOKEN_KIND_IDS['WHITESPACE'], TOKEN_KIND_IDS['COMMENT']))
+
+# Statement keyword -> parse method; a keyword is also accepted where an
+# identifier is expected (a variable may be called "map")
+STATEMENT_PARSERS = {
+    'FRAME': 'parse_frame',
+    'MAP': 'parse_map',
+    'VAR': 'parse_variable',
+    'AOT': 'parse_AOT',
+    'PACKET': 'parse_packet',
+    'SIMD': 'parse_simd',
+    'STR_MAP': 'parse_str_map',
+    'EXEC': 'parse_exec',
+    'VALIDATE': 'parse_validate',
+    'LINK': 'parse_link',
+}
+NAME_KINDS = ('IDENTIFIER',) + tuple(STATEMENT_PARSERS)
+VALUE_KINDS = NAME_KINDS + ('STRING', 'NUMBER', 'RANGE', 'SIZE')
+SIZE_KINDS = ('SIZE', 'NUMBER')
+
+VARIABLE_TYPES = ("INT", "FLOAT", "STRING", "VECTOR", "BOOL", "AOT")
+CHECK_TYPES = ("rigid", "soft")
+AOT_KINDS = ("STATIC", "SOFT", "RIGID", "PRELINK")
+
+# Attribute key -> token kinds of its value, per statement
+OPERATION_ATTRIBUTES = {'in': NAME_KINDS + ('STRING',), 'out': NAME_KINDS, 'op': VALUE_KINDS, 'device': NAME_KINDS}
+EXEC_ATTRIBUTES = {'link': NAME_KINDS, 'size': SIZE_KINDS, 'op': VALUE_KINDS, 'device': NAME_KINDS}
+PACKET_ATTRIBUTES = {'size': SIZE_KINDS, 'exec': NAME_KINDS, 'priority': NAME_KINDS}
+
+# The master pattern is compiled once, for text and for bytes/mmap sources.
+# Every alternative is a single named group without inner groups, so
+# match.lastindex - 1 is the kind ID of the match.
+MASTER_PATTERN = '|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in TOKEN_SPECIFICATIONS)
+MASTER_REGEX = re.compile(MASTER_PATTERN)
+# In the bytes pattern OTHER consumes a whole UTF-8 sequence, so mapped files
+# produce the same tokens as their decoded text
+MASTER_REGEX_BYTES = re.compile(
+    MASTER_PATTERN.replace('(?P<OTHER>.)', r'(?P<OTHER>[\xc0-\xf7][\x80-\xbf]*|.)').encode('ascii')
+)
+
+# The longest text each token class looks at from a token's start, matched
+# or not; a token whose probe runs into the end of a chunk is not final yet
+PROBE_PATTERN = r'"(?:[^"\\\n]|\\.)*\\?|[A-Za-z_][A-Za-z0-9_]*[ \t]*|\d+(?:\.\.?\d*|[KMGT]?B?)|[\s\S]'
+PROBE_REGEX = re.compile(PROBE_PATTERN)
+PROBE_REGEX_BYTES = re.compile(PROBE_PATTERN.encode('ascii'))
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Characters (or bytes) read per chunk from file objects
+
+
+def _decode(value):
+    # Token values taken from bytes/mmap sources are handed out as str
+    if isinstance(value, str):
+        return value
+    return bytes(value).decode('utf-8', 'replace')
+
+
+def iter_token_spans(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (kind_id, start, end, value) for every significant token in source.
+
+    source may be a str, a bytes-like object, an mmap or a file object opened
+    in text or binary mode. File objects are consumed in chunks of chunk_size,
+    so memory use stays bounded by the chunk size rather than the file size.
+    Offsets are in characters for text sources and in bytes otherwise.
+    """
+    if hasattr(source, 'read') and not isinstance(source, mmap.mmap):
+        yield from _iter_chunked_spans(source, chunk_size)
+        return
+
+    regex = MASTER_REGEX if isinstance(source, str) else MASTER_REGEX_BYTES
+    skipped = SKIPPED_KIND_IDS
+    for match in regex.finditer(source):
+        kind_id = match.lastindex - 1
+        if kind_id not in skipped:
+            yield kind_id, match.start(), match.end(), match.group()
+
+
+def _iter_chunked_spans(reader, chunk_size):
+    # A token near the end of the buffered text may lex differently once the
+    # next chunk is read: it may grow ("12" -> "128B"), or an alternative
+    # that failed at its start may still match ("range " -> "range :", an
+    # unterminated '"'). From the first such token on, the text is held back
+    # and lexed again with the next chunk.
+    skipped = SKIPPED_KIND_IDS
+    regex = None
+    probe = None
+    newline = None
+    pending = None
+    base = 0  # Absolute offset of pending[0]
+
+    while True:
+        chunk = reader.read(chunk_size)
+        at_eof = not chunk
+        if pending is None:
+            if at_eof:
+                return
+            if isinstance(chunk, str):
+                regex, probe, newline = MASTER_REGEX, PROBE_REGEX, '\n'
+            else:
+                regex, probe, newline = MASTER_REGEX_BYTES, PROBE_REGEX_BYTES, b'\n'
+            pending = chunk
+        elif not at_eof:
+            pending += chunk
+
+        # No probe crosses a line break, so only the last line needs probing
+        last_line = len(pending) if at_eof else pending.rfind(newline)
+        resume = len(pending)
+        for match in regex.finditer(pending):
+            if match.start() > last_line and (match.end() == len(pending)
+                                              or probe.match(pending, match.start()).end() == len(pending)):
+                resume = match.start()
+                break
+            kind_id = match.lastindex - 1
+            if kind_id not in skipped:
+                yield kind_id, base + match.start(), base + match.end(), match.group()
+
+        if at_eof:
+            return
+        base += resume
+        pending = pending[resume:]
+
+
+class NeoASMTokenBuffer:
+    """Compact token storage: kind IDs and start/end offsets in flat arrays.
+
+    Values are sliced out of the source only when a token is accessed, so a
+    token costs 17 bytes instead of a tuple plus a string. Indexing returns the
+    same (kind, value) pairs that NeoASMSyntaxAnalyzer.tokens holds, which lets
+    the buffer stand in for the token list during parsing.
+    """
+
+    def __init__(self, source, owned_mmap=None):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self._owned_mmap = owned_mmap  # Closed together with the buffer
+
+    def append(self, kind_id, start, end):
+        self.kinds.append(kind_id)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return TOKEN_KINDS[self.kinds[index]], self.value(index)
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def kind(self, index):
+        return TOKEN_KINDS[self.kinds[index]]
+
+    def kind_id(self, index):
+        return self.kinds[index]
+
+    def span(self, index):
+        return self.starts[index], self.ends[index]
+
+    def value(self, index):
+        return _decode(self.source[self.starts[index]:self.ends[index]])
+
+    def nbytes(self):
+        # Memory held by the token arrays (the source itself is not counted)
+        return sum(buf.itemsize * len(buf) for buf in (self.kinds, self.starts, self.ends))
+
+    def close(self):
+        if self._owned_mmap is not None:
+            self._owned_mmap.close()
+            self._owned_mmap = None
+        self.source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _map_file(path):
+    # mmap cannot map an empty file, so empty sources fall back to b''
+    with open(path, 'rb') as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
 
 class NeoASMSyntaxAnalyzer:
     def __init__(self):
@@ -8,46 +241,59 @@ class NeoASMSyntaxAnalyzer:
         self.position = 0  # Pointer for token position
 
     def tokenize(self, source_code):
-        # Step 1: Tokenize the input source code using regex
-        token_specifications = [
-            ('VAR', r'VAR'),
-            ('MAP', r'MAP'),
-            ('AOT', r'AOT'),
-            ('PACKET', r'PACKET'),
-            ('INT', r'INT'),
-            ('FLOAT', r'FLOAT'),
-            ('IDENTIFIER', r'[A-Za-z_][A-Za-z0-9_]*'),
-            ('NUMBER', r'\d+'),
-            ('RANGE', r'RANGE'),
-            ('CHECK', r'CHECK'),
-            ('ALIGNED', r'ALIGNED'),
-            ('REGISTER', r'REGISTER'),
-            ('EQUALS', r'='),
-            ('COLON', r':'),
-            ('COMMA', r','),
-            ('LPAREN', r'\('),
-            ('RPAREN', r'\)'),
-            ('LBRACE', r'\{'),
-            ('RBRACE', r'\}'),
-            ('WHITESPACE', r'\s+'),
-            ('NEWLINE', r'\n'),
-            ('OTHER', r'.'),
-        ]
-
-        # Create a combined regex pattern
-        master_pattern = '|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in token_specifications)
-        regex = re.compile(master_pattern)
-
-        # Use finditer to tokenize the input string
-        for match in regex.finditer(source_code):
-            kind = match.lastgroup
-            value = match.group()
-            if kind != 'WHITESPACE' and kind != 'NEWLINE':  # Ignore whitespace and newline
-                self.tokens.append((kind, value))
-        
+        # Step 1: Tokenize the input source code with the precompiled master regex
+        with phase("analyzer.tokenize"):
+            before = len(self.tokens)
+            for kind_id, _, _, value in iter_token_spans(source_code):
+                self.tokens.append((TOKEN_KINDS[kind_id], value))
+            count("tokens", len(self.tokens) - before)
+
         # Reset position to start parsing
         self.position = 0
 
+    def tokenize_stream(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Lazily yield (kind, value) pairs without storing them in self.tokens
+        for kind_id, _, _, value in iter_token_spans(source, chunk_size):
+            yield TOKEN_KINDS[kind_id], _decode(value)
+
+    def tokenize_compact(self, source):
+        # Tokenize into a NeoASMTokenBuffer; source must support slicing
+        # (str, bytes or mmap) because values are sliced on demand
+        buffer = NeoASMTokenBuffer(source)
+        self._fill_buffer(buffer, source)
+        return buffer
+
+    def tokenize_file(self, path, compact=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Tokenize a file through a read-only memory map. In compact mode the
+        # map stays open for on-demand slicing until the buffer is closed;
+        # otherwise a lazy (kind, value) generator is returned.
+        mapped = _map_file(path)
+        if compact:
+            source = mapped if mapped is not None else b''
+            buffer = NeoASMTokenBuffer(source, owned_mmap=mapped)
+            self._fill_buffer(buffer, source)
+            return buffer
+        return self._stream_mapped(mapped, chunk_size)
+
+    def _stream_mapped(self, mapped, chunk_size):
+        if mapped is None:
+            return
+        try:
+            yield from self.tokenize_stream(mapped, chunk_size)
+        finally:
+            mapped.close()
+
+    def _fill_buffer(self, buffer, source):
+        append = buffer.append
+        with phase("analyzer.tokenize"):
+            for kind_id, start, end, _ in iter_token_spans(source):
+                append(kind_id, start, end)
+            count("tokens", len(buffer))
+
+        # The compact buffer replaces the token list for parsing
+        self.tokens = buffer
+        self.position = 0
+
     def advance(self):
         # Advance to the next token
         self.position += 1
@@ -56,102 +302,196 @@ class NeoASMSyntaxAnalyzer:
         else:
             self.current_token = None
 
-    def expect(self, kind):
-        # Ensure that the current token matches the expected kind
-        if self.current_token[0] == kind:
+    def expect(self, *kinds):
+        # Ensure that the current token matches one of the expected kinds
+        if self.current_token is None:
+            raise SyntaxError(f"Expected {' or '.join(kinds)} but got end of input")
+        if self.current_token[0] in kinds:
             value = self.current_token[1]
             self.advance()
             return value
         else:
-            raise SyntaxError(f"Expected {kind} but got {self.current_token[0]}")
+            raise SyntaxError(f"Expected {' or '.join(kinds)} but got {self.current_token[0]}")
+
+    def expect_key(self, attributes, context):
+        # Consume a "key:" (or "key" ":") among the keys of attributes and
+        # return the key; the grammar allows nothing else in the block
+        if self.current_token is not None and self.current_token[0] == 'KEY':
+            key = self.current_token[1][:-1].rstrip()
+            self.advance()
+        else:
+            key = self.expect(*NAME_KINDS)
+            self.expect('COLON')
+        if key not in attributes:
+            raise SyntaxError(f"Unexpected attribute {key!r} in {context}, "
+                              f"expected one of {', '.join(key + ':' for key in attributes)}")
+        return key
+
+    def expect_value(self, *kinds):
+        # Consume a value of one of kinds; strings lose their quotes
+        is_string = self.current_token is not None and self.current_token[0] == 'STRING'
+        value = self.expect(*kinds)
+        return value[1:-1] if is_string else value
+
+    def expect_word(self, words, context):
+        # Consume an identifier spelled as one of words
+        if self.current_token is None or self.current_token[1] not in words:
+            raise SyntaxError(f"Expected {' or '.join(words)} in {context}")
+        return self.expect(*NAME_KINDS)
+
+    def skip_comma(self):
+        if self.current_token is not None and self.current_token[0] == 'COMMA':
+            self.advance()
+
+    def parse_attributes(self, attributes, context):
+        # Parse '{' key: value [,] ... '}' into a dict; attributes maps every
+        # key the statement allows to the token kinds of its value
+        self.expect('LBRACE')
+        values = {}
+        while self.current_token is not None and self.current_token[0] != 'RBRACE':
+            key = self.expect_key(attributes, context)
+            values[key] = self.expect_value(*attributes[key])
+            self.skip_comma()
+        self.expect('RBRACE')
+        return values
 
     def parse(self):
         # Start parsing the source code into an AST
-        self.advance()
-        ast = []
-
-        while self.current_token:
-            if self.current_token[0] == 'VAR':
-                ast.append(self.parse_variable())
-            elif self.current_token[0] == 'MAP':
-                ast.append(self.parse_map())
-            elif self.current_token[0] == 'AOT':
-                ast.append(self.parse_AOT())
-            elif self.current_token[0] == 'PACKET':
-                ast.append(self.parse_packet())
-            else:
-                self.advance()
+        with phase("analyzer.parse"):
+            # Start at the current token; advance() would skip the first one
+            self.current_token = self.tokens[self.position] if self.position < len(self.tokens) else None
+            ast = []
+
+            while self.current_token:
+                ast.append(self.parse_statement())
 
+            count("nodes", len(ast))
         return ast
 
+    def parse_statement(self):
+        # Each parse_* method leaves the current token just past the closing '}'
+        method = STATEMENT_PARSERS.get(self.current_token[0])
+        if method is None:
+            raise SyntaxError(f"Expected a statement but got {self.current_token[0]} {self.current_token[1]!r}")
+        return getattr(self, method)()
+
+    def parse_frame(self):
+        # Parse frames and the statements inside them
+        self.expect('FRAME')
+        frame_name = self.expect(*NAME_KINDS)
+        self.expect('LBRACE')
+        body = []
+        while self.current_token is not None and self.current_token[0] != 'RBRACE':
+            body.append(self.parse_statement())
+        self.expect('RBRACE')
+
+        count("nodes", len(body))
+        return FrameNode(frame_name, body)
+
     def parse_variable(self):
         # Parse variable declarations
         self.expect('VAR')
-        var_type = self.expect('IDENTIFIER')
-        var_name = self.expect('IDENTIFIER')
-        self.expect('RANGE')
-        var_range = self.expect('NUMBER')
-        self.expect('CHECK')
-        var_check = self.expect('IDENTIFIER')
+        var_type = self.expect_word(VARIABLE_TYPES, "var")
+        var_name = self.expect(*NAME_KINDS)
+        self.expect('LBRACE')
+        attributes = {}
+        while self.current_token is not None and self.current_token[0] != 'RBRACE':
+            key = self.expect_key(('range', 'check'), "var")
+            if key == 'range':
+                attributes[key] = self.expect('RANGE')
+            else:
+                attributes[key] = self.expect_word(CHECK_TYPES, "var")
+            self.skip_comma()
+        self.expect('RBRACE')
 
         # Memory alignment and register allocation will be handled later during code generation
-        return {
-            'type': 'variable',
-            'var_type': var_type,
-            'identifier': var_name,
-            'attributes': {
-                'range': var_range,
-                'check': var_check
-            }
-        }
+        return VariableNode(var_type, var_name, attributes.get('range'), attributes.get('check'))
 
     def parse_map(self):
-        # Parse map declarations
+        # Parse map declarations; any key is allowed
         self.expect('MAP')
-        self.expect('LPAREN')
-        src = self.expect('IDENTIFIER')
-        self.expect('ARROW')
-        dst = self.expect('IDENTIFIER')
-        self.expect('RPAREN')
-
-        return {
-            'type': 'map',
-            'identifier': src,
-            'entries': [{'key': 'src', 'value': src}, {'key': 'dst', 'value': dst}]
-        }
+        map_name = self.expect(*NAME_KINDS)
+        self.expect('LBRACE')
+        entries = []
+        while self.current_token is not None and self.current_token[0] != 'RBRACE':
+            if self.current_token[0] == 'KEY':
+                key = self.current_token[1][:-1].rstrip()
+                self.advance()
+            else:
+                key = self.expect(*NAME_KINDS)
+                self.expect('COLON')
+            entries.append(MapEntry(key, self.expect_value(*VALUE_KINDS)))
+            self.skip_comma()
+        self.expect('RBRACE')
+
+        return MapNode(map_name, entries)
 
     def parse_AOT(self):
-        # Parse AOT declarations
+        # Parse AOT declarations: a kind and a size, in any order
         self.expect('AOT')
-        aot_name = self.expect('IDENTIFIER')
-        self.expect('IDENTIFIER')  # Type
-        aot_type = self.expect('IDENTIFIER')
-        self.expect('NUMBER')  # Size
-        size = self.expect('NUMBER')
-
-        return {
-            'type': 'AOT',
-            'identifier': aot_name,
-            'attributes': {'type': aot_type, 'size': size}
-        }
+        aot_name = self.expect(*NAME_KINDS)
+        self.expect('LBRACE')
+        aot_type = size = None
+        while self.current_token is not None and self.current_token[0] != 'RBRACE':
+            if self.current_token[1] in AOT_KINDS:
+                aot_type = self.expect(*NAME_KINDS)
+            else:
+                self.expect_key(('size',), "AOT")
+                size = self.expect(*SIZE_KINDS)
+            self.skip_comma()
+        self.expect('RBRACE')
+
+        return AOTNode(aot_name, aot_type, size)
 
     def parse_packet(self):
         # Parse packet declarations
         self.expect('PACKET')
-        packet_name = self.expect('IDENTIFIER')
-        self.expect('SIZE')
-        size = self.expect('NUMBER')
+        packet_name = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes(PACKET_ATTRIBUTES, "pkt")
+
+        return PacketNode(packet_name, attributes.get('size'), attributes.get('exec'), attributes.get('priority'))
+
+    def parse_simd(self):
+        # Parse vec_* operations; the identifier is optional
+        simd_type = self.expect('SIMD')[len("vec_"):]
+        identifier = None
+        if self.current_token is not None and self.current_token[0] != 'LBRACE':
+            identifier = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes(OPERATION_ATTRIBUTES, "vec_" + simd_type)
+
+        return SimdNode(simd_type, identifier, attributes.get('in'), attributes.get('out'), attributes.get('op'),
+                        attributes.get('device'))
+
+    def parse_str_map(self):
+        # Parse str_map operations
+        self.expect('STR_MAP')
+        identifier = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes(OPERATION_ATTRIBUTES, "str_map")
+
+        return StrMapNode(identifier, attributes.get('op'), attributes.get('in'), attributes.get('out'),
+                          attributes.get('device'))
+
+    def parse_exec(self):
+        # Parse exec operations
         self.expect('EXEC')
-        exec_mode = self.expect('IDENTIFIER')
-        self.expect('PRIORITY')
-        priority = self.expect('IDENTIFIER')
-
-        return {
-            'type': 'packet',
-            'identifier': packet_name,
-            'attributes': {
-                'size': size,
-                'exec': exec_mode,
-                'priority': priority
-            }
-        }
+        identifier = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes(EXEC_ATTRIBUTES, "exec")
+
+        return ExecNode(identifier, attributes.get('link'), attributes.get('size'), attributes.get('op'),
+                        attributes.get('device'))
+
+    def parse_validate(self):
+        # Parse validate operations
+        self.expect('VALIDATE')
+        identifier = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes({'rule': VALUE_KINDS}, "validate")
+
+        return ValidateNode(identifier, attributes.get('rule'))
+
+    def parse_link(self):
+        # Parse link operations
+        self.expect('LINK')
+        identifier = self.expect(*NAME_KINDS)
+        attributes = self.parse_attributes({'src': NAME_KINDS, 'dst': NAME_KINDS}, "link")
+
+        return LinkNode(identifier, attributes.get('src'), attributes.get('dst'))
@@ -0,0 +1,280 @@
+import os
+import re
+import warnings
+
+from AST_Nodes import (AOTNode, ExecNode, FrameNode, LinkNode, MapEntry, MapNode, PacketNode,
+                       SimdNode, StrMapNode, ValidateNode, VariableNode)
+from Parser_Generator import DEFAULT_GRAMMAR, EOF, NO_PRODUCTION, build_parse_table, grammar_hash
+from Profiler import count, phase
+
+try:
+    import Parse_Table
+except ImportError:  # Not generated yet; the tables are built from Grammar.bnf on first use
+    Parse_Table = None
+
+_TABLE_NAMES = ("GRAMMAR_HASH", "TERMINALS", "NONTERMINALS", "ACTIONS", "START", "MARK", "TOKEN_PATTERN",
+                "TOKEN_CLASSES", "LITERALS", "FALLBACK", "ENTRIES", "TABLE", "FIRST")
+
+_tables = None
+
+
+def load_parse_table(grammar_path=DEFAULT_GRAMMAR):
+    # The tables of Parse_Table.py, or tables built from the grammar when the
+    # generated module is missing or older than the grammar; loaded once per
+    # process
+    global _tables
+    if _tables is not None:
+        return _tables
+    tables = None
+    if Parse_Table is not None:
+        tables = {name: getattr(Parse_Table, name) for name in _TABLE_NAMES}
+    if os.path.exists(grammar_path):
+        with open(grammar_path, "r", encoding="utf-8") as file:
+            grammar_text = file.read()
+        if tables is None or tables["GRAMMAR_HASH"] != grammar_hash(grammar_text):
+            if tables is not None:
+                warnings.warn("Parse_Table.py is out of date with Grammar.bnf; run Parser_Generator.py",
+                              RuntimeWarning, stacklevel=2)
+            tables = build_parse_table(grammar_text)
+    if tables is None:
+        raise ImportError("No parse table: Parse_Table.py and Grammar.bnf are both missing")
+    _tables = tables
+    return tables
+
+
+class NeoASMTableParser:
+    """Table-driven LL(1) parser for the grammar in Grammar.bnf.
+
+    The lexer is one re.findall() over the source; every lexeme is then
+    mapped to an integer token kind through a dict (keywords first, token
+    classes for the rest), so both steps run in C. The driver loop pops
+    integer symbols off a stack: terminals are compared with the current
+    kind, nonterminals are expanded through the flat table, and actions
+    build the AST nodes of the rules they end. It produces the same nodes
+    as NeoASMParser, and rejects what the grammar does not allow.
+    """
+
+    def __init__(self, tables=None):
+        tables = tables or load_parse_table()
+        self.tables = tables
+        self.regex = re.compile(tables["TOKEN_PATTERN"])
+        self.class_regexes = [(re.compile(pattern), kind) for pattern, kind in tables["TOKEN_CLASSES"]]
+        literals = tables["LITERALS"]
+        self.literals = literals
+        self.string_kind = tables["TERMINALS"].index("<string>")
+        self.brace_kind = literals["{"]
+        self.colon_kind = literals[":"]
+        # Keyword kinds of attribute keys -> attribute name
+        self.key_names = {kind: literal[:-1] for literal, kind in literals.items() if literal.endswith(":")
+                          and len(literal) > 1}
+        self.key_kind = tables["TERMINALS"].index("<key>")
+        self.aot_kinds = frozenset(tables["FIRST"]["AOT_kind"])
+        self.builders = tuple(getattr(self, "build_" + action) for action in tables["ACTIONS"])
+        self._compile()
+
+    def tokenize(self, source_code):
+        # (kinds, values): parallel lists of token kinds and values, ending in EOF
+        self.source_code = source_code  # Kept for error messages
+        with phase("table.tokenize"):
+            values = self.regex.findall(source_code)
+            kinds_by_value = dict(self.literals)
+            kinds_by_value[""] = 0  # The empty match at the end of the input
+            for value in set(values).difference(kinds_by_value):
+                kinds_by_value[value] = self.classify(value)
+            kinds = list(map(kinds_by_value.__getitem__, values))
+            # String literals lose their quotes, as in tokenize_source()
+            unquoted = {value: value[1:-1] for value, kind in kinds_by_value.items() if kind == self.string_kind}
+            if unquoted:
+                values = list(map(unquoted.get, values, values))
+            count("tokens", len(values) - 1)
+        return kinds, values
+
+    def classify(self, value):
+        # Kind of a lexeme that is not spelled like a keyword
+        literal = self.literals.get("".join(value.split()))  # "range :" is the key "range:"
+        if literal is not None:
+            return literal
+        for regex, kind in self.class_regexes:
+            if regex.fullmatch(value):
+                return kind
+        return 1  # $error
+
+    def parse(self, source_code):
+        kinds, values = self.tokenize(source_code)
+        with phase("table.parse"):
+            nodes = self.drive(kinds, values)
+            count("nodes", self.node_count)
+        return nodes
+
+    def _compile(self):
+        # Re-encode the tables for the driver loop: a nonterminal becomes the
+        # offset of its row, so its cell is cells[symbol + kind]; MARK becomes -1
+        # and action n becomes -2 - n; cells hold the entries themselves
+        tables = self.tables
+        width = len(tables["TERMINALS"])
+        mark = tables["MARK"]
+
+        def encode(symbol):
+            if symbol < width:
+                return symbol
+            if symbol < mark:
+                return (symbol - width + 1) * width
+            return -1 if symbol == mark else mark - 1 - symbol
+
+        entries = [(consumed, opened, tuple(encode(symbol) for symbol in symbols))
+                   for consumed, opened, symbols in tables["ENTRIES"]]
+        self.cells = [None] * width + [entries[entry] if entry >= 0 else None for entry in tables["TABLE"]]
+        self.start = encode(tables["START"])
+
+    def drive(self, kinds, values):
+        width = len(self.tables["TERMINALS"])
+        cells = self.cells
+        fallback = self.tables["FALLBACK"]
+        builders = self.builders
+        kinds = kinds + [0]  # Read once more after EOF is matched
+
+        nodes = []  # Built nodes; a frame takes its children off the end
+        marks = []  # (token position, len(nodes)) where each open node began
+        self.node_count = 0
+        self.token_key_names = list(map(self.key_names.get, kinds))  # Attribute name of each key token
+        stack = [0, self.start]
+        pop = stack.pop
+        push = stack.extend
+        position = 0
+        kind = kinds[0]
+        while stack:
+            symbol = pop()
+            if symbol >= width:
+                cell = cells[symbol + kind]
+                if cell is None:
+                    cell = cells[symbol + fallback[kind]]
+                    if cell is None:
+                        self.fail(values, kinds, position, None, symbol // width - 1)
+                consumed, opened, symbols = cell
+                if opened:
+                    marks += [(position, len(nodes))] * opened
+                if consumed:
+                    position += 1
+                    kind = kinds[position]
+                push(symbols)
+            elif symbol >= 0:
+                if symbol != kind and symbol != fallback[kind]:
+                    self.fail(values, kinds, position, symbol, None)
+                position += 1
+                kind = kinds[position]
+            elif symbol == -1:
+                marks.append((position, len(nodes)))
+            else:
+                start, first_child = marks.pop()
+                builders[-2 - symbol](kinds, values, start, position, nodes, first_child)
+        return nodes
+
+    def fail(self, values, kinds, position, terminal, nonterminal):
+        # Raise a SyntaxError naming the token, its line and what was expected
+        tables = self.tables
+        if terminal is not None:
+            expected = [tables["TERMINALS"][terminal]]
+        else:
+            row = nonterminal * len(tables["TERMINALS"])
+            expected = [name for index, name in enumerate(tables["TERMINALS"])
+                        if tables["TABLE"][row + index] != NO_PRODUCTION]
+        expected = ["end of input" if name == EOF else name for name in expected]
+        if kinds[position] == 0:
+            raise SyntaxError(f"Unexpected end of input, expected {' or '.join(expected)}")
+        raise SyntaxError(f"Unexpected {values[position]!r} on line {self.line_of(position)}, "
+                          f"expected {' or '.join(expected)}")
+
+    def line_of(self, position):
+        # Line number of token position; lexes again, but only on errors
+        for index, match in enumerate(self.regex.finditer(self.source_code)):
+            if index == position:
+                return self.source_code.count("\n", 0, match.start(1)) + 1
+        return self.source_code.count("\n") + 1
+
+    def attributes(self, kinds, values, start, end):
+        # {name: value} of the key: value pairs in kinds[start:end]
+        attributes = {}
+        key_names = self.token_key_names
+        for index in range(start, end):
+            name = key_names[index]
+            if name is not None:
+                attributes[name] = values[index + 1]
+        return attributes
+
+    # Actions: start is the position of the rule's first token, end one past
+    # its last, and nodes[first_child:] the nodes built inside it
+
+    def build_frame(self, kinds, values, start, end, nodes, first_child):
+        body = nodes[first_child:]
+        del nodes[first_child:]
+        nodes.append(FrameNode(values[start + 1], body))
+        self.node_count += 1
+
+    def build_map(self, kinds, values, start, end, nodes, first_child):
+        entries = []
+        index = start + 3  # Past 'map' identifier '{'
+        while index < end - 1:
+            if kinds[index] == self.key_kind or kinds[index] in self.key_names:
+                entries.append(MapEntry(values[index][:-1].rstrip(), values[index + 1]))
+                index += 2
+            elif kinds[index + 1] == self.colon_kind:
+                entries.append(MapEntry(values[index], values[index + 2]))
+                index += 3
+            else:
+                index += 1  # ','
+        nodes.append(MapNode(values[start + 1], entries))
+        self.node_count += 1
+
+    def build_variable(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 4, end - 1)
+        nodes.append(VariableNode(values[start + 1], values[start + 2], attributes.get("range"),
+                                  attributes.get("check")))
+        self.node_count += 1
+
+    def build_AOT(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        aot_type = None
+        for index in range(start + 3, end - 1):
+            if kinds[index] in self.aot_kinds:
+                aot_type = values[index]
+        nodes.append(AOTNode(values[start + 1], aot_type, attributes.get("size")))
+        self.node_count += 1
+
+    def build_packet(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        nodes.append(PacketNode(values[start + 1], attributes.get("size"), attributes.get("exec"),
+                                attributes.get("priority")))
+        self.node_count += 1
+
+    def build_simd(self, kinds, values, start, end, nodes, first_child):
+        identifier = None
+        body = start + 1
+        if kinds[body] != self.brace_kind:
+            identifier = values[body]
+            body += 1
+        attributes = self.attributes(kinds, values, body + 1, end - 1)
+        nodes.append(SimdNode(values[start][len("vec_"):], identifier, attributes.get("in"), attributes.get("out"),
+                              attributes.get("op"), attributes.get("device")))
+        self.node_count += 1
+
+    def build_str_map(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        nodes.append(StrMapNode(values[start + 1], attributes.get("op"), attributes.get("in"),
+                                attributes.get("out"), attributes.get("device")))
+        self.node_count += 1
+
+    def build_exec(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        nodes.append(ExecNode(values[start + 1], attributes.get("link"), attributes.get("size"),
+                              attributes.get("op"), attributes.get("device")))
+        self.node_count += 1
+
+    def build_validate(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        nodes.append(ValidateNode(values[start + 1], attributes.get("rule")))
+        self.node_count += 1
+
+    def build_link(self, kinds, values, start, end, nodes, first_child):
+        attributes = self.attributes(kinds, values, start + 3, end - 1)
+        nodes.append(LinkNode(values[start + 1], attributes.get("src"), attributes.get("dst")))
+        self.node_count += 1
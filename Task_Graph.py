@@ -0,0 +1,425 @@
+import asyncio
+import heapq
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from Instruction_IR import Opcode, resolve_exec_links
+from Instruction_Scheduler import DEFAULT_TIMING, build_dependency_graph, select_latency_table
+
+# Opcodes that do work at run time. VAR, AOT and PACKET only declare
+# storage (packets run on NeoASMPacketRuntime), and SPILL/RELOAD belong to
+# the register allocator.
+TASK_OPCODES = (Opcode.MAP, Opcode.LINK, Opcode.VEC, Opcode.STR_MAP, Opcode.EXEC, Opcode.VALIDATE)
+
+
+class TaskSpec:
+    __slots__ = ('index', 'name', 'instruction', 'successors', 'predecessors', 'weight', 'priority')
+
+    def __init__(self, index, name, instruction, weight):
+        self.index = index
+        self.name = name  # Instruction name, with "#2", "#3", ... on later instructions of the same name
+        self.instruction = instruction
+        self.successors = []  # Indices of the tasks that wait for this one
+        self.predecessors = []
+        self.weight = weight  # Estimated cost: latency in cycles, or a weight given by the caller
+        self.priority = weight  # Weight of the heaviest path from this task to the end of the graph
+
+
+class TaskRecord:
+    __slots__ = ('task', 'status', 'result', 'error', 'ready', 'started', 'finished', 'worker')
+
+    def __init__(self, task):
+        self.task = task
+        self.status = None  # "done", "failed" or "blocked" once settled
+        self.result = None
+        self.error = None
+        self.ready = None  # time.perf_counter() timestamps
+        self.started = None
+        self.finished = None
+        self.worker = None  # (pid, thread id) that ran the handler; None when awaited on the event loop
+
+
+def _run_task(handler, instruction):
+    # (result, error, started, finished, worker); a coroutine handler is run
+    # to completion on its own event loop in the worker
+    started = time.perf_counter()
+    try:
+        result = handler(instruction)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        error = None
+    except Exception as exception:
+        result, error = None, exception
+    return result, error, started, time.perf_counter(), (os.getpid(), threading.get_ident())
+
+
+async def _await_task(handler, instruction):
+    started = time.perf_counter()
+    try:
+        result, error = await handler(instruction), None
+    except Exception as exception:
+        result, error = None, exception
+    return result, error, started, time.perf_counter(), None
+
+
+def _reachable(edges, start, within):
+    # The tasks reachable from start along edges through tasks that satisfy within
+    seen = {start}
+    pending = [start]
+    while pending:
+        for neighbour in edges[pending.pop()]:
+            if neighbour not in seen and within(neighbour):
+                seen.add(neighbour)
+                pending.append(neighbour)
+    return seen
+
+
+class NeoASMTaskGraph:
+    """Run the operations of a compiled program as a dependency graph on a pool.
+
+    Every map, link, vec_, str_map, exec and validate instruction is a task.
+    A task waits for the tasks it has a read-after-write, write-after-write
+    or write-after-read hazard with (the src:/dst:/in:/out:/link: names, as
+    in NeoASMListScheduler), and an exec block also waits for the
+    operations it links to. Independent tasks run concurrently on a thread
+    or process pool.
+
+    Ready tasks are dispatched critical path first: a task's priority is
+    the weight of the heaviest path from it to the end of the graph, taken
+    from the latency table of the target or from weights. Only max_workers
+    tasks are handed to the pool at a time, so the pool's FIFO queue never
+    overrides that order. When a task fails, everything that depends on it
+    is blocked and the independent tasks still run.
+
+    A handler is called as handler(instruction) and looked up by task name,
+    instruction name, operation ("MAP", "VEC_ADD") and opcode name, in that
+    order; tasks without a handler complete at once. With use_processes the
+    handlers must be picklable. run_async() runs the graph from an asyncio
+    event loop: coroutine handlers (I/O-bound map transfers, say) are
+    awaited on the loop without taking a worker, so they overlap with the
+    compute tasks on the pool.
+
+    Each task records when it became ready, started and finished.
+    timings(), critical_path() and chrome_trace() export them.
+    """
+
+    def __init__(self, instructions, handlers=None, max_workers=None, use_processes=False, cpu_architecture=None,
+                 weights=None):
+        self.handlers = {}  # Task name, instruction name, operation or opcode name -> handler
+        for key, handler in (handlers or {}).items():
+            self.register(key, handler)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.tasks = []  # TaskSpec, in program order
+        self.names = {}  # Task name -> index
+        self.records = []  # TaskRecord of every task in the last run, in task order
+        self.stats = {}  # Report of the last run
+        self._executor = None
+        self._build(instructions, select_latency_table(cpu_architecture or {}), weights or {})
+
+    def register(self, key, handler):
+        if isinstance(key, Opcode):
+            key = key.name
+        self.handlers[key] = handler
+
+    def handler_for(self, task):
+        instruction = task.instruction
+        for key in (task.name, instruction.name, instruction.mnemonic, instruction.opcode.name):
+            handler = self.handlers.get(key)
+            if handler is not None:
+                return handler
+        return None
+
+    def _build(self, instructions, timings, weights):
+        selected = [instruction for instruction in instructions if instruction.opcode in TASK_OPCODES]
+        successors, _ = build_dependency_graph(selected)
+        successors = [set(indices) for indices in successors]
+        predecessors = [set() for _ in selected]
+        for index, indices in enumerate(successors):
+            for successor in indices:
+                predecessors[successor].add(index)
+        # An exec block also runs after the operations it links to, unless a
+        # hazard already orders it before one (it reads a buffer the
+        # operation overwrites). Program order is a topological order of the
+        # hazard edges and is kept one as link edges are added, so a link to
+        # an earlier operation needs no search and one to a later operation
+        # only searches the tasks in between
+        position = list(range(len(selected)))
+        for index, callees in resolve_exec_links(selected).items():
+            for callee in callees:
+                if self._order_edge(successors, predecessors, position, callee, index):
+                    successors[callee].add(index)
+                    predecessors[index].add(callee)
+
+        occurrences = {}
+        for index, instruction in enumerate(selected):
+            occurrence = occurrences[instruction.name] = occurrences.get(instruction.name, 0) + 1
+            name = instruction.name if occurrence == 1 else f"{instruction.name}#{occurrence}"
+            weight = weights.get(name, weights.get(instruction.mnemonic))
+            if weight is None:
+                weight = timings.get(instruction.mnemonic, DEFAULT_TIMING)[0]
+            self.tasks.append(TaskSpec(index, name, instruction, weight))
+            self.names[name] = index
+        for index, indices in enumerate(successors):
+            self.tasks[index].successors = sorted(indices)
+            for successor in indices:
+                self.tasks[successor].predecessors.append(index)
+
+        for index in reversed(self.order()):
+            task = self.tasks[index]
+            task.priority = task.weight + max((self.tasks[successor].priority for successor in task.successors),
+                                              default=0)
+
+    @staticmethod
+    def _order_edge(successors, predecessors, position, source, target):
+        # Whether the edge source -> target leaves the graph acyclic; if so,
+        # position (task -> slot in a topological order) is updated to an
+        # order that also respects it (Pearce and Kelly's dynamic
+        # topological sort: only the tasks between the two slots move)
+        upper, lower = position[source], position[target]
+        if upper < lower:
+            return True
+        forward = _reachable(successors, target, lambda index: position[index] <= upper)
+        if source in forward:
+            return False
+        backward = _reachable(predecessors, source, lambda index: position[index] >= lower)
+        moved = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+        for index, slot in zip(moved, sorted(position[index] for index in moved)):
+            position[index] = slot
+        return True
+
+    def order(self):
+        # Topological order of the task indices; link edges may point
+        # backwards in program order, so this is not simply range(n)
+        remaining = [len(task.predecessors) for task in self.tasks]
+        order = [index for index, count in enumerate(remaining) if count == 0]
+        for index in order:
+            for successor in self.tasks[index].successors:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    order.append(successor)
+        return order
+
+    def _start(self, split_coroutines):
+        # Reset the run state and queue every task without predecessors
+        self.records = [TaskRecord(task) for task in self.tasks]
+        self._handlers = [self.handler_for(task) for task in self.tasks]
+        self._remaining = [len(task.predecessors) for task in self.tasks]
+        self._ready = []  # (-priority, index) of tasks for the pool
+        self._awaitable = self._ready  # Same for coroutine handlers; a separate heap under run_async()
+        self._empty = []  # Ready tasks without a handler
+        if split_coroutines:
+            self._awaitable = []
+        self._started = time.perf_counter()
+        for task in self.tasks:
+            if not task.predecessors:
+                self._release(task.index, self._started)
+
+    def _release(self, index, now):
+        self.records[index].ready = now
+        handler = self._handlers[index]
+        if handler is None:
+            self._empty.append(index)
+        elif inspect.iscoroutinefunction(handler):
+            heapq.heappush(self._awaitable, (-self.tasks[index].priority, index))
+        else:
+            heapq.heappush(self._ready, (-self.tasks[index].priority, index))
+
+    def _dispatch(self, heap):
+        # (index, handler) of the highest-priority ready task in heap, after
+        # finishing every ready task without a handler, which takes no worker
+        while self._empty:
+            index = self._empty.pop()
+            now = time.perf_counter()
+            self._finish(index, None, None, now, now, None)
+        if not heap:
+            return None, None
+        _, index = heapq.heappop(heap)
+        return index, self._handlers[index]
+
+    def _finish(self, index, result, error, started, finished, worker):
+        record = self.records[index]
+        record.result, record.error = result, error
+        record.started, record.finished, record.worker = started, finished, worker
+        if error is None:
+            record.status = "done"
+            for successor in self.tasks[index].successors:
+                self._remaining[successor] -= 1
+                if self._remaining[successor] == 0:
+                    self._release(successor, finished)
+            return
+        record.status = "failed"
+        pending = list(self.tasks[index].successors)
+        while pending:
+            dependent = self.records[pending.pop()]
+            if dependent.status is None:
+                dependent.status = "blocked"
+                dependent.error = RuntimeError(f"{self.tasks[index].name} did not complete")
+                pending.extend(dependent.task.successors)
+
+    def run(self):
+        # Run every task; returns {task name: "done" | "failed" | "blocked"}
+        self._start(split_coroutines=False)
+        in_flight = {}
+        executor = self.executor()
+        try:
+            while True:
+                while len(in_flight) < self.max_workers:
+                    index, handler = self._dispatch(self._ready)
+                    if handler is None:
+                        break
+                    in_flight[executor.submit(_run_task, handler, self.tasks[index].instruction)] = index
+                if not in_flight:
+                    break  # Everything left is blocked
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(in_flight.pop(future), *future.result())
+        finally:
+            if in_flight:
+                wait(in_flight)
+        return self._report()
+
+    async def run_async(self):
+        # run() from the running event loop; coroutine handlers are awaited
+        # on the loop and do not count against max_workers
+        loop = asyncio.get_running_loop()
+        self._start(split_coroutines=True)
+        in_flight = {}  # Future -> (task index, runs on the pool)
+        computing = 0
+        executor = self.executor()
+        try:
+            while True:
+                while True:
+                    index, handler = self._dispatch(self._awaitable)
+                    if handler is None:
+                        break
+                    in_flight[asyncio.ensure_future(_await_task(handler, self.tasks[index].instruction))] = (
+                        index, False)
+                while computing < self.max_workers:
+                    index, handler = self._dispatch(self._ready)
+                    if handler is None:
+                        break
+                    future = loop.run_in_executor(executor, _run_task, handler, self.tasks[index].instruction)
+                    in_flight[future] = (index, True)
+                    computing += 1
+                if not in_flight:
+                    break
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index, pooled = in_flight.pop(future)
+                    computing -= pooled
+                    self._finish(index, *future.result())
+        finally:
+            if in_flight:
+                await asyncio.wait(in_flight)
+        return self._report()
+
+    def _report(self):
+        ran = [record for record in self.records if record.finished is not None]
+        makespan = max((record.finished for record in ran), default=self._started) - self._started
+        busy = sum(record.finished - record.started for record in ran)
+        path = self._critical_indices()
+        self.stats = {
+            "tasks": len(self.tasks),
+            "edges": sum(len(task.successors) for task in self.tasks),
+            "workers": self.max_workers,
+            "failed": sum(record.status == "failed" for record in self.records),
+            "blocked": sum(record.status == "blocked" for record in self.records),
+            "estimated_critical_path": max((task.priority for task in self.tasks), default=0),
+            "critical_path_seconds": sum(self.records[index].finished - self.records[index].started
+                                         for index in path),
+            "busy_seconds": busy,
+            "parallelism": busy / makespan if makespan > 0 else 0.0,
+            "seconds": makespan,
+        }
+        return {record.task.name: record.status for record in self.records}
+
+    def results(self):
+        # {task name: handler result} of the tasks that completed in the last run
+        return {record.task.name: record.result for record in self.records if record.status == "done"}
+
+    def critical_path(self):
+        # Task names on the realized critical path of the last run
+        return [self.tasks[index].name for index in self._critical_indices()]
+
+    def _critical_indices(self):
+        # The task that finished last, then back through the predecessor of
+        # each that finished last (the one that made it ready)
+        finished = [record for record in self.records if record.finished is not None]
+        record = max(finished, key=lambda record: record.finished, default=None)
+        path = []
+        while record is not None:
+            path.append(record.task.index)
+            record = max((self.records[index] for index in record.task.predecessors
+                          if self.records[index].finished is not None),
+                         key=lambda record: record.finished, default=None)
+        return path[::-1]
+
+    def timings(self):
+        # One dict per task of the last run, in task order. Times are seconds
+        # from the start of the run: ready is when its last predecessor
+        # finished, wait is ready -> started, seconds is started -> finished.
+        # Tasks that never ran have None times.
+        on_path = set(self._critical_indices())
+        rows = []
+        for record in self.records:
+            ran = record.finished is not None
+            rows.append({
+                "name": record.task.name,
+                "operation": record.task.instruction.mnemonic,
+                "status": record.status,
+                "priority": record.task.priority,
+                "ready": record.ready - self._started if record.ready is not None else None,
+                "started": record.started - self._started if ran else None,
+                "finished": record.finished - self._started if ran else None,
+                "wait": record.started - record.ready if ran else None,
+                "seconds": record.finished - record.started if ran else None,
+                "critical": record.task.index in on_path,
+            })
+        return rows
+
+    def chrome_trace(self):
+        # Trace-event JSON object with one complete ("X") event per task that
+        # ran, in the format of NeoASMProfiler.chrome_trace(). Awaited tasks
+        # may overlap on the event loop thread, so they are spread over
+        # numbered lanes of their own.
+        on_path = set(self._critical_indices())
+        events = []
+        lanes = []  # Finish time of the last awaited task in each lane
+        for record in sorted(self.records, key=lambda record: record.started or 0):
+            if record.finished is None:
+                continue
+            if record.worker is not None:
+                pid, tid = record.worker
+            else:
+                lane = next((lane for lane, free in enumerate(lanes) if free <= record.started), len(lanes))
+                lanes[lane:lane + 1] = [record.finished]
+                pid, tid = os.getpid(), lane + 1
+            events.append({
+                "name": record.task.name, "cat": "task", "ph": "X",
+                "ts": record.started * 1e6, "dur": (record.finished - record.started) * 1e6,
+                "pid": pid, "tid": tid,
+                "args": {"operation": record.task.instruction.mnemonic, "status": record.status,
+                         "wait_ms": (record.started - record.ready) * 1000, "critical": record.task.index in on_path},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def executor(self):
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
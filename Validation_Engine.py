@@ -0,0 +1,266 @@
+import functools
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only this engine and the vector executor need it
+    np = None
+
+try:
+    import numba
+except ImportError:  # numba is optional; without it the NumPy kernel runs
+    numba = None
+
+from Instruction_IR import Opcode
+from Range_Analysis import PROVEN_CHECK, parse_range
+
+# Elements per block of the NumPy kernel: the block and its two boolean
+# scratch masks stay in L1/L2 while every check of the variable runs over it
+DEFAULT_BLOCK_SIZE = 1 << 14
+
+# Violation indices the JIT kernel collects per call before handing back
+_JIT_BATCH = 1 << 12
+
+VALIDATE_RULES = ("bounds", "null_check")
+
+# Variable types whose elements are numbers and so can be range checked
+BOUNDED_TYPES = ("INT", "FLOAT", "VECTOR", "BOOL")
+
+# Element type of raw buffers (bytes, memoryview, packets) by STORAGE
+# operand (see Range_Analysis) or else by variable type
+BUFFER_DTYPES = {
+    "u8": "uint8", "i8": "int8", "u16": "uint16", "i16": "int16",
+    "u32": "uint32", "i32": "int32", "u64": "uint64", "i64": "int64",
+    "INT": "int32", "FLOAT": "float32", "BOOL": "bool",
+}
+
+
+def rule_name(rule):
+    # "bounds", "bounds check" -> "bounds"
+    words = str(rule or "").split()
+    return words[0].lower() if words else ""
+
+
+class ValidationRule:
+    __slots__ = ('name', 'low', 'high', 'null_check', 'dtype')
+
+    def __init__(self, name, low=None, high=None, null_check=False, dtype=None):
+        self.name = name
+        self.low = low  # Smallest valid value, or None for no lower bound
+        self.high = high  # Largest valid value, or None for no upper bound
+        self.null_check = null_check  # NaN (or None in object arrays) is a violation
+        self.dtype = dtype  # Element type assumed for raw buffers
+
+    @property
+    def empty(self):
+        return self.low is None and self.high is None and not self.null_check
+
+
+if numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _violations_kernel(values, start, low, high, check_low, check_high, check_null, out):
+        # Write the indices of violating elements from start on into out;
+        # returns (violations written, index to resume from)
+        count = 0
+        for index in range(start, values.shape[0]):
+            value = values[index]
+            if (check_low and value < low) or (check_high and value > high) or (check_null and value != value):
+                out[count] = index
+                count += 1
+                if count == out.shape[0]:
+                    return count, index + 1
+        return count, values.shape[0]
+else:
+    _violations_kernel = None
+
+
+class NeoASMValidationEngine:
+    """Check buffers against the validate rules and rigid ranges of a program.
+
+    Every check that applies to a variable is compiled into one rule:
+    "check: rigid" and validate ... { rule: bounds } test the declared range
+    (unless range analysis proved it, CHECK proven), and null_check rejects
+    NaN (None in object arrays). validate() runs the whole rule over a
+    buffer in one pass and returns the indices of the violating elements.
+
+    The NumPy kernel works block by block: each block is compared into two
+    preallocated boolean masks with out=, so no temporary arrays are created
+    and a clean block costs one any() on top of the comparisons; only
+    violating blocks produce index arrays. With numba installed (or
+    use_jit=True) a compiled loop does the same in a single scan without
+    masks and releases the GIL, so packets validated on threads run in
+    parallel.
+    """
+
+    def __init__(self, instructions, block_size=DEFAULT_BLOCK_SIZE, use_jit=None):
+        if np is None:
+            raise ImportError("The validation engine requires NumPy (pip install numpy)")
+        if use_jit and _violations_kernel is None:
+            raise ImportError("use_jit=True requires numba (pip install numba)")
+        self.block_size = block_size
+        self.use_jit = _violations_kernel is not None if use_jit is None else bool(use_jit)
+        self.rules = {}  # Variable name -> ValidationRule
+        self.stats = {}  # Report of the last validate() call
+        self._masks = {}  # Thread id -> two boolean scratch masks of block_size elements
+        self._compile(instructions)
+
+    def _compile(self, instructions):
+        declarations = {}
+        requested = {}  # Variable -> rule names of its validate instructions
+        for instruction in instructions:
+            if instruction.opcode == Opcode.VAR:
+                declarations[instruction.name] = instruction
+            elif instruction.opcode == Opcode.VALIDATE:
+                rule = rule_name(instruction.operand("RULE"))
+                if rule not in VALIDATE_RULES:
+                    raise ValueError(f"Unknown validate rule {instruction.operand('RULE')!r} for {instruction.name}, "
+                                     f"expected one of {', '.join(VALIDATE_RULES)}")
+                requested.setdefault(instruction.name, set()).add(rule)
+
+        for name, declaration in declarations.items():
+            rules = requested.get(name, set())
+            check = declaration.operand("CHECK")
+            value_range = parse_range(declaration.operand("RANGE"))
+            bounded = ((check == "rigid" or "bounds" in rules) and check != PROVEN_CHECK
+                       and declaration.operand("TYPE") in BOUNDED_TYPES)
+            if bounded and value_range is None and "bounds" in rules:
+                raise ValueError(f"validate {name} {{ rule: bounds }} needs a range on its declaration")
+            rule = ValidationRule(
+                name,
+                value_range[0] if bounded and value_range else None,
+                value_range[1] if bounded and value_range else None,
+                "null_check" in rules,
+                BUFFER_DTYPES.get(declaration.operand("STORAGE")) or BUFFER_DTYPES.get(declaration.operand("TYPE")),
+            )
+            if not rule.empty:
+                self.rules[name] = rule
+
+    def as_array(self, name, buffer, dtype=None):
+        # A NumPy view of buffer; raw buffers are read with the rule's element type
+        if isinstance(buffer, np.ndarray):
+            return buffer.reshape(-1)
+        rule = self.rules.get(name)
+        dtype = dtype or (rule.dtype if rule is not None else None)
+        if dtype is None:
+            raise ValueError(f"No element type known for {name}; pass dtype or a NumPy array")
+        return np.frombuffer(buffer, dtype=dtype)
+
+    def validate(self, name, buffer, count=None, limit=None, dtype=None):
+        # Indices (int64 array) of the elements of buffer[:count] that break
+        # the rule of variable name, in order; at most limit of them
+        rule = self.rules.get(name)
+        values = self.as_array(name, buffer, dtype)
+        if count is not None:
+            values = values[:count]
+        started = time.perf_counter()
+        if rule is None or len(values) == 0 or limit == 0:
+            violations = np.empty(0, dtype=np.int64)
+            kernel = None
+        elif self.use_jit and values.dtype != object:
+            violations = self._validate_jit(rule, values, limit)
+            kernel = "numba"
+        else:
+            violations = self._validate_numpy(rule, values, limit)
+            kernel = "numpy"
+        self.stats = {
+            "name": name,
+            "elements": len(values),
+            "violations": len(violations),
+            "kernel": kernel,
+            "seconds": time.perf_counter() - started,
+        }
+        return violations
+
+    def validate_all(self, buffers, count=None, limit=None):
+        # {name: violation indices} for the buffers that break their rules
+        report = {}
+        for name, buffer in buffers.items():
+            if name in self.rules:
+                violations = self.validate(name, buffer, count, limit)
+                if len(violations):
+                    report[name] = violations
+        return report
+
+    def validate_packet(self, name, view, index):
+        # Packet handler body: violations of one packet, as packet-relative indices
+        return self.validate(name, view)
+
+    def packet_handler(self, name):
+        # A handler for NeoASMPacketRuntime that validates every packet of a
+        # pkt stream against the rule of variable name
+        return functools.partial(self.validate_packet, name)
+
+    def _scratch(self):
+        # Per thread, so packets can be validated concurrently
+        masks = self._masks.get(threading.get_ident())
+        if masks is None or len(masks[0]) != self.block_size:
+            masks = (np.empty(self.block_size, dtype=bool), np.empty(self.block_size, dtype=bool))
+            self._masks[threading.get_ident()] = masks
+        return masks
+
+    def _validate_numpy(self, rule, values, limit):
+        found = []
+        total = 0
+        masks = self._scratch()
+        is_float = values.dtype.kind in "fc"
+        is_object = values.dtype == object
+        for start in range(0, len(values), self.block_size):
+            block = values[start:start + self.block_size]
+            size = len(block)
+            mask, other = masks[0][:size], masks[1][:size]
+            if is_object:
+                # None has no order: only the present elements are compared
+                # with the range, and None counts as a null
+                present = np.not_equal(block, None)
+                mask.fill(False)
+                other.fill(False)
+            else:
+                present = True
+            if rule.low is not None:
+                np.less(block, rule.low, out=mask, where=present)
+            elif not is_object:
+                mask.fill(False)
+            if rule.high is not None:
+                np.greater(block, rule.high, out=other, where=present)
+                np.logical_or(mask, other, out=mask)
+            if rule.null_check:
+                if is_float:
+                    np.isnan(block, out=other)
+                    np.logical_or(mask, other, out=mask)
+                elif is_object:
+                    np.logical_or(mask, ~present, out=mask)
+            if not mask.any():
+                continue
+            hits = np.flatnonzero(mask)
+            hits += start
+            found.append(hits)
+            total += len(hits)
+            if limit is not None and total >= limit:
+                break
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        violations = np.concatenate(found) if len(found) > 1 else found[0]
+        return violations[:limit] if limit is not None else violations
+
+    def _validate_jit(self, rule, values, limit):
+        if not values.flags.c_contiguous:
+            values = np.ascontiguousarray(values)
+        check_null = rule.null_check and values.dtype.kind in "fc"
+        batch = np.empty(_JIT_BATCH if limit is None else min(limit, _JIT_BATCH), dtype=np.int64)
+        found = []
+        total = 0
+        position = 0
+        while position < len(values):
+            written, position = _violations_kernel(
+                values, position, rule.low if rule.low is not None else 0, rule.high if rule.high is not None else 0,
+                rule.low is not None, rule.high is not None, check_null, batch)
+            if written:
+                found.append(batch[:written].copy())
+                total += written
+            if limit is not None and total >= limit:
+                break
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        violations = np.concatenate(found) if len(found) > 1 else found[0]
+        return violations[:limit] if limit is not None else violations
@@ -0,0 +1,218 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only this executor needs it
+    np = None
+
+from Instruction_IR import ELEMENTWISE_OPERATIONS, Opcode, resolve_exec_links, vector_operands
+
+# Elements per block when a fused group is run block by block; 16K float64
+# values per operand keep a whole group's working set in L2
+DEFAULT_BLOCK_SIZE = 1 << 14
+
+_UFUNC_NAMES = {"ADD": "add", "SUB": "subtract", "MUL": "multiply", "DIV": "divide"}
+
+
+class VectorStep:
+    __slots__ = ('name', 'operation', 'inputs', 'output')
+
+    def __init__(self, name, operation, inputs, output):
+        self.name = name
+        self.operation = operation
+        self.inputs = inputs
+        self.output = output
+
+    def operands(self):
+        # (left, right) buffer names; a single-input element-wise operation
+        # combines the output with its input in place
+        if len(self.inputs) == 1 and self.operation in ELEMENTWISE_OPERATIONS:
+            return self.output, self.inputs[0]
+        return self.inputs[0], self.inputs[-1]
+
+    def buffers(self):
+        return set(self.inputs) | {self.output}
+
+
+class NeoASMVectorExecutor:
+    """Run the vec_ operations and exec blocks of an instruction list on NumPy arrays.
+
+    Semantics match NeoASMLLVMBackend, so either can check the other.
+    Element-wise ADD/SUB/MUL/DIV compute out[i] = a[i] op b[i] (out[i] op a[i]
+    with a single input), DOT stores the dot product in out[0], CROSS takes
+    the cross product of consecutive 3-element vectors, and an exec block
+    runs the operations it links to. The device operand is ignored; this is
+    the CPU path.
+
+    Consecutive element-wise operations that share buffers are fused into one
+    group. For long arrays a group runs block by block, passing each block of
+    block_size elements through every operation of the group while it is
+    still in cache. Every operation writes straight into its output with
+    out=, so no temporary arrays are allocated. DOT uses np.dot, and CROSS
+    works in two scratch arrays that are reused from call to call.
+    """
+
+    def __init__(self, instructions, block_size=DEFAULT_BLOCK_SIZE):
+        if np is None:
+            raise ImportError("The vector executor requires NumPy (pip install numpy)")
+        self.block_size = block_size
+        self.steps = {}  # Instruction index -> VectorStep
+        self.names = {}  # Operation or exec name -> index of its first instruction
+        self.stats = {}  # Report of the last run
+        self._scratch = {}  # dtype -> two flat scratch arrays for CROSS
+
+        for index, instruction in enumerate(instructions):
+            if instruction.opcode == Opcode.VEC:
+                self.steps[index] = VectorStep(instruction.name, *vector_operands(instruction))
+            if instruction.opcode in (Opcode.VEC, Opcode.EXEC):
+                self.names.setdefault(instruction.name, index)
+        self.links = resolve_exec_links(instructions)
+        self.program = sorted(self.steps)  # Every operation, in program order
+
+    def sequence(self, index):
+        # The operations an instruction runs, in order, with exec blocks expanded
+        if index in self.steps:
+            return [index]
+        return [step for callee in self.links[index] for step in self.sequence(callee)]
+
+    def plan(self, sequence):
+        # Split a sequence of operations into groups: runs of element-wise
+        # operations that share a buffer with the run so far, and single
+        # DOT/CROSS operations
+        groups = []
+        shared = set()
+        for index in sequence:
+            step = self.steps[index]
+            if step.operation not in ELEMENTWISE_OPERATIONS:
+                groups.append([step])
+                shared = set()
+            elif groups and shared & step.buffers():
+                groups[-1].append(step)
+                shared |= step.buffers()
+            else:
+                groups.append([step])
+                shared = step.buffers()
+        return groups
+
+    def run(self, name, buffers, count=None):
+        # Run the vec_ operation or exec block called name; count defaults to
+        # the longest length every buffer involved can hold
+        if name not in self.names:
+            raise KeyError(f"No vec_ operation or exec block named {name}")
+        self.execute(self.sequence(self.names[name]), buffers, count)
+
+    def run_all(self, buffers, count=None):
+        # Run every vec_ operation in program order
+        self.execute(self.program, buffers, count)
+
+    def execute(self, sequence, buffers, count=None):
+        steps = [self.steps[index] for index in sequence]
+        arrays = self.bind(steps, buffers)
+        if count is None:
+            count = min((self._capacity(step, arrays) for step in steps), default=0)
+        for step in steps:
+            self._check_capacity(step, arrays, count)
+
+        groups = self.plan(sequence)
+        blocks = 0
+        for group in groups:
+            if group[0].operation == "DOT":
+                self._dot(group[0], arrays, count)
+            elif group[0].operation == "CROSS":
+                self._cross(group[0], arrays, count)
+            else:
+                blocks += self._run_group(group, arrays, count)
+        self.stats = {
+            "operations": len(steps),
+            "groups": len(groups),
+            "fused_operations": sum(len(group) for group in groups if len(group) > 1),
+            "blocks": blocks,
+            "count": count,
+        }
+
+    def bind(self, steps, buffers):
+        # Zero-copy NumPy views of the buffers the steps use
+        arrays = {}
+        for step in steps:
+            for name in step.buffers():
+                if name in arrays:
+                    continue
+                if name not in buffers:
+                    raise ValueError(f"{step.name} needs buffer {name}")
+                array = np.asarray(buffers[name])
+                if array.ndim != 1:
+                    if not array.flags.c_contiguous:
+                        raise ValueError(f"Buffer {name} must be one-dimensional or contiguous")
+                    array = array.reshape(-1)
+                arrays[name] = array
+            if not arrays[step.output].flags.writeable:
+                raise ValueError(f"Buffer {step.output} is read-only")
+        return arrays
+
+    def _capacity(self, step, arrays):
+        lengths = [len(arrays[name]) for name in step.inputs]
+        if step.operation != "DOT":
+            lengths.append(len(arrays[step.output]))
+        return min(lengths)
+
+    def _check_capacity(self, step, arrays, count):
+        needed = count - count % 3 if step.operation == "CROSS" else count
+        for name in step.buffers():
+            minimum = 1 if name == step.output and step.operation == "DOT" else needed
+            if len(arrays[name]) < minimum:
+                raise ValueError(f"Buffer {name} holds {len(arrays[name])} elements, {step.name} needs {minimum}")
+
+    def _run_group(self, group, arrays, count):
+        # Returns the number of blocks the group was split into
+        calls = []
+        for step in group:
+            left, right = step.operands()
+            calls.append((getattr(np, _UFUNC_NAMES[step.operation]), arrays[left], arrays[right], arrays[step.output]))
+        if len(group) == 1 or count <= self.block_size or not self._blockable(group, arrays):
+            for ufunc, left, right, output in calls:
+                ufunc(left[:count], right[:count], out=output[:count])
+            return 1
+
+        blocks = 0
+        for start in range(0, count, self.block_size):
+            stop = min(start + self.block_size, count)
+            for ufunc, left, right, output in calls:
+                ufunc(left[start:stop], right[start:stop], out=output[start:stop])
+            blocks += 1
+        return blocks
+
+    def _blockable(self, group, arrays):
+        # Running a group block by block reorders work across operations,
+        # which is only safe when distinct buffers do not overlap in memory
+        names = sorted(set().union(*(step.buffers() for step in group)))
+        for position, first in enumerate(names):
+            for second in names[position + 1:]:
+                a, b = arrays[first], arrays[second]
+                same_view = a.ctypes.data == b.ctypes.data and a.strides == b.strides and a.shape == b.shape
+                if not same_view and np.may_share_memory(a, b):
+                    return False
+        return True
+
+    def _dot(self, step, arrays, count):
+        left, right = (arrays[name] for name in step.operands())
+        arrays[step.output][0] = np.dot(left[:count], right[:count])
+
+    def _cross(self, step, arrays, count):
+        triples = count // 3
+        left, right = (arrays[name][:3 * triples].reshape(triples, 3) for name in step.operands())
+        output = arrays[step.output][:3 * triples].reshape(triples, 3)
+        first, second = (
+            scratch[:3 * triples].reshape(triples, 3)
+            for scratch in self._scratch_arrays(np.result_type(left, right), 3 * triples)
+        )
+        # Both products of every component are formed before the output is
+        # written, so the output may alias an input
+        for component in range(3):
+            next_component, last_component = (component + 1) % 3, (component + 2) % 3
+            np.multiply(left[:, next_component], right[:, last_component], out=first[:, component])
+            np.multiply(left[:, last_component], right[:, next_component], out=second[:, component])
+        np.subtract(first, second, out=output)
+
+    def _scratch_arrays(self, dtype, size):
+        scratch = self._scratch.get(dtype)
+        if scratch is None or len(scratch[0]) < size:
+            scratch = self._scratch[dtype] = (np.empty(size, dtype), np.empty(size, dtype))
+        return scratch
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import AOT_Arena
+from AOT_Arena import ARENA_SUFFIX, NeoASMArena, arena_blocks, write_arena
+from Compiler_Driver import lower_source
+
+SOURCE = """
+AOT table { STATIC size: 100B }
+AOT scratch { SOFT size: 4KB }
+AOT symbols { PRELINK size: 1KB }
+AOT table { STATIC size: 200B }
+"""
+
+
+def test_only_compile_time_blocks_with_their_last_declaration():
+    assert arena_blocks(lower_source(SOURCE)) == {"table": ("STATIC", 200), "symbols": ("PRELINK", 1024)}
+
+
+def test_round_trip_with_copy_on_write(tmp_path):
+    path = str(tmp_path / ("program" + ARENA_SUFFIX))
+    report = write_arena(lower_source(SOURCE), path, contents={"table": b"\x01\x02\x03"})
+    assert report["total_bytes"] >= 1224
+    with NeoASMArena(path) as arena:
+        assert sorted(arena) == ["symbols", "table"] and len(arena) == 2 and "scratch" not in arena
+        table = arena["table"]
+        assert bytes(table[:4]) == b"\x01\x02\x03\x00" and len(table) == 200
+        assert bytes(arena["symbols"]) == bytes(1024)
+        assert (arena.blocks["table"][1] - arena.data_offset) % arena.alignment == 0
+        table[0] = 9
+        table.release()
+    with NeoASMArena(path, writable=False) as arena:
+        block = arena.block("table")
+        assert block[0] == 1 and block.readonly
+        block.release()
+        with pytest.raises(KeyError, match="No AOT block scratch"):
+            arena.block("scratch")
+
+
+def test_invalid_contents_and_images(tmp_path):
+    instructions = lower_source(SOURCE)
+    path = str(tmp_path / "bad.arena")
+    with pytest.raises(ValueError, match="No STATIC or PRELINK AOT block scratch"):
+        write_arena(instructions, path, contents={"scratch": b"x"})
+    with pytest.raises(ValueError, match="exceed its 200 B"):
+        write_arena(instructions, path, contents={"table": bytes(201)})
+    assert os.listdir(tmp_path) == []
+
+    (tmp_path / "bad.arena").write_bytes(b"NEOA" + bytes(60))
+    with pytest.raises(ValueError, match="not a NeoASM arena image"):
+        NeoASMArena(path)
+    write_arena(instructions, path)
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(ValueError, match="truncated arena data"):
+        NeoASMArena(path)
+
+
+def test_close_with_exported_views_can_be_retried(tmp_path):
+    path = str(tmp_path / "program.arena")
+    write_arena(lower_source(SOURCE), path)
+    arena = NeoASMArena(path)
+    table = arena["table"]
+    with pytest.raises(BufferError, match="still in use"):
+        arena.close()
+    assert bytes(arena["symbols"][:1]) == b"\x00"
+    table.release()
+    arena.close()
+    arena.close()
+
+
+def test_command_line(tmp_path, capsys):
+    source = tmp_path / "program.neo"
+    source.write_text(SOURCE)
+    assert AOT_Arena.main([str(source), "-o", str(tmp_path / "images")]) == 0
+    image = tmp_path / "images" / ("program" + ARENA_SUFFIX)
+    assert AOT_Arena.main(["--list", str(image)]) == 0
+    output = capsys.readouterr().out
+    assert "2 blocks" in output and "PRELINK  symbols" in output
+    assert AOT_Arena.main(["--list", str(source)]) == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from AST_Nodes import MapEntry, MapNode, NeoASMNodeArena, VariableNode, node_from_dict
+from Compiler_Driver import parse_source
+
+SOURCE = '''frame MAIN {
+    var INT x { range: 1..9, check: rigid }
+    map M { src: A, dst: x }
+}
+pkt P { size: 4B, exec: E }
+vec_add { in: "a, b", out: c }
+validate x { rule: bounds }
+'''
+
+
+def test_nodes_answer_like_dict_nodes():
+    node = VariableNode("INT", "x", "1..9", "rigid")
+    assert node["type"] == "variable" and node["attributes"]["range"] == "1..9"
+    assert node == {"type": "variable", "var_type": "INT", "identifier": "x",
+                    "attributes": {"range": "1..9", "check": "rigid"}}
+    with pytest.raises(KeyError):
+        VariableNode("INT", "y")["attributes"]["range"]
+    entry = MapNode("M", [MapEntry("src", "A")])["entries"][0]
+    assert (entry["key"], entry["value"]) == ("src", "A")
+
+
+def test_dict_nodes_convert_back_and_forth():
+    for node in parse_source(SOURCE):
+        assert node_from_dict(node.to_dict()) == node
+
+
+def test_arena_round_trip():
+    nodes = parse_source(SOURCE)
+    arena = NeoASMNodeArena.from_nodes(nodes)
+    assert len(arena) == len(nodes) and list(arena) == nodes
+    assert list(NeoASMNodeArena.from_buffer(arena.to_bytes())) == nodes
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import Benchmark_Suite
+from Benchmark_Suite import CorpusGenerator, compare_results, parse_mix
+from Compiler_Driver import compile_source
+
+
+def phase(seconds, peak=1000):
+    return {"seconds_min": seconds, "peak_bytes": peak}
+
+
+def test_parse_mix():
+    assert parse_mix("var=3, map=1,frame") == {"var": 3.0, "map": 1.0, "frame": 1.0}
+    with pytest.raises(ValueError, match="Unknown statement kind"):
+        parse_mix("loop=2")
+
+
+def test_corpus_is_deterministic_and_compiles_with_every_frontend():
+    source = CorpusGenerator(seed=3, frame_size=4).generate(150)
+    assert CorpusGenerator(seed=3, frame_size=4).generate(150) == source
+    assert CorpusGenerator(seed=4, frame_size=4).generate(150) != source
+    outputs = {compile_source(source, frontend=frontend) for frontend in ("parser", "analyzer", "table")}
+    assert len(outputs) == 1
+
+
+def test_compare_results():
+    baseline = {"phases": {"parse": phase(1.0), "codegen": phase(2.0), "broken": {"error": "x"}, "gone": phase(1.0)}}
+    current = {"phases": {"parse": phase(1.05), "codegen": phase(2.5, peak=3000), "broken": phase(9.0)}}
+    assert [(item["phase"], item["metric"]) for item in compare_results(baseline, current)] == [
+        ("codegen", "seconds_min"), ("gone", "error")]
+    assert [(item["phase"], item["metric"]) for item in compare_results(baseline, current, 0.3, 0.5)] == [
+        ("codegen", "peak_bytes"), ("gone", "error")]
+
+
+def test_command_line_gate(tmp_path, capsys):
+    results = tmp_path / "results.json"
+    arguments = ["--statements", "40", "--repeat", "1", "-j", "1"]
+    assert Benchmark_Suite.main(arguments + ["-o", str(results)]) == 0
+    phases = json.loads(results.read_text(encoding="utf-8"))["phases"]
+    assert "codegen" in phases and not any("error" in value for value in phases.values())
+
+    # A baseline that was a thousand times faster fails the gate
+    for value in phases.values():
+        value["seconds_min"] /= 1000
+    results.write_text(json.dumps({"phases": phases}), encoding="utf-8")
+    assert Benchmark_Suite.main(arguments + ["--compare", str(results)]) == 1
+    assert "Regression in codegen" in capsys.readouterr().err
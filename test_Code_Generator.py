@@ -0,0 +1,39 @@
+import pytest
+
+import Compiler_Driver
+from Compiler_Driver import compile_source
+
+FRONTENDS = ("parser", "analyzer", "table")
+
+
+@pytest.mark.parametrize("frontend", FRONTENDS)
+def test_map_entries_are_read_by_key(frontend):
+    source = "AOT X { STATIC size: 64B } var INT GPU { range: 0..5, check: rigid } map m { dst: GPU, src: X }"
+    assert "MAP m (X -> GPU)" in compile_source(source, frontend=frontend)
+
+
+@pytest.mark.parametrize("frontend", FRONTENDS)
+@pytest.mark.parametrize("source, message", [
+    ("var INT x { }", "variable x is missing range:, check:"),
+    ("var INT x { range: 0..5 }", "variable x is missing check:"),
+    ("map m { src: a }", "map m is missing dst:"),
+    ("AOT a { STATIC }", "AOT a is missing size:"),
+    ("pkt p { size: 4B }", "packet p is missing exec:"),
+    ("link l { src: a }", "link l is missing dst:"),
+])
+def test_missing_attributes_name_the_block(source, message, frontend):
+    with pytest.raises(ValueError, match=message):
+        compile_source(source, frontend=frontend)
+
+
+def test_missing_attributes_are_reported_by_the_command_line(tmp_path, capsys):
+    source = tmp_path / "broken.neo"
+    source.write_text("var INT x { range: 0..5 }", encoding="utf-8")
+    assert Compiler_Driver.main([str(source), "-j", "1"]) == 1
+    assert "variable x is missing check:" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("frontend", FRONTENDS)
+def test_packet_priority_is_optional(frontend):
+    code = compile_source("pkt RAM_STREAM { size: 256B, exec: run_packetized }", frontend=frontend)
+    assert code == "PACKET RAM_STREAM SIZE 256B EXEC run_packetized"
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from Compile_Client import compile_remote, request
+from Compile_Server import NeoASMCompileServer
+from Compiler_Driver import OUTPUT_SUFFIX, compile_source
+
+SOURCE = "var INT a { range: 0..100, check: rigid } var INT b { range: 0..10, check: soft }\n"
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = NeoASMCompileServer(str(tmp_path / "server.sock"), cache_size=16)
+    server.bind()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(10)
+
+
+def test_compiles_relative_to_the_client(server, tmp_path, monkeypatch):
+    (tmp_path / "program.neo").write_text(SOURCE)
+    monkeypatch.chdir(tmp_path)
+    status, output, errors = compile_remote(["-j", "1", "-o", "out", "program.neo"], server.socket_path)
+    assert (status, errors) == (0, "")
+    assert (tmp_path / "out" / ("program" + OUTPUT_SUFFIX)).read_text() == compile_source(SOURCE) + "\n"
+
+    compile_remote(["-j", "1", "-o", "out", "program.neo"], server.socket_path)
+    stats = request({"command": "stats"}, server.socket_path)
+    assert (stats["requests"], stats["compilers"]) == (2, 1)
+    assert stats["cache_hits"] >= 1
+
+
+def test_stdin_and_errors(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stdin = tmp_path / "stdin.neo"
+    stdin.write_text(SOURCE)
+    with open(stdin) as file:
+        status, output, errors = compile_remote(["-j", "1", "-"], server.socket_path, file)
+    assert (status, output) == (0, compile_source(SOURCE) + "\n")
+
+    status, output, errors = compile_remote(["-j", "1", "--frontend", "nope", "x.neo"], server.socket_path)
+    assert status == 2 and "invalid choice" in errors
+    status, output, errors = compile_remote(["-j", "1", "missing.neo"], server.socket_path)
+    assert status == 1 and "missing.neo" in errors
+
+    assert server.dispatch({"command": "ping", "version": 0}) == {"error": "Protocol version 0 is not supported"}
+    assert request({"command": "reload"}, server.socket_path) == {"error": "Unknown command reload"}
+    assert request({"command": "ping"}, server.socket_path)["pid"] > 0
+
+
+def test_refuses_a_second_server_and_shuts_down(server):
+    with pytest.raises(RuntimeError, match="already listening"):
+        NeoASMCompileServer(server.socket_path).bind()
+    assert request({"command": "shutdown"}, server.socket_path) == {"stopping": True}
@@ -0,0 +1,38 @@
+from Compiler_Driver import NeoASMBatchCompiler, compile_source, split_compile_units
+from Machine_Profile import DEFAULT_CPU_ARCHITECTURE
+from Pass_Manager import DEFAULT_PIPELINE
+
+FIRST = '''var INT x { range: 1..1024, check: rigid }
+AOT B { STATIC size: 64B }
+frame F {
+    map M { src: B, dst: x }
+    vec_add V { in: "x, x", out: z }
+}
+frame G {
+    exec E { link: V }
+    var INT y { range: 0..9, check: soft }
+}
+pkt P { size: 256B, exec: E, priority: L1_cache }
+'''
+SECOND = '''frame H { var FLOAT w { range: 0..1, check: rigid } vec_mul { in: "w, w", out: w } }
+validate w { rule: bounds }
+'''
+
+
+def test_frames_and_declaration_runs_are_split_in_source_order():
+    chunks = split_compile_units(FIRST)
+    assert "".join(chunks) == FIRST
+    assert [chunk.split()[0] for chunk in chunks] == ["var", "frame", "frame", "pkt"]
+
+
+def test_batches_match_compile_source_serial_pooled_and_cached():
+    named_sources = [("first.neo", FIRST), ("second.neo", SECOND)]
+    for passes in (None, DEFAULT_PIPELINE):
+        expected = [compile_source(source_code, dict(DEFAULT_CPU_ARCHITECTURE), passes=passes)
+                    for _, source_code in named_sources]
+        for max_workers in (1, 2):
+            with NeoASMBatchCompiler(DEFAULT_CPU_ARCHITECTURE, max_workers, cache_size=16, passes=passes,
+                                     min_parallel_bytes=0) as compiler:
+                assert compiler.compile_sources(named_sources) == expected
+                assert compiler.compile_sources(named_sources) == expected
+                assert compiler.cache_hits == len(split_compile_units(FIRST)) + len(split_compile_units(SECOND))
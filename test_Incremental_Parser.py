@@ -0,0 +1,53 @@
+import random
+
+from Incremental_Parser import NeoASMIncrementalDocument
+
+SOURCE = '''var INT x { range: 1..1024, check: rigid } // "bounds
+map M { src: x, dst: y } "
+frame F {
+    vec_add V { in: "x, y", out: z }
+    exec E { link: V, op: "run }" }
+}
+str_map S { op: "entangle", in: "q", out: e }
+pkt P { size: 256B, exec: E, priority: L1_cache }
+'''
+
+# Fragments that change how the text around an edit is lexed
+FRAGMENTS = ["", "\n", "{", "}", '"', "//", " ", "x", "var INT y { range: 1..2 }", 'op: "a }', "frame G {"]
+
+
+def assert_matches_fresh_parse(document):
+    fresh = NeoASMIncrementalDocument(document.text)
+    assert list(document.starts) == list(fresh.starts)
+    assert list(document.ends) == list(fresh.ends)
+    assert document.ast == fresh.ast
+    assert document.errors() == fresh.errors()
+
+
+def test_single_unit_edit_reuses_other_units():
+    document = NeoASMIncrementalDocument(SOURCE)
+    start = SOURCE.index("256B")
+    report = document.apply_edit(start, start + len("256B"), "1KB")
+    assert report["reparsed_units"] == 1
+    assert report["reused_units"] == len(document.units) - 1
+    assert_matches_fresh_parse(document)
+
+
+def test_deleting_a_newline_closes_a_string_opened_by_an_earlier_unit():
+    source = 'map M { src: x, dst: "y }  \nvar INT z { range: "1..2, check: soft }\n'
+    document = NeoASMIncrementalDocument(source)
+    newline = source.index("\n")
+    document.apply_edit(newline, newline + 1, "")
+    assert_matches_fresh_parse(document)
+
+
+def test_random_edits_match_fresh_parse():
+    generator = random.Random(20240518)
+    document = NeoASMIncrementalDocument(SOURCE)
+    for _ in range(3000):
+        if len(document.text) > 4 * len(SOURCE):
+            document.set_text(SOURCE)
+        start = generator.randint(0, len(document.text))
+        end = min(len(document.text), start + generator.choice((0, 0, 1, 2, 5, 20)))
+        document.apply_edit(start, end, generator.choice(FRAGMENTS))
+        assert_matches_fresh_parse(document)
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from Install_Graph import NeoASMInstallGraph
+
+
+def graph(tmp_path, ran, fail=(), inputs=None, max_workers=2):
+    # packages -> architecture -> runtime; clone and directories are independent
+    install = NeoASMInstallGraph(str(tmp_path / "state.json"), max_workers, log=lambda message: None)
+
+    def action(name):
+        def run():
+            ran.append(name)
+            if name in fail:
+                raise RuntimeError(f"{name} broke")
+        return run
+
+    install.add("packages", action("packages"), inputs=inputs)
+    install.add("architecture", action("architecture"), requires=["packages"])
+    install.add("clone", action("clone"))
+    install.add("directories", action("directories"))
+    install.add("runtime", action("runtime"), requires=["architecture", "directories"])
+    return install
+
+
+def test_order_and_errors(tmp_path):
+    install = graph(tmp_path, [])
+    order = install.order()
+    assert order.index("packages") < order.index("architecture") < order.index("runtime")
+    assert install.order(["architecture"]) == ["packages", "architecture"]
+    with pytest.raises(ValueError, match="Duplicate"):
+        install.add("clone", print)
+    install.add("loop", print, requires=["loop"])
+    with pytest.raises(ValueError, match="cycle"):
+        install.order(["loop"])
+    install.add("orphan", print, requires=["missing"])
+    with pytest.raises(ValueError, match="required by orphan"):
+        install.order(["orphan"])
+
+
+def test_independent_steps_overlap(tmp_path):
+    barrier = threading.Barrier(2, timeout=10)
+    install = NeoASMInstallGraph(str(tmp_path / "state.json"), 2, log=lambda message: None)
+    install.add("apt", barrier.wait)
+    install.add("pip", barrier.wait)
+    assert install.run() == {"apt": "done", "pip": "done"}
+
+
+def test_failures_block_dependents_and_reruns_resume(tmp_path):
+    ran = []
+    status = graph(tmp_path, ran, fail={"architecture"}).run()
+    assert status == {"packages": "done", "architecture": "failed", "clone": "done", "directories": "done",
+                      "runtime": "blocked"}
+    assert "runtime" not in ran
+
+    ran.clear()
+    status = graph(tmp_path, ran).run()
+    assert sorted(ran) == ["architecture", "runtime"]
+    assert [name for name, result in status.items() if result == "cached"] == ["packages", "clone", "directories"]
+
+    ran.clear()
+    assert set(graph(tmp_path, ran).run().values()) == {"cached"} and ran == []
+    graph(tmp_path, ran).run(only=["clone"], force=True)
+    assert ran == ["clone"]
+
+    # Only the step whose inputs changed runs again
+    ran.clear()
+    graph(tmp_path, ran, inputs={"wheels": "neoasm_cache/wheels"}).run()
+    assert ran == ["packages"]
+
+
+def test_unreadable_state_starts_over(tmp_path):
+    (tmp_path / "state.json").write_text("{ not json")
+    ran = []
+    graph(tmp_path, ran).run()
+    assert len(ran) == 5
+    (tmp_path / "state.json").write_text('{"format_version": 0, "steps": {}}')
+    ran.clear()
+    graph(tmp_path, ran).run()
+    assert len(ran) == 5
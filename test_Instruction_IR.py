@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from Compiler_Driver import lower_source
+from Instruction_IR import (NeoASMInstruction, Opcode, iter_text, read_binary, resolve_exec_links, write_binary,
+                            write_text)
+
+SOURCE = '''frame F {
+    var INT x { range: 1..9, check: rigid }
+    map M { src: A, dst: x }
+}
+vec_add V { in: "x, x", out: y }
+exec E { link: V, size: 64B }
+'''
+
+
+def test_text_and_binary_streams_agree():
+    instructions = lower_source(SOURCE)
+    text = io.StringIO()
+    assert write_text(instructions, text) == len(instructions)
+    assert text.getvalue().splitlines() == list(iter_text(instructions))
+
+    binary = io.BytesIO()
+    write_binary(instructions, binary)
+    binary.seek(0)
+    copies = list(read_binary(binary))
+    assert list(iter_text(copies)) == list(iter_text(instructions))
+    assert [(copy.opcode, copy.defs, copy.uses, copy.context) for copy in copies] == [
+        (original.opcode, original.defs, original.uses, original.context) for original in instructions]
+
+
+def test_corrupt_binary_streams_are_value_errors():
+    binary = io.BytesIO()
+    write_binary(lower_source(SOURCE), binary)
+    data = binary.getvalue()
+    for broken in (b"XXXX" + data[4:], data[:-3], data[:6] + b"\x07"):
+        with pytest.raises(ValueError):
+            list(read_binary(io.BytesIO(broken)))
+
+
+def test_operands():
+    instruction = NeoASMInstruction(Opcode.VEC, "V", (("TYPE", "ADD"), ("IN", "a")))
+    copy = instruction.copy()
+    copy.set_operand("IN", "b")
+    copy.set_operand("OUT", "c")
+    assert instruction.render() == "VEC_ADD V IN a"
+    assert copy.render() == "VEC_ADD V IN b OUT c" and copy.mnemonic == "VEC_ADD"
+
+
+def test_exec_links():
+    def exec_block(name, link):
+        return NeoASMInstruction(Opcode.EXEC, name, (("LINK", link),))
+
+    vec = NeoASMInstruction(Opcode.VEC, "ADD", (("TYPE", "ADD"), ("IN", "a"), ("OUT", "buffer")))
+    assert resolve_exec_links([vec, exec_block("E", "buffer"), exec_block("F", "E, buffer")]) == {1: [0], 2: [1, 0]}
+    with pytest.raises(ValueError, match="cycle"):
+        resolve_exec_links([exec_block("E", "F"), exec_block("F", "E")])
@@ -0,0 +1,54 @@
+import random
+
+from Instruction_IR import NeoASMInstruction, Opcode
+from Instruction_Scheduler import LATENCY_TABLES, NeoASMListScheduler, build_dependency_graph, select_latency_table
+
+
+def vec(operation, inputs, output):
+    return NeoASMInstruction(Opcode.VEC, operation, (("TYPE", operation), ("IN", ", ".join(inputs)), ("OUT", output)),
+                             defs=(output,), uses=tuple(inputs))
+
+
+def edges(instructions):
+    successors, _ = build_dependency_graph(instructions)
+    return {(index, successor) for index, targets in enumerate(successors) for successor in targets}
+
+
+def test_dependency_graph_hazards():
+    program = [
+        vec("ADD", ("a",), "b"),  # 0 writes b
+        vec("ADD", ("b",), "c"),  # 1 reads b: read after write on 0
+        vec("ADD", ("x",), "b"),  # 2 writes b again: write after write on 0, write after read on 1
+        vec("ADD", ("y",), "z"),  # 3 independent
+    ]
+    assert edges(program) == {(0, 1), (0, 2), (1, 2)}
+
+
+def test_schedule_keeps_every_dependency_in_order():
+    generator = random.Random(3)
+    names = [f"v{index}" for index in range(8)]
+    operations = ("ADD", "SUB", "MUL", "DIV", "DOT", "CROSS")
+    program = [vec(generator.choice(operations), generator.sample(names, 2), generator.choice(names))
+               for _ in range(300)]
+    for target in ("generic", "znver4", "skylake"):
+        order = NeoASMListScheduler({"target": target, "issue_width": 2}).schedule(program)
+        assert sorted(order) == list(range(len(program)))
+        position = {index: slot for slot, index in enumerate(order)}
+        assert all(position[before] < position[after] for before, after in edges(program))
+
+
+def test_critical_path_goes_first():
+    # The divide chain is the longest path, so it is issued ahead of the independent adds
+    program = [vec("ADD", ("p",), "q"), vec("ADD", ("r",), "s"), vec("DIV", ("a",), "b"), vec("DIV", ("b",), "c")]
+    scheduler = NeoASMListScheduler({"target": "generic", "issue_width": 1})
+    order = scheduler.schedule(program)
+    assert order[0] == 2 and order.index(2) < order.index(3)
+    assert scheduler.stats["critical_path"] == 2 * LATENCY_TABLES["generic"]["VEC_DIV"][0]
+    assert scheduler.stats["edges"] == 1
+
+
+def test_select_latency_table():
+    assert select_latency_table({"model": "AMD Ryzen 9 7950X"}) is LATENCY_TABLES["znver4"]
+    assert select_latency_table({"target": "skylake"}) is LATENCY_TABLES["skylake"]
+    assert select_latency_table({}) is LATENCY_TABLES["generic"]
+    assert select_latency_table({"latency_table": {"VEC_ADD": (9, 1, "VEC")}})["VEC_ADD"] == (9, 1, "VEC")
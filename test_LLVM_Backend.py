@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from Compiler_Driver import lower_source
+from LLVM_Backend import NeoASMLLVMBackend, llvm
+
+pytestmark = pytest.mark.skipif(llvm is None, reason="llvmlite is not installed")
+
+SOURCE = '''vec_add A { in: "a, b", out: c }
+vec_mul M { in: "c", out: d }
+vec_dot D { in: "a, b", out: s }
+vec_cross X { in: "u, v", out: w }
+exec E { link: "A, M" }
+'''
+
+
+def buffers(count):
+    generator = np.random.default_rng(5)
+    arrays = {name: generator.standard_normal(count) for name in ("a", "b", "d", "u", "v")}
+    arrays.update(c=np.zeros(count), s=np.zeros(1), w=np.zeros(count))
+    return arrays
+
+
+@pytest.mark.parametrize("element_type", ["double", "float"])
+def test_kernels_match_numpy(element_type):
+    program = NeoASMLLVMBackend(element_type=element_type).compile(lower_source(SOURCE))
+    dtype = np.float64 if element_type == "double" else np.float32
+    arrays = {name: array.astype(dtype) for name, array in buffers(99).items()}
+    expected_d = (arrays["a"] + arrays["b"]) * arrays["d"]
+    program.run("E", arrays, 99)  # c = a + b, then d = d * c
+    program.run("D", arrays, 99)
+    program.run("X", arrays, 99)
+    tolerance = 1e-12 if element_type == "double" else 1e-4
+    np.testing.assert_allclose(arrays["c"], arrays["a"] + arrays["b"], rtol=tolerance)
+    np.testing.assert_allclose(arrays["d"], expected_d, rtol=tolerance)
+    np.testing.assert_allclose(arrays["s"][0], np.dot(arrays["a"], arrays["b"]), rtol=tolerance * 10)
+    np.testing.assert_allclose(arrays["w"].reshape(-1, 3),
+                               np.cross(arrays["u"].reshape(-1, 3), arrays["v"].reshape(-1, 3)), rtol=tolerance)
+
+
+def test_buffers_are_checked_before_the_call():
+    program = NeoASMLLVMBackend().compile(lower_source(SOURCE))
+    arrays = buffers(16)
+    with pytest.raises(ValueError, match="needs buffer b"):
+        program.run("A", {"a": arrays["a"], "c": arrays["c"]}, 16)
+    with pytest.raises(ValueError, match="holds 8 elements"):
+        program.run("A", dict(arrays, c=np.zeros(8)), 16)
+    with pytest.raises(KeyError):
+        program.function("missing")
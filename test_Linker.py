@@ -0,0 +1,94 @@
+import io
+
+import pytest
+
+from Instruction_IR import iter_text
+from Linker import NeoASMLinker, build_module, object_path
+from Object_File import ADDRESS_RELOCATION, DATA_SYMBOL, SYMBOL_RELOCATION, compile_object, read_object
+
+PRODUCER = "AOT buffer { STATIC size: 100B } var INT count { range: 0..9, check: rigid }"
+CONSUMER = ("var INT total { range: 0..9, check: rigid } map pull { src: buffer, dst: total } "
+            "link out { src: total, dst: RAM }")
+
+
+def test_object_round_trip():
+    module = compile_object(CONSUMER, "consumer.neo")
+    copy = read_object(io.BytesIO(module.to_bytes()))
+    assert list(iter_text(copy.instructions)) == list(iter_text(module.instructions))
+    for field in ("name", "data_size", "alignment", "source_hash", "architecture", "exports", "imports",
+                  "relocations"):
+        assert getattr(copy, field) == getattr(module, field), field
+    assert copy.digest == module.digest
+    assert module.imports == ["RAM", "buffer"]
+    # The variable and the map have addresses; the map and the link refer to imported names
+    assert module.relocations == [(0, ADDRESS_RELOCATION, None), (1, ADDRESS_RELOCATION, None),
+                                  (1, SYMBOL_RELOCATION, "buffer"), (2, SYMBOL_RELOCATION, "RAM")]
+
+
+def test_bad_object_files_are_value_errors():
+    data = compile_object(PRODUCER, "producer.neo").to_bytes()
+    for broken in (b"XXXX" + data[4:], data[:40]):
+        with pytest.raises(ValueError):
+            read_object(io.BytesIO(broken))
+
+
+def test_link_relocates_and_resolves():
+    producer, consumer = compile_object(PRODUCER, "producer.neo"), compile_object(CONSUMER, "consumer.neo")
+    linker = NeoASMLinker()
+    linker.add(producer)
+    linker.add(consumer)
+    program = linker.link()
+    base = program.bases["consumer.neo"]
+    assert program.bases["producer.neo"] == 0 and base >= producer.data_size and base % 64 == 0
+    address = int(consumer.instructions[consumer.exports["total"][0]].operand("ALIGNED"))
+    assert program.symbols["total"] == ("consumer.neo", DATA_SYMBOL, address + base)
+    assert program.symbols["buffer"][0] == "producer.neo"
+    assert program.undefined == {"RAM": ["consumer.neo"]}
+    with pytest.raises(ValueError, match="Undefined symbols: RAM"):
+        strict = NeoASMLinker(strict=True)
+        strict.add(consumer)
+        strict.link()
+
+
+def test_duplicate_symbols_are_errors():
+    linker = NeoASMLinker()
+    linker.add(compile_object(PRODUCER, "a.neo"))
+    linker.add(compile_object(PRODUCER, "b.neo"))
+    with pytest.raises(ValueError, match="Duplicate symbol"):
+        linker.link()
+
+
+def test_relink_reuses_unchanged_modules():
+    linker = NeoASMLinker()
+    linker.add(compile_object(PRODUCER, "producer.neo"))
+    linker.add(compile_object(CONSUMER, "consumer.neo"))
+    first = list(iter_text(linker.link().instructions))
+    assert linker.stats["relinked"] == 2
+    assert list(iter_text(linker.link().instructions)) == first and linker.stats["reused"] == 2
+
+    # The consumer changes, the producer's base and imports do not
+    linker.add(compile_object(CONSUMER.replace("0..9", "0..5"), "consumer.neo"))
+    linker.link()
+    assert linker.stats["relinked"] == 1
+
+    # A bigger producer moves the consumer's base
+    linker.add(compile_object(PRODUCER.replace("100B", "4096B"), "producer.neo"))
+    program = linker.link()
+    assert linker.stats["relinked"] == 2 and program.bases["consumer.neo"] >= 4096
+
+
+def test_object_paths_and_rebuilds(tmp_path):
+    for directory in ("a", "b"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "util.neo").write_text(PRODUCER, encoding="utf-8")
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    first, second = (str(tmp_path / directory / "util.neo") for directory in ("a", "b"))
+    assert object_path(first, str(objects)) != object_path(second, str(objects))
+    assert object_path(first) == str(tmp_path / "a" / "util.nobj")
+
+    assert build_module(first, str(objects))[1] and build_module(second, str(objects))[1]
+    assert not build_module(first, str(objects))[1]
+    (tmp_path / "a" / "util.neo").write_text(PRODUCER.replace("100B", "200B"), encoding="utf-8")
+    module, rebuilt = build_module(first, str(objects))
+    assert rebuilt and module.data_size > 100
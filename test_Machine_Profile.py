@@ -0,0 +1,46 @@
+import subprocess
+
+import pytest
+
+import Compiler_Driver
+from Machine_Profile import PROFILE_ENV, machine_architecture, probe_machine, save_machine_profile
+
+# Six variables live at once: enough registers by default, spills with three
+SOURCE = "".join(f"var INT v{index} {{ range: 0..9, check: rigid }} " for index in range(6))
+SOURCE += "".join(f"vec_add {{ in: \"v{index}\", out: v0 }} " for index in range(1, 6))
+
+
+def save_profile(path, **architecture):
+    profile = probe_machine(cpu_info={"brand_raw": "test"})
+    profile["cpu_architecture"] = dict({"cache_line_size": 64}, **architecture)
+    return save_machine_profile(profile, str(path))
+
+
+def compile_file(tmp_path, *options):
+    source = tmp_path / "program.neo"
+    source.write_text(SOURCE, encoding="utf-8")
+    assert Compiler_Driver.main([str(source), "-j", "1", *options]) == 0
+    return (tmp_path / ("program" + Compiler_Driver.OUTPUT_SUFFIX)).read_text(encoding="utf-8")
+
+
+def test_missing_profile_is_an_error_and_starts_nothing(tmp_path, monkeypatch):
+    def popen(*args, **kwargs):
+        raise AssertionError("machine_architecture() started a process")
+
+    monkeypatch.setattr(subprocess, "Popen", popen)
+    with pytest.raises(ValueError, match="No machine profile"):
+        machine_architecture(str(tmp_path / "missing.json"))
+
+
+def test_stored_profile_is_read(tmp_path):
+    path = save_profile(tmp_path / "profile.json", register_count=2)
+    assert machine_architecture(path)["register_count"] == 2
+
+
+def test_output_uses_the_profile_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path / "profile.json"))
+    default = compile_file(tmp_path)
+    save_profile(tmp_path / "profile.json", register_count=3)
+    assert compile_file(tmp_path) == default
+    profiled = compile_file(tmp_path, "--machine-profile")
+    assert profiled != default and "SPILL" in profiled
@@ -0,0 +1,68 @@
+import os
+import random
+import subprocess
+import sys
+
+from Memory_Layout import NeoASMMemoryLayoutPlanner, parse_size
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def plan(objects, cache_line_size=64):
+    planner = NeoASMMemoryLayoutPlanner(cache_line_size)
+    for name, size, isolated in objects:
+        planner.add(name, "variable", size, isolated)
+    return planner.plan(), planner.addresses()
+
+
+def test_parse_size():
+    assert [parse_size(text) for text in ("1024", "512B", "1KB", "2mb", " 3 G ")] == [1024, 512, 1024, 2 << 20,
+                                                                                     3 << 30]
+    assert parse_size("lots", 7) == 7 and parse_size(None, 8) == 8
+
+
+def test_large_objects_are_line_aligned_and_small_ones_fill_their_tails():
+    report, addresses = plan([("big", 100, False), ("a", 16, False), ("b", 8, False), ("c", 4, False)])
+    assert addresses["big"] == 0
+    # big ends at 100 and leaves 28 bytes of its second line: a fits at 112, b at 104, c at 100
+    assert (addresses["a"], addresses["b"], addresses["c"]) == (112, 104, 100)
+    assert report["total_bytes"] == 128 and report["wasted_bytes"] == 0
+
+
+def test_isolated_objects_share_no_line():
+    _, addresses = plan([("hot", 4, True), ("cold", 4, False), ("other", 4, True)])
+    lines = {name: address // 64 for name, address in addresses.items()}
+    assert len(set(lines.values())) == 3
+
+
+def test_layout_does_not_depend_on_declaration_order_and_never_overlaps():
+    generator = random.Random(7)
+    objects = [(f"v{index}", generator.choice((1, 2, 4, 8, 16, 32, 48, 64, 100, 300)), generator.random() < 0.1)
+               for index in range(200)]
+    report, addresses = plan(objects)
+    shuffled = list(objects)
+    generator.shuffle(shuffled)
+    assert plan(shuffled)[1] == addresses
+
+    sizes = {name: size for name, size, _ in objects}
+    spans = sorted((addresses[name], addresses[name] + sizes[name]) for name in sizes)
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    for name, size, isolated in objects:
+        if isolated or size >= 64:
+            assert addresses[name] % 64 == 0
+        else:
+            assert addresses[name] % (1 << (size - 1).bit_length()) == 0
+    assert spans[-1][1] <= report["total_bytes"]
+
+
+def test_addresses_are_the_same_in_every_process():
+    # The planner replaced addresses derived from hash(), which changes with PYTHONHASHSEED
+    script = ("from Compiler_Driver import compile_source\n"
+              "print(compile_source('var INT a { range: 1..9, check: soft } var FLOAT b { range: 0..1, check: soft }"
+              " AOT c { STATIC size: 64B } map m { src: c, dst: a }', {'cache_line_size': 64}))")
+    outputs = set()
+    for seed in ("1", "2"):
+        environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=HERE)
+        outputs.add(subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True, text=True,
+                                   check=True).stdout)
+    assert len(outputs) == 1 and "ALIGNED" in outputs.pop()
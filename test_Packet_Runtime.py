@@ -0,0 +1,66 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from Compiler_Driver import lower_source
+from Packet_Runtime import NeoASMPacketRuntime, priority_rank
+
+SOURCE = '''pkt FAST { size: 4B, exec: upper, priority: L1_cache }
+pkt SLOW { size: 8B, exec: upper, priority: RAM }
+pkt PLAIN { size: 8B, exec: upper }
+'''
+
+
+def upper(view, index):
+    # Upper-cases the packet in place and returns what it saw
+    data = bytes(view)
+    view[:] = data.upper()
+    return data
+
+
+def test_priority_rank():
+    assert [priority_rank(level) for level in ("L1_cache", "l2", "L3", "RAM", None, "disk")] == [0, 1, 2, 3, 4, 4]
+
+
+def test_packets_are_views_processed_in_priority_order():
+    runtime = NeoASMPacketRuntime({"upper": upper}, max_workers=1, max_in_flight=1)
+    runtime.load(lower_source(SOURCE))
+    streams = {"PLAIN": bytearray(b"plain stream"), "SLOW": bytearray(b"slow stream"),
+               "FAST": bytearray(b"fast stream")}
+    for name, data in streams.items():
+        runtime.submit(name, data)
+    with runtime:
+        results = runtime.run()
+
+    assert results["FAST"] == [b"fast", b" str", b"eam"]
+    assert results["SLOW"] == [b"slow str", b"eam"]
+    assert streams["FAST"] == b"FAST STREAM"  # Written through the packet views
+    dispatched = [record.packet for record in sorted(runtime.records, key=lambda record: record.started)]
+    assert dispatched == ["FAST"] * 3 + ["SLOW"] * 2 + ["PLAIN"] * 2
+    metrics = runtime.metrics()
+    assert metrics["packets"] == 7 and metrics["bytes"] == 34
+    assert metrics["by_priority"] == {"L1": 3, "RAM": 2, "OTHER": 2}
+
+
+def test_process_workers_write_into_shared_memory():
+    segment = shared_memory.SharedMemory(create=True, size=12)
+    try:
+        segment.buf[:12] = b"shared bytes"
+        with NeoASMPacketRuntime({"upper": upper}, max_workers=2, use_processes=True) as runtime:
+            runtime.load(lower_source(SOURCE))
+            assert runtime.run_packet("FAST", segment) == [b"shar", b"ed b", b"ytes"]
+        assert bytes(segment.buf[:12]) == b"SHARED BYTES"
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def test_undeclared_packets_and_missing_handlers():
+    runtime = NeoASMPacketRuntime()
+    runtime.load(lower_source(SOURCE))
+    with pytest.raises(KeyError):
+        runtime.submit("OTHER", b"data")
+    with pytest.raises(ValueError, match="No handler registered for upper"):
+        runtime.submit("FAST", b"data")
+    with pytest.raises(ValueError, match="positive size"):
+        runtime.declare("EMPTY", "0B", "upper", None)
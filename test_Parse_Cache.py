@@ -0,0 +1,38 @@
+from Compiler_Driver import FRONTENDS, NeoASMBatchCompiler, lower_source
+from Instruction_IR import iter_text
+from Machine_Profile import DEFAULT_CPU_ARCHITECTURE
+from Parse_Cache import NeoASMParseCache
+from Profiler import NeoASMProfiler
+
+SOURCE = '''var INT x { range: 1..1024, check: rigid }
+map M { src: x, dst: y }
+frame F {
+    vec_add V { in: "x, y", out: z }
+    exec E { link: V }
+}
+'''
+
+
+def test_second_parse_is_a_hit_and_an_edit_is_a_miss(tmp_path):
+    cache = NeoASMParseCache(str(tmp_path))
+    for frontend in FRONTENDS:
+        fresh = list(iter_text(lower_source(SOURCE, DEFAULT_CPU_ARCHITECTURE, frontend)))
+        cache.reset_stats()
+        assert list(iter_text(lower_source(SOURCE, DEFAULT_CPU_ARCHITECTURE, frontend, cache))) == fresh
+        assert list(iter_text(lower_source(SOURCE, DEFAULT_CPU_ARCHITECTURE, frontend, cache))) == fresh
+        assert (cache.hits, cache.misses) == (1, 1)
+        lower_source(SOURCE.replace("1024", "2048"), DEFAULT_CPU_ARCHITECTURE, frontend, cache)
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_second_build_reads_every_chunk_from_the_cache(tmp_path):
+    counters = []
+    for _ in range(2):
+        with NeoASMProfiler() as profiler, NeoASMBatchCompiler(DEFAULT_CPU_ARCHITECTURE, max_workers=1,
+                                                               parse_cache_dir=str(tmp_path)) as compiler:
+            output = compiler.compile_sources([("a.neo", SOURCE)])
+        counters.append(profiler.counters)
+    assert counters[0].get("parse_cache.hits", 0) == 0 and counters[0]["parse_cache.misses"] == 2
+    assert counters[1]["parse_cache.hits"] == 2 and counters[1].get("parse_cache.misses", 0) == 0
+    with NeoASMBatchCompiler(DEFAULT_CPU_ARCHITECTURE, max_workers=1) as compiler:
+        assert compiler.compile_sources([("a.neo", SOURCE)]) == output
@@ -0,0 +1,19 @@
+from Compiler_Driver import compile_source
+from Pass_Manager import DEFAULT_PIPELINE
+
+LIVE_MAP = ('AOT X { STATIC size: 64B } var INT y { range: 0..5, check: rigid } map M { src: X, dst: y } '
+            'vec_add V { in: "y, y", out: z } exec E { link: V }')
+
+
+def test_map_writing_a_live_variable_is_kept():
+    for passes in (None, DEFAULT_PIPELINE):
+        code = compile_source(LIVE_MAP, passes=passes)
+        assert "MAP M (X -> y)" in code and "AOT X STATIC" in code, passes
+
+
+def test_unreferenced_declarations_are_removed():
+    source = LIVE_MAP + (' AOT W { STATIC size: 64B } var INT unused { range: 0..5, check: rigid } '
+                         'map N { src: W, dst: unused } validate unused { rule: "unused > 0" }')
+    code = compile_source(source, passes=DEFAULT_PIPELINE)
+    assert "MAP M (X -> y)" in code
+    assert not any(name in code for name in ("W ", "unused", "MAP N"))
@@ -0,0 +1,73 @@
+import json
+
+import Profiler
+from Compiler_Driver import compile_source
+from Profiler import NeoASMProfiler
+
+SOURCE = "var INT a { range: 0..100, check: rigid } var INT b { range: 0..10, check: soft }"
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def on_phase_start(self, name, category):
+        self.events.append(("start", name))
+
+    def on_phase_end(self, record):
+        self.events.append(("end", record.name))
+
+    def on_counter(self, name, value, total):
+        self.events.append(("counter", name, total))
+
+
+def test_hooks_are_inert_without_a_profiler():
+    assert Profiler.active_profiler() is None
+    with Profiler.phase("idle") as current:
+        Profiler.count("idle")
+    assert current is Profiler._NULL_PHASE
+
+
+def test_nested_phases_counters_and_hooks():
+    recorder = Recorder()
+    with NeoASMProfiler(hooks=[recorder]) as profiler:
+        assert Profiler.active_profiler() is profiler
+        with Profiler.phase("outer"):
+            with Profiler.phase("inner", category="test"):
+                Profiler.count("items", 2)
+            Profiler.count("items")
+    assert Profiler.active_profiler() is None
+    assert [(record.name, record.depth) for record in profiler.records] == [("inner", 1), ("outer", 0)]
+    assert profiler.counters == {"items": 3}
+    assert recorder.events == [("start", "outer"), ("start", "inner"), ("counter", "items", 2), ("end", "inner"),
+                               ("counter", "items", 3), ("end", "outer")]
+
+
+def test_compile_reports_phases_and_peak_memory():
+    with NeoASMProfiler(trace_memory=True) as profiler:
+        compile_source(SOURCE, frontend="analyzer")
+    summary = profiler.summary()
+    assert {"analyzer.parse", "codegen.emit"} <= set(summary["phases"])
+    assert all(entry["peak_bytes"] > 0 for entry in summary["phases"].values())
+    assert summary["counters"]["nodes"] == 2
+    table = profiler.format_summary()
+    assert table.splitlines()[0].split() == ["phase", "calls", "wall", "ms", "cpu", "ms", "peak", "MB"]
+    assert "codegen.emit" in table
+
+
+def test_export_merge_and_chrome_trace(tmp_path):
+    with NeoASMProfiler() as worker:
+        with Profiler.phase("work"):
+            Profiler.count("jobs")
+    merged = NeoASMProfiler()
+    merged.merge(worker.export())
+    merged.merge(worker.export())
+    assert merged.summary()["phases"]["work"]["calls"] == 2
+    assert merged.counters == {"jobs": 2}
+
+    path = tmp_path / "trace.json"
+    merged.write_chrome_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert sorted(event["ph"] for event in events) == ["C", "C", "X", "X"]
+    assert [event["ts"] for event in events] == sorted(event["ts"] for event in events)
+    assert all(event["dur"] >= 0 for event in events if event["ph"] == "X")
@@ -0,0 +1,48 @@
+from Compiler_Driver import lower_source
+from Range_Analysis import analyze_ranges, combine, parse_range, storage_type
+
+
+def analyze(source):
+    return analyze_ranges(lower_source(source))
+
+
+def test_parse_range_and_storage_type():
+    assert parse_range("0..255") == (0, 255) and parse_range("-1.5..2") == (-1.5, 2)
+    assert parse_range("9..1") is None and parse_range("lots") is None and parse_range(None) is None
+    assert [storage_type(*bounds) for bounds in ((0, 255), (-1, 1), (0, 256), (-(1 << 40), 0))] == [
+        "u8", "i8", "u16", "i64"]
+
+
+def test_combine():
+    assert combine("ADD", (0, 5), (1, 2), True) == (1, 7)
+    assert combine("SUB", (0, 5), (1, 2), True) == (-2, 4)
+    assert combine("MUL", (-2, 3), (-1, 4), True) == (-8, 12)
+    assert combine("DIV", (0, 9), (2, 4), True) == (0, 5)
+    assert combine("DIV", (0, 9), (-1, 4), True) is None
+    assert combine("DOT", (0, 1), (0, 1), False) is None
+
+
+def test_proven_writes_elide_the_check():
+    declarations = ("var INT a { range: 0..10, check: rigid } var INT b { range: 0..10, check: rigid } "
+                    "var INT c { range: 0..20, check: rigid } var INT d { range: 0..15, check: rigid } ")
+    results = analyze(declarations + 'vec_add { in: "a, b", out: c } vec_add { in: "a, b", out: d }')
+    assert results["c"] == (True, "u8")  # 0..20 covers every a + b
+    assert results["d"] == (False, "u8")  # a + b may reach 20
+    assert results["a"] == (False, "u8")  # Never written here: filled from outside, so still checked
+
+
+def test_only_rigid_integers_are_narrowed():
+    results = analyze("var INT wide { range: 0..60000, check: rigid } var INT huge { range: 0..70000, "
+                      "check: rigid } var INT soft { range: 0..5, check: soft } var FLOAT f { range: 0..1, "
+                      "check: rigid }")
+    assert results["wide"] == (False, "u16")
+    assert results["huge"] == (False, None)  # u32 is no narrower than INT itself
+    assert results["f"] == (False, None)
+    assert "soft" not in results
+
+
+def test_a_map_write_is_never_proven():
+    results = analyze("var INT a { range: 0..1, check: rigid } var INT b { range: 0..1, check: rigid } "
+                      "var INT y { range: 0..5, check: rigid } AOT X { STATIC size: 64B } map M { src: X, dst: y } "
+                      'vec_add { in: "a, b", out: y }')
+    assert results["y"] == (False, "u8")
@@ -0,0 +1,75 @@
+import pytest
+
+from Instruction_IR import NeoASMInstruction, Opcode, iter_text
+from Register_Allocator import NeoASMLinearScanAllocator, compute_live_intervals, max_register_pressure
+
+
+def declare(name):
+    return NeoASMInstruction(Opcode.VAR, name, (("TYPE", "INT"),), defs=(name,))
+
+
+def add(inputs, output):
+    # output = output + every input
+    return NeoASMInstruction(Opcode.VEC, "ADD", (("TYPE", "ADD"), ("IN", ", ".join(inputs)), ("OUT", output)),
+                             defs=(output,), uses=tuple(inputs) + (output,))
+
+
+def allocate(instructions, register_count):
+    variables = {instruction.name for instruction in instructions if instruction.opcode == Opcode.VAR}
+    memory_map = {name: 64 * index for index, name in enumerate(sorted(variables))}
+    allocator = NeoASMLinearScanAllocator(register_count)
+    return allocator, list(iter_text(allocator.allocate(instructions, variables, memory_map)))
+
+
+def test_intervals_run_from_declaration_to_last_use():
+    instructions = [declare("a"), declare("b"), add(["a"], "b"), declare("c"), add(["c"], "c")]
+    intervals = {interval.name: interval for interval in compute_live_intervals(instructions, {"a", "b", "c"})}
+    assert [(name, intervals[name].start, intervals[name].end) for name in "abc"] == [("a", 0, 2), ("b", 1, 2),
+                                                                                      ("c", 3, 4)]
+    assert max_register_pressure(intervals.values()) == 2
+
+
+def test_registers_are_reused_after_an_interval_ends():
+    allocator, text = allocate([declare("a"), declare("b"), add(["a"], "b"), declare("c"), add(["c"], "c")], 2)
+    assert allocator.assignment == {"a": "R0", "b": "R1", "c": "R0"}
+    assert allocator.stats["spilled"] == 0
+    assert not [line for line in text if line.startswith(("SPILL", "RELOAD"))]
+
+
+# Five variables live at once on four registers: two become reload scratch
+# registers (an instruction touches two variables), two are allocatable.
+# a lives longest and is spilled when c starts; d and e end after every
+# interval still in a register, so they never get one.
+def pressured():
+    return [declare("a"), declare("b"), declare("c"), declare("d"), declare("e"),
+            add(["b"], "c"), add(["d"], "e"), add(["a"], "a"), add(["a"], "a")]
+
+
+def test_the_interval_that_ends_last_is_spilled_and_reloaded_before_each_later_use():
+    allocator, text = allocate(pressured(), 4)
+    assert (allocator.stats["scratch"], allocator.stats["allocatable"]) == (2, 2)
+    assert allocator.assignment["a"] == "R0"  # Held until the spill
+    assert text.index("VAR INT a REGISTER R0") < text.index("SPILL a R0 -> [0]") < text.index("VAR INT c REGISTER R0")
+    assert text.count("RELOAD a [0] -> R2") == 2
+    assert text[-4:] == ["RELOAD a [0] -> R2", "VEC_ADD ADD IN a OUT a", "RELOAD a [0] -> R2",
+                         "VEC_ADD ADD IN a OUT a"]
+
+
+def test_an_interval_that_ends_last_when_it_starts_is_spilled_whole():
+    allocator, text = allocate(pressured(), 4)
+    assert "VAR INT d REGISTER SPILLED" in text and "VAR INT e REGISTER SPILLED" in text
+    assert not [line for line in text if line.startswith(("SPILL d", "SPILL e"))]
+    assert text.index("RELOAD d [192] -> R2") < text.index("RELOAD e [256] -> R3") < text.index(
+        "VEC_ADD ADD IN d OUT e")
+    assert (allocator.stats["spilled"], allocator.stats["spill_instructions"]) == (3, 1)
+
+
+def test_every_declaration_of_a_redeclared_variable_gets_its_register():
+    allocator, text = allocate([declare("a"), add(["a"], "a"), declare("a"), add(["a"], "a")], 2)
+    assert text.count("VAR INT a REGISTER R0") == 2
+
+
+def test_too_few_registers_for_the_scratch_set_is_an_error():
+    instructions = [declare("a"), declare("b"), declare("c"), add(["a", "b"], "c")]
+    with pytest.raises(ValueError):
+        allocate(instructions, 2)
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from Compiler_Driver import lower_source
+from Stream_Transport import NeoASMStreamTransport
+
+SOURCE = '''AOT X { STATIC size: 64B }
+var INT GPU { range: 0..5, check: rigid }
+map up { dst: GPU, src: X }
+map file_in { src: INPUT, dst: RAM_STREAM }
+'''
+DATA = bytes(range(256)) * 3
+
+
+def transport(chunk_size=100):
+    result = NeoASMStreamTransport(chunk_size=chunk_size)
+    result.load(lower_source(SOURCE))
+    return result
+
+
+def test_region_to_region_copy_follows_the_map():
+    with transport() as streams:
+        assert streams.routes["up"] == ("X", "GPU")
+        streams.open_region("X", len(DATA)).view[:] = DATA
+        assert streams.transfer("up") == len(DATA)
+        assert streams.regions["GPU"].kind == "device" and bytes(streams.regions["GPU"].view) == DATA
+        assert streams.stats["chunks"] == 8 and not streams.stats["staged"]
+
+
+def test_streams_are_staged_through_the_double_buffer():
+    with transport() as streams:
+        streams.open_region("RAM_STREAM", len(DATA) + 10)
+        assert streams.transfer("file_in", io.BytesIO(DATA), offset=10) == len(DATA)
+        assert bytes(streams.regions["RAM_STREAM"].view[10:]) == DATA
+        assert streams.stats["staged"] and streams.stats["chunks"] == 8
+
+        seen = []
+        streams.transfer("file_in", DATA, consumer=lambda view, position: seen.append((position, bytes(view))))
+        assert [position for position, _ in seen] == list(range(0, len(DATA), 100))
+        assert b"".join(chunk for _, chunk in seen) == DATA
+
+
+def test_file_regions_are_written_to_disk(tmp_path):
+    path = tmp_path / "ram_stream.bin"
+    with transport() as streams:
+        streams.open_region("RAM_STREAM", len(DATA), "file", path=str(path))
+        streams.transfer("file_in", DATA)
+    assert path.read_bytes() == DATA
+
+
+def test_reader_errors_reach_the_caller():
+    class Broken:
+        def readinto(self, view):
+            raise OSError("device unplugged")
+
+    with transport() as streams:
+        streams.open_region("RAM_STREAM", 64)
+        with pytest.raises(OSError, match="device unplugged"):
+            streams.transfer("file_in", Broken())
+        with pytest.raises(KeyError):
+            streams.transfer("missing")
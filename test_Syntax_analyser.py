@@ -0,0 +1,31 @@
+import io
+
+from Syntax_analyser import TOKEN_KINDS, iter_token_spans
+
+SOURCE = '''frame F { var INT x { range : 1..1024, check: rigid } // "bounds
+    map M { src: x, dst: "y \\" }" }  AOT B { STATIC size: 64KB }
+    exec E { link: V, op: "run }" } pkt P { size: 256B, exec : E, priority: L1_cache }
+}
+'''
+
+
+def test_chunked_reader_matches_whole_source_at_every_chunk_size():
+    whole = list(iter_token_spans(SOURCE))
+    encoded = list(iter_token_spans(SOURCE.encode("utf-8")))
+    for chunk_size in range(1, 40):
+        assert list(iter_token_spans(io.StringIO(SOURCE), chunk_size)) == whole
+        assert list(iter_token_spans(io.BytesIO(SOURCE.encode("utf-8")), chunk_size)) == encoded
+
+
+def test_keys_may_have_blanks_before_the_colon():
+    kinds = [TOKEN_KINDS[kind_id] for kind_id, _, _, _ in iter_token_spans("range \t: 1..2")]
+    assert kinds == ["KEY", "RANGE"]
+
+
+def test_one_long_line_is_lexed_as_it_is_read():
+    line = "vec_add { in: a, out: b } " * 2000
+    reader = io.StringIO(line)
+    tokens = iter_token_spans(reader, 512)
+    next(tokens)
+    assert reader.tell() <= 2 * 512
+    assert len(list(tokens)) + 1 == len(list(iter_token_spans(line)))
@@ -0,0 +1,57 @@
+import pytest
+
+import Parser_Generator
+from Compiler_Driver import parse_source
+from Parser_Generator import build_parse_table
+from Table_Parser import NeoASMTableParser
+
+SOURCE = """
+var INT counter { range: 0..255, check: rigid }
+AOT block { STATIC size: 4KB }
+map mapping { src: block, dst: RAM }
+pkt stream { size: 256B, exec: run, priority: high }
+frame outer {
+    vec_add sum { in: "counter, counter", out: counter, device: CPU }
+    str_map names { in: counter, out: counter }
+    frame inner {
+        exec step { link: outer, size: 64B }
+    }
+}
+validate bounds { rule: bounds }
+link join { src: outer, dst: block }
+"""
+
+
+def test_builds_the_same_nodes_as_the_hand_written_parser():
+    expected = [node.to_dict() for node in parse_source(SOURCE)]
+    assert [node.to_dict() for node in NeoASMTableParser().parse(SOURCE)] == expected
+
+
+def test_comments_and_keywords_as_identifiers():
+    nodes = NeoASMTableParser().parse("// A variable named after a keyword\nvar INT map { range: 0..1, check: soft }")
+    assert nodes[0].identifier == "map"
+
+
+@pytest.mark.parametrize("source, message", [
+    ("var INT x { range: 0..1\n check: maybe }", "Unexpected 'maybe' on line 2, expected \"rigid\" or \"soft\""),
+    ("frame f {", "Unexpected end of input"),
+    ("AOT a { size: }", "Unexpected '}' on line 1"),
+    ("var INT x { range: 0..1 } ?", "Unexpected '?'"),
+])
+def test_errors_name_the_token_and_line(source, message):
+    with pytest.raises(SyntaxError, match=message):
+        NeoASMTableParser().parse(source)
+
+
+def test_generated_table_matches_the_grammar():
+    assert Parser_Generator.main(["--check"]) == 0
+
+
+@pytest.mark.parametrize("grammar, message", [
+    ('<program> ::= "a" | "a" "b"\n<identifier> ::= [a-z]+\n<punctuation> ::= [a-z]', "not LL\\(1\\)"),
+    ('<program> ::= <missing>\n', "undefined <missing>"),
+    ('<program> ::= "a"\n<program> ::= "b"\n', "defined twice"),
+])
+def test_rejects_bad_grammars(grammar, message):
+    with pytest.raises(SyntaxError, match=message):
+        build_parse_table(grammar)
@@ -0,0 +1,51 @@
+import threading
+
+from Compiler_Driver import lower_source
+from Instruction_IR import NeoASMInstruction, Opcode
+from Task_Graph import NeoASMTaskGraph
+
+SOURCE = '''map M { src: x, dst: y }
+vec_add V { in: "y, y", out: z }
+vec_add W { in: "a, a", out: b }
+'''
+
+
+def test_vec_operation_waits_for_the_map_that_writes_its_input():
+    # W is independent of M: the barrier only opens with both running at
+    # once. V reads what M writes, so it must see M done when it starts.
+    both_running = threading.Barrier(2, timeout=10)
+    seen = {}
+
+    def write(instruction):
+        both_running.wait()
+
+    def read(instruction):
+        seen["M"] = graph.records[graph.names["M"]].status
+
+    graph = NeoASMTaskGraph(lower_source(SOURCE), handlers={"M": write, "W": write, "V": read}, max_workers=3)
+    assert graph.tasks[graph.names["M"]].successors == [graph.names["V"]]
+    assert graph.tasks[graph.names["W"]].predecessors == []
+
+    assert graph.run() == {"M": "done", "V": "done", "W": "done"}
+    assert seen == {"M": "done"}
+    assert graph.records[graph.names["V"]].started >= graph.records[graph.names["M"]].finished
+
+
+def test_exec_links_never_close_a_cycle():
+    def vec(name, buffer):
+        return NeoASMInstruction(Opcode.VEC, name, (("TYPE", "ADD"), ("IN", buffer), ("OUT", buffer)),
+                                 defs=(name, buffer), uses=(buffer,))
+
+    def exec_block(name, link):
+        return NeoASMInstruction(Opcode.EXEC, name, (("LINK", link),), defs=(name,), uses=(link,))
+
+    # E reads the name A before the later A writes it, so that hazard orders
+    # E first and the link from A to E is left out; F runs after B and C
+    instructions = [exec_block("E", "A"), vec("A", "t"), vec("B", "s"), vec("C", "s"), exec_block("F", "B, C")]
+    graph = NeoASMTaskGraph(instructions)
+    names = graph.names
+    assert graph.tasks[names["E"]].successors == [names["A"]]
+    assert graph.tasks[names["A"]].successors == []
+    assert sorted(graph.tasks[names["F"]].predecessors) == [names["B"], names["C"]]
+    assert len(graph.order()) == len(instructions)
+    assert set(graph.run().values()) == {"done"}
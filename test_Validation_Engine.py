@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from Compiler_Driver import lower_source
+from Validation_Engine import NeoASMValidationEngine
+
+SOURCE = ("var INT level { range: 10..20, check: rigid } var FLOAT ratio { range: 0..1, check: soft } "
+          "var FLOAT sample { range: 0..1, check: soft } var INT free { range: 0..5, check: soft } "
+          "validate ratio { rule: bounds } validate sample { rule: null_check } validate ratio { rule: null_check }")
+
+
+def engine(block_size=7):
+    return NeoASMValidationEngine(lower_source(SOURCE), block_size=block_size, use_jit=False)
+
+
+def expected(values, low, high, null_check):
+    # Reference: the violating indices, one element at a time
+    def violates(value):
+        if value is None or value != value:
+            return null_check
+        return (low is not None and value < low) or (high is not None and value > high)
+
+    return [index for index, value in enumerate(values) if violates(value)]
+
+
+def test_rules_come_from_rigid_checks_and_validate_blocks():
+    rules = engine().rules
+    assert (rules["level"].low, rules["level"].high, rules["level"].null_check) == (10, 20, False)
+    assert (rules["ratio"].low, rules["ratio"].high, rules["ratio"].null_check) == (0, 1, True)
+    assert (rules["sample"].low, rules["sample"].null_check) == (None, True)
+    assert "free" not in rules
+
+
+def test_bounds_across_block_boundaries():
+    values = np.array([5, 10, 20, 21, 15, 9, 30, 11, 12, 13, 14, 0, 20, 25, 19, 8], dtype=np.int32)
+    violations = engine().validate("level", values)
+    assert violations.tolist() == expected(values.tolist(), 10, 20, False) == [0, 3, 5, 6, 11, 13, 15]
+    assert engine().validate("level", values, limit=4).tolist() == [0, 3, 5, 6]
+    assert engine().validate("level", values, count=4).tolist() == [0, 3]
+
+
+def test_null_checks():
+    values = np.array([0.5, np.nan, 2.0, -0.1, np.nan, 1.0, 0.0, 0.25, np.nan], dtype=np.float64)
+    assert engine().validate("ratio", values).tolist() == expected(values.tolist(), 0, 1, True)
+    assert engine().validate("sample", values).tolist() == [1, 4, 8]
+
+
+def test_object_arrays_treat_none_as_null():
+    values = np.array([0.5, None, 2, -1, None, 1, 0, 0.25, None, 3], dtype=object)
+    assert engine(block_size=4).validate("ratio", values).tolist() == expected(values.tolist(), 0, 1, True)
+    assert engine(block_size=4).validate("sample", values).tolist() == [1, 4, 8]
+
+
+def test_raw_buffers_use_the_declared_type():
+    buffer = np.array([9, 10, 21], dtype=np.int32).tobytes()
+    assert engine().validate("level", buffer).tolist() == [0, 2]
+    assert engine().validate_all({"level": buffer, "free": buffer}).keys() == {"level"}
+
+
+def test_bad_rules_are_errors():
+    with pytest.raises(ValueError, match="Unknown validate rule"):
+        NeoASMValidationEngine(lower_source(SOURCE + " validate level { rule: sorted }"))
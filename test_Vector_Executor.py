@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from Compiler_Driver import lower_source
+from LLVM_Backend import NeoASMLLVMBackend, llvm
+from Vector_Executor import NeoASMVectorExecutor
+
+SOURCE = '''vec_add A { in: "a, b", out: c }
+vec_mul M { in: "c", out: d }
+vec_sub S { in: "d, a", out: c }
+vec_div Q { in: "c, b", out: e }
+vec_dot D { in: "a, e", out: s }
+vec_cross X { in: "u, v", out: w }
+exec E { link: "A, M, S, Q, D, X" }
+'''
+
+
+def buffers(count):
+    generator = np.random.default_rng(11)
+    arrays = {name: generator.uniform(1, 2, count) for name in ("a", "b", "d", "u", "v")}
+    arrays.update(c=np.zeros(count), e=np.zeros(count), s=np.zeros(1), w=np.zeros(count))
+    return arrays
+
+
+def reference(arrays, count):
+    a, b, d, u, v = (arrays[name][:count] for name in ("a", "b", "d", "u", "v"))
+    c = a + b
+    d = d * c
+    c = d - a
+    e = c / b
+    return {"c": c, "d": d, "e": e, "s": np.dot(a, e),
+            "w": np.cross(u[:count // 3 * 3].reshape(-1, 3), v[:count // 3 * 3].reshape(-1, 3)).reshape(-1)}
+
+
+def check(arrays, expected):
+    for name, values in expected.items():
+        actual = arrays[name][:1] if name == "s" else arrays[name][:len(values)]
+        np.testing.assert_allclose(actual, np.atleast_1d(values), rtol=1e-12, err_msg=name)
+
+
+def test_fused_blocks_match_one_operation_at_a_time():
+    count = 100
+    arrays = buffers(count)
+    expected = reference(arrays, count)
+    executor = NeoASMVectorExecutor(lower_source(SOURCE), block_size=16)
+    executor.run("E", arrays)
+    check(arrays, expected)
+    assert executor.stats["count"] == count
+    assert executor.stats["fused_operations"] == 4 and executor.stats["blocks"] > 1
+
+
+def test_short_buffers_are_rejected():
+    executor = NeoASMVectorExecutor(lower_source(SOURCE))
+    with pytest.raises(ValueError):
+        executor.run("A", dict(buffers(16), c=np.zeros(8)), 16)
+    with pytest.raises(KeyError):
+        executor.run("missing", buffers(16))
+
+
+@pytest.mark.skipif(llvm is None, reason="llvmlite is not installed")
+def test_same_results_as_the_llvm_backend():
+    instructions = lower_source(SOURCE)
+    numpy_arrays, native_arrays = buffers(64), buffers(64)
+    NeoASMVectorExecutor(instructions, block_size=16).run("E", numpy_arrays, 64)
+    NeoASMLLVMBackend().compile(instructions).run("E", native_arrays, 64)
+    for name in numpy_arrays:
+        np.testing.assert_allclose(numpy_arrays[name], native_arrays[name], rtol=1e-12, err_msg=name)